@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db.base import Base
+from app.db.session import db_url, get_engine
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Ignore la table FTS5 message_fts et ses tables internes (migration 0004)"""
+    return not (type_ == "table" and name.startswith("message_fts"))
+
+
+def run_migrations_offline() -> None:
+    """Génère le SQL des migrations sans connexion à la base"""
+    context.configure(
+        url=db_url,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=db_url.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Applique les migrations avec le moteur de l'application (profil SQLite inclus)"""
+    with get_engine().connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite cannot ALTER constraints: autogenerate batch operations
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,85 @@
+"""initial schema
+
+Schéma tel que créé jusqu'ici par Base.metadata.create_all. Une base
+existante créée de cette façon est simplement marquée à cette révision
+(voir app.db.setup_db.run_migrations).
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_id', 'user', ['id'])
+    op.create_index('ix_user_username', 'user', ['username'], unique=True)
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+
+    op.create_table(
+        'conversation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_conversation_id', 'conversation', ['id'])
+
+    op.create_table(
+        'message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('conversation_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('content', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('input_tokens', sa.Integer(), nullable=True),
+        sa.Column('output_tokens', sa.Integer(), nullable=True),
+        sa.Column('cost', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['conversation_id'], ['conversation.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_message_id', 'message', ['id'])
+
+    op.create_table(
+        'usagerecord',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('input_tokens', sa.Integer(), nullable=True),
+        sa.Column('output_tokens', sa.Integer(), nullable=True),
+        sa.Column('cost', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_usagerecord_id', 'usagerecord', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('usagerecord')
+    op.drop_table('message')
+    op.drop_table('conversation')
+    op.drop_table('user')
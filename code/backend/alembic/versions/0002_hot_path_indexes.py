@@ -0,0 +1,72 @@
+"""hot path composite indexes
+
+Index composites pour les requêtes fréquentes : conversations d'un
+utilisateur par date de mise à jour, messages d'une conversation dans
+l'ordre, et usage par (utilisateur, jour). Ce dernier est unique : c'est
+la cible de l'upsert de comptabilité. Uniquement des CREATE INDEX, donc
+aucune table n'est recréée.
+
+Les bases existantes peuvent contenir plusieurs lignes d'usage pour un
+même (utilisateur, jour) : elles sont d'abord fusionnées dans la plus
+ancienne (tokens et coût additionnés), sans quoi l'index unique ne
+pourrait pas être créé.
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_path_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicate_usage() -> None:
+    """Une seule ligne d'usage par (utilisateur, jour), totaux conservés"""
+    kept = (
+        "SELECT min(id) FROM usagerecord WHERE date IS NOT NULL "
+        "GROUP BY user_id, date"
+    )
+    totals = {
+        column: (
+            f"SELECT sum(coalesce(u.{column}, 0)) FROM usagerecord AS u "
+            "WHERE u.user_id = usagerecord.user_id AND u.date = usagerecord.date"
+        )
+        for column in ('input_tokens', 'output_tokens', 'cost')
+    }
+    op.execute(
+        f"""
+        UPDATE usagerecord SET
+            input_tokens = ({totals['input_tokens']}),
+            output_tokens = ({totals['output_tokens']}),
+            cost = ({totals['cost']})
+        WHERE id IN ({kept} HAVING count(*) > 1)
+        """
+    )
+    op.execute(
+        f"DELETE FROM usagerecord WHERE date IS NOT NULL AND id NOT IN ({kept})"
+    )
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_conversation_user_id_updated_at', 'conversation', ['user_id', 'updated_at']
+    )
+    op.create_index(
+        'ix_message_conversation_id_created_at', 'message', ['conversation_id', 'created_at']
+    )
+    merge_duplicate_usage()
+    op.create_index(
+        'ix_usagerecord_user_id_date', 'usagerecord', ['user_id', 'date'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usagerecord_user_id_date', table_name='usagerecord')
+    op.drop_index('ix_message_conversation_id_created_at', table_name='message')
+    op.drop_index('ix_conversation_user_id_updated_at', table_name='conversation')
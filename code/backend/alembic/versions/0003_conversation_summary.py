@@ -0,0 +1,56 @@
+"""denormalized conversation summary
+
+Ajoute message_count, last_message_at et last_message_preview sur
+conversation (ADD COLUMN, sans recréer la table) et les initialise à
+partir des messages existants. La liste des conversations n'a ainsi plus
+besoin d'agrégat ni de sous-requête corrélée par ligne.
+
+Revision ID: 0003_conversation_summary
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_conversation_summary'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+PREVIEW_LENGTH = 100
+
+
+def upgrade() -> None:
+    op.add_column(
+        'conversation',
+        sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.add_column('conversation', sa.Column('last_message_at', sa.DateTime(), nullable=True))
+    op.add_column('conversation', sa.Column('last_message_preview', sa.String(), nullable=True))
+    op.execute(
+        f"""
+        UPDATE conversation SET
+            message_count = (
+                SELECT count(*) FROM message WHERE message.conversation_id = conversation.id
+            ),
+            last_message_at = (
+                SELECT max(created_at) FROM message
+                WHERE message.conversation_id = conversation.id
+            ),
+            last_message_preview = (
+                SELECT substr(content, 1, {PREVIEW_LENGTH}) FROM message
+                WHERE message.conversation_id = conversation.id
+                ORDER BY created_at DESC, id DESC LIMIT 1
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('conversation') as batch_op:
+        batch_op.drop_column('last_message_preview')
+        batch_op.drop_column('last_message_at')
+        batch_op.drop_column('message_count')
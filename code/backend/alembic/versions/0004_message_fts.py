@@ -0,0 +1,68 @@
+"""message full-text index
+
+Table virtuelle FTS5 message_fts à contenu externe (le texte reste dans
+message, seul l'index inversé est stocké), synchronisée par des triggers
+sur INSERT, UPDATE et DELETE de message, puis remplie à partir des
+messages existants. SQLite uniquement : sur un autre moteur la migration
+ne fait rien.
+
+Revision ID: 0004_message_fts
+Revises: 0003_conversation_summary
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_message_fts'
+down_revision = '0003_conversation_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE message_fts USING fts5(
+            content, content='message', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER message_fts_insert AFTER INSERT ON message BEGIN
+            INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER message_fts_delete AFTER DELETE ON message BEGIN
+            INSERT INTO message_fts(message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER message_fts_update AFTER UPDATE OF content ON message BEGIN
+            INSERT INTO message_fts(message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+        END
+        """
+    )
+    op.execute("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS message_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS message_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS message_fts_insert")
+    op.execute("DROP TABLE IF EXISTS message_fts")
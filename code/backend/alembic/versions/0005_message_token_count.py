@@ -0,0 +1,38 @@
+"""message token count
+
+Ajoute message.token_count, le nombre de tokens du contenu compté une
+fois à l'insertion. Pour les messages existants : les tokens de sortie
+facturés pour les réponses de Claude, l'estimation à 4 caractères par
+token sinon (même heuristique que app.services.context).
+
+Revision ID: 0005_message_token_count
+Revises: 0004_message_fts
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_message_token_count'
+down_revision = '0004_message_fts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('message', sa.Column('token_count', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE message SET token_count = COALESCE(
+            CASE WHEN role = 'assistant' THEN output_tokens END,
+            length(content) / 4 + 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    # Plain DROP COLUMN (SQLite >= 3.35): a batch copy of message would drop its FTS triggers
+    op.drop_column('message', 'token_count')
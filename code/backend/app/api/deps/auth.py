@@ -1,54 +1,59 @@
-from typing import Generator
-
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import models, schemas
+from app import schemas
 from app.core import security
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_read_db
+from app.services import user as user_service
+from app.services.principal import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.TOKEN_ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    user = db.query(models.User).filter(models.User.id == token_data.sub).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_read_db), token: str = Depends(oauth2_scheme)
+) -> schemas.UserInDB:
+    # The session only opens a connection on first use: cache hits cost no DB I/O
+    principal = principal_cache.get(token)
+    if principal is None:
+        try:
+            payload = security.decode_access_token(token)
+            token_data = schemas.TokenPayload(**payload)
+        except (ValueError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        stamp = user_service.cache_stamp()
+        user = await user_service.get_user(db, user_id=token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal(claims=token_data, user=user)
+        # Not cached if the user was modified while it was being read
+        if not user_service.invalidated_since(user.id, stamp):
+            principal_cache.set(token, principal)
+    if not principal.user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return principal.user
 
 
 def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: schemas.UserInDB = Depends(get_current_user),
+) -> schemas.UserInDB:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
 def get_current_active_admin(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: schemas.UserInDB = Depends(get_current_user),
+) -> schemas.UserInDB:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges"
@@ -0,0 +1,56 @@
+import ipaddress
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.core.config import settings
+from app.services.rate_limit import LOGIN_IP_POLICY, LOGIN_USER_POLICY, login_limiter
+
+
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in settings.TRUSTED_PROXIES.split(",")
+    if proxy.strip()
+]
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Adresse du client : X-Real-IP posé par nginx, seulement si la connexion
+    vient d'un proxy de confiance (TRUSTED_PROXIES), sinon l'adresse de la
+    connexion : un client direct ne peut pas choisir son compartiment
+    """
+    peer = request.client.host if request.client else "unknown"
+    if is_trusted_proxy(peer):
+        return request.headers.get("X-Real-IP") or peer
+    return peer
+
+
+async def login_rate_limit(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+) -> None:
+    """
+    Limite les tentatives de connexion par IP et par nom d'utilisateur,
+    avant toute vérification de mot de passe (bcrypt)
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+    for key, policy in (
+        (f"login:ip:{client_ip(request)}", LOGIN_IP_POLICY),
+        (f"login:user:{form_data.username.strip().lower()}", LOGIN_USER_POLICY),
+    ):
+        retry_after = await login_limiter.take(key, policy)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
@@ -0,0 +1,68 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app import schemas
+from app.api.deps.auth import get_current_active_admin
+from app.db.session import is_sqlite
+from app.services.backup import BackupError, BackupInProgress, backup_service
+
+router = APIRouter(prefix="/admin", tags=["administration"])
+
+
+@router.get("/backups", response_model=schemas.BackupList)
+async def list_backups(
+    current_user: schemas.UserInDB = Depends(get_current_active_admin),
+) -> Any:
+    """
+    Sauvegardes de la base, les plus récentes d'abord (admin uniquement)
+    """
+    return {"items": backup_service.backups()}
+
+
+@router.post(
+    "/backups", response_model=schemas.BackupResult, status_code=status.HTTP_201_CREATED
+)
+async def create_backup(
+    current_user: schemas.UserInDB = Depends(get_current_active_admin),
+) -> Any:
+    """
+    Sauvegarde la base sans interrompre le service, puis supprime les plus
+    anciennes sauvegardes (admin uniquement)
+    """
+    if not is_sqlite:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Backups require the SQLite database",
+        )
+    try:
+        return await backup_service.run()
+    except BackupInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A backup is already running"
+        )
+    except BackupError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)
+        )
+
+
+@router.post("/backups/{name}/verify", response_model=schemas.BackupVerification)
+async def verify_backup(
+    name: str,
+    current_user: schemas.UserInDB = Depends(get_current_active_admin),
+) -> Any:
+    """
+    Décompresse une sauvegarde et vérifie son intégrité (admin uniquement)
+    """
+    try:
+        result = await backup_service.run_verify(name)
+    except BackupInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A backup is already running"
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Backup not found"
+        )
+    return result
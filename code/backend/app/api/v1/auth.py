@@ -3,27 +3,32 @@ from typing import Any
 
 from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import models, schemas
+from app import schemas
 from app.api.deps.auth import get_current_active_admin, get_current_active_user
+from app.api.deps.rate_limit import login_rate_limit
 from app.core import security
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db, get_async_read_db
 from app.services import user as user_service
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/login", response_model=schemas.TokenResponse)
-def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    _: None = Depends(login_rate_limit),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = user_service.authenticate_user(
-        db, username=form_data.username, password=form_data.password
+    # Lookup and bcrypt on the read pool: the writer is only used for last_login
+    user = await user_service.authenticate_user(
+        read_db, username=form_data.username, password=form_data.password
     )
     if not user:
         raise HTTPException(
@@ -37,7 +42,7 @@ def login_access_token(
         )
     
     # Update last login
-    user = user_service.update_last_login(db, user)
+    user = await user_service.update_last_login(db, user)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
@@ -51,7 +56,7 @@ def login_access_token(
 
 
 @router.post("/logout")
-def logout(current_user: models.User = Depends(get_current_active_user)) -> Any:
+def logout(current_user: schemas.UserInDB = Depends(get_current_active_user)) -> Any:
     """
     Logout current user
     """
@@ -61,11 +66,12 @@ def logout(current_user: models.User = Depends(get_current_active_user)) -> Any:
 
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
     user_in: schemas.UserCreate,
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schemas.UserInDB = Depends(get_current_active_admin),
 ) -> Any:
     """
     Create new user (admin only in V1)
@@ -78,7 +84,9 @@ def register(
         )
     
     # Check if the username exists
-    user = user_service.get_user_by_username(db, username=user_in.username)
+    user = await user_service.get_user_by_username(
+        read_db, username=user_in.username
+    )
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -86,22 +94,22 @@ def register(
         )
     
     # Check if the email exists
-    user = user_service.get_user_by_email(db, email=user_in.email)
+    user = await user_service.get_user_by_email(read_db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered",
         )
     
-    # Create the user
-    user = user_service.create_user(db, user_in=user_in)
+    # Create the user (the password is hashed before the writer is used)
+    user = await user_service.create_user(db, user_in=user_in)
     
     return user
 
 
 @router.get("/me", response_model=schemas.User)
 def read_users_me(
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user
@@ -110,18 +118,20 @@ def read_users_me(
 
 
 @router.put("/password")
-def change_password(
+async def change_password(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_password: str = Body(...),
     new_password: str = Body(...),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
 ) -> Any:
     """
     Change current user password
     """
     # Verify current password
-    if not security.verify_password(current_password, current_user.hashed_password):
+    if not await security.verify_password(
+        current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -129,6 +139,6 @@ def change_password(
     
     # Update password
     user_in = schemas.UserUpdate(password=new_password)
-    user = user_service.update_user(db, user=current_user, user_in=user_in)
+    user = await user_service.update_user(db, user=current_user, user_in=user_in)
     
     return {"message": "Mot de passe modifié avec succès"}
@@ -0,0 +1,500 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.api.deps.auth import get_current_active_user
+from app.core import metrics
+from app.db.session import AsyncSessionLocal, get_async_db, get_async_read_db, is_sqlite
+from app.services import claude, context, export, search
+from app.services import conversation as conversation_service
+from app.services.budget import BudgetExceeded, Reservation, budget_ledger
+from app.services.tool_executor import tool_executor
+from app.services.usage import usage_aggregator
+
+router = APIRouter(prefix="/conversations", tags=["conversations"])
+
+# Claude may chain tool calls: bound the round trips of a single answer
+MAX_TOOL_ROUNDS = 5
+
+
+async def get_owned_conversation(
+    db: AsyncSession, conversation_id: int, user: schemas.UserInDB
+) -> models.Conversation:
+    conversation = await conversation_service.get_conversation(db, conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found"
+        )
+    if conversation.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not the owner of this conversation",
+        )
+    return conversation
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("", response_model=schemas.ConversationList)
+async def list_conversations(
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    List the conversations of the current user, most recent first.
+    Pass the returned `next_cursor` back as `cursor` to get the next page.
+    """
+    try:
+        items, next_cursor = await conversation_service.get_conversations(
+            db, user_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=schemas.SearchResults)
+async def search_conversations(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Full-text search in the messages of the current user, best matches first
+    """
+    if not is_sqlite:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Search requires the SQLite database",
+        )
+    items, next_offset = await search.search_messages(
+        db, user_id=current_user.id, query=q, limit=limit, offset=offset
+    )
+    return {"items": items, "next_offset": next_offset}
+
+
+@router.post(
+    "", response_model=schemas.Conversation, status_code=status.HTTP_201_CREATED
+)
+async def create_conversation(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    conversation_in: schemas.ConversationCreate,
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create a new conversation
+    """
+    return await conversation_service.create_conversation(
+        db, user_id=current_user.id, conversation_in=conversation_in
+    )
+
+
+@router.get("/{conversation_id}", response_model=schemas.ConversationDetail)
+async def read_conversation(
+    conversation_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a conversation and its messages
+    """
+    conversation = await get_owned_conversation(db, conversation_id, current_user)
+    messages = await conversation_service.get_messages(db, conversation_id)
+    # messages is loaded explicitly: lazy loading is not available in async sessions
+    return schemas.ConversationDetail(
+        **schemas.Conversation.model_validate(conversation).model_dump(),
+        messages=[schemas.Message.model_validate(m) for m in messages],
+    )
+
+
+@router.get("/{conversation_id}/export")
+async def export_conversation(
+    conversation_id: int,
+    format: str = "markdown",
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Export a conversation as Markdown or PDF, streamed as it is generated
+    """
+    if format not in export.EXPORTERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format, expected one of: {', '.join(export.EXPORTERS)}",
+        )
+    conversation = await get_owned_conversation(db, conversation_id, current_user)
+    title = conversation.title
+    filename = f"conversation-{conversation_id}.{export.EXTENSIONS[format]}"
+    # The export reads messages with its own session, for as long as the download lasts
+    await db.close()
+    return StreamingResponse(
+        export.EXPORTERS[format](title, conversation_id),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.delete("/{conversation_id}")
+async def delete_conversation(
+    conversation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Delete a conversation and its messages
+    """
+    conversation = await get_owned_conversation(db, conversation_id, current_user)
+    await conversation_service.delete_conversation(db, conversation)
+    return {"message": "Conversation supprimée avec succès"}
+
+
+@router.delete("/{conversation_id}/messages/{message_id}")
+async def delete_message(
+    conversation_id: int,
+    message_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Delete a message from a conversation
+    """
+    await get_owned_conversation(db, conversation_id, current_user)
+    message = await conversation_service.get_message(db, conversation_id, message_id)
+    if not message:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Message not found"
+        )
+    await conversation_service.delete_message(db, message)
+    return {"message": "Message supprimé avec succès"}
+
+
+async def _record_usage(
+    reservation: Reservation, input_tokens: int, output_tokens: int
+) -> float:
+    cost = claude.compute_cost(input_tokens, output_tokens)
+    await budget_ledger.settle(reservation, cost)
+    metrics.CLAUDE_TOKENS.inc("input", amount=input_tokens)
+    metrics.CLAUDE_TOKENS.inc("output", amount=output_tokens)
+    metrics.CLAUDE_COST.inc(amount=cost)
+    usage_aggregator.record(reservation.user_id, input_tokens, output_tokens, cost)
+    return cost
+
+
+def _budget_exceeded(e: BudgetExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Limite d'utilisation atteinte ({e.period})",
+    )
+
+
+def _with_tool_results(
+    history: List[Dict[str, Any]],
+    content: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    return history + [
+        {"role": "assistant", "content": content},
+        {"role": "user", "content": results},
+    ]
+
+
+@dataclass
+class _Turn:
+    """
+    Answer being generated: text and tokens summed over its tool-use round
+    trips. Each round trip is billed against its own budget reservation.
+    """
+
+    user_id: int
+    reservation: Optional[Reservation]
+    parts: List[str] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    # Round trip in progress, not billed yet
+    round_input_tokens: int = 0
+    round_output_tokens: int = 0
+    stop_reason: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    async def close_round(self) -> None:
+        """
+        Bill the round trip in progress, or release its unused reservation.
+        Shielded: it also runs once the request is cancelled (client gone),
+        and an interrupted settlement would leave the tokens unbilled.
+        """
+        reservation, self.reservation = self.reservation, None
+        if reservation is None:
+            return
+        with anyio.CancelScope(shield=True):
+            if self.round_input_tokens or self.round_output_tokens:
+                self.cost += await _record_usage(
+                    reservation, self.round_input_tokens, self.round_output_tokens
+                )
+            else:
+                await budget_ledger.release(reservation)
+        self.input_tokens += self.round_input_tokens
+        self.output_tokens += self.round_output_tokens
+
+    async def next_round(
+        self, history: List[Dict[str, Any]], content: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the tools of the last response, then reserve the next round trip:
+        it sends the whole history again, tool results included
+        """
+        results = await tool_executor.run(content)
+        input_tokens = (
+            self.round_input_tokens
+            + self.round_output_tokens
+            + context.estimate_tokens(json.dumps(results))
+        )
+        self.round_input_tokens = self.round_output_tokens = 0
+        self.stop_reason = None
+        self.reservation = await budget_ledger.reserve(
+            self.user_id, claude.estimate_cost(input_tokens)
+        )
+        return _with_tool_results(history, content, results)
+
+
+async def _store_answer(
+    db: AsyncSession, conversation_id: int, turn: _Turn
+) -> models.Message:
+    text = turn.text
+    return await conversation_service.add_message(
+        db,
+        conversation_id=conversation_id,
+        role="assistant",
+        content=text,
+        input_tokens=turn.input_tokens,
+        output_tokens=turn.output_tokens,
+        cost=turn.cost,
+        # Tokens of the stored text only: tool_use blocks are not part of it
+        token_count=context.estimate_tokens(text),
+    )
+
+
+def _finish_blocks(blocks: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Content of a streamed response, rebuilt from its content blocks"""
+    content = []
+    for index in sorted(blocks):
+        block = blocks[index]
+        if block.get("type") == "tool_use":
+            partial_json = block.pop("partial_json", "")
+            block["input"] = json.loads(partial_json) if partial_json else {}
+        elif block.get("type") == "text" and not block.get("text"):
+            continue
+        content.append(block)
+    return content
+
+
+def _apply_delta(
+    blocks: Dict[int, Dict[str, Any]], event: Dict[str, Any]
+) -> Optional[str]:
+    """Add a content_block_delta to its block; returns the new text, if any"""
+    delta = event["delta"]
+    block = blocks.setdefault(event.get("index", 0), {"type": "text", "text": ""})
+    if delta.get("type") == "input_json_delta":
+        block["partial_json"] = block.get("partial_json", "") + delta["partial_json"]
+        return None
+    if delta.get("text"):
+        block["text"] = block.get("text", "") + delta["text"]
+    return delta.get("text")
+
+
+async def _stream_round(
+    turn: _Turn,
+    blocks: Dict[int, Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    use_tools: bool,
+) -> AsyncIterator[str]:
+    """One round trip: text is relayed as it comes, content blocks are collected"""
+    async for event in claude.stream_message(history, use_tools=use_tools):
+        event_type = event.get("type")
+        if event_type == "content_block_delta":
+            text = _apply_delta(blocks, event)
+            if text:
+                turn.parts.append(text)
+                yield _sse("delta", {"text": text})
+        elif event_type == "content_block_start":
+            blocks[event["index"]] = dict(event["content_block"])
+        elif event_type == "message_start":
+            usage = event["message"]["usage"]
+            turn.round_input_tokens = usage.get("input_tokens", 0)
+        elif event_type == "message_delta":
+            # Cumulative for the round trip
+            usage = event.get("usage", {})
+            turn.round_output_tokens = usage.get(
+                "output_tokens", turn.round_output_tokens
+            )
+            turn.stop_reason = event.get("delta", {}).get(
+                "stop_reason", turn.stop_reason
+            )
+
+
+async def _stream_reply(
+    turn: _Turn, conversation_id: int, history: List[Dict[str, Any]]
+) -> AsyncIterator[str]:
+    """
+    Relay Claude's token stream as server-sent events, running the tools it
+    asks for between round trips, then store the assistant message once the
+    upstream stream is complete. The last round trip may not use tools.
+    """
+    try:
+        for round_index in range(MAX_TOOL_ROUNDS + 1):
+            last_round = round_index == MAX_TOOL_ROUNDS
+            blocks: Dict[int, Dict[str, Any]] = {}
+            async for chunk in _stream_round(turn, blocks, history, not last_round):
+                yield chunk
+            await turn.close_round()
+            if last_round or turn.stop_reason != "tool_use":
+                break
+            content = _finish_blocks(blocks)
+            tools = [block["name"] for block in content if block["type"] == "tool_use"]
+            yield _sse("tool_use", {"tools": tools})
+            history = await turn.next_round(history, content)
+    except claude.ClaudeAPIError as e:
+        await turn.close_round()
+        yield _sse("error", {"status": e.status_code, "detail": e.message})
+        return
+    except BudgetExceeded as e:
+        error = _budget_exceeded(e)
+        yield _sse("error", {"status": error.status_code, "detail": error.detail})
+        return
+    except BaseException:
+        # Client gone or cancelled: what was already generated is still billed
+        await turn.close_round()
+        raise
+
+    # The request session may already be closed: use a dedicated one
+    async with AsyncSessionLocal() as db:
+        message = await _store_answer(db, conversation_id, turn)
+    yield _sse(
+        "message", schemas.Message.model_validate(message).model_dump(mode="json")
+    )
+
+
+async def _answer(turn: _Turn, history: List[Dict[str, Any]]) -> None:
+    """Non-streamed answer, running the tools Claude asks for between round trips"""
+    for round_index in range(MAX_TOOL_ROUNDS + 1):
+        last_round = round_index == MAX_TOOL_ROUNDS
+        response = await claude.create_message(history, use_tools=not last_round)
+        usage = response.get("usage", {})
+        turn.round_input_tokens = usage.get("input_tokens", 0)
+        turn.round_output_tokens = usage.get("output_tokens", 0)
+        content = response.get("content", [])
+        turn.parts.extend(
+            block.get("text", "") for block in content if block.get("type") == "text"
+        )
+        await turn.close_round()
+        if last_round or response.get("stop_reason") != "tool_use":
+            return
+        history = await turn.next_round(history, content)
+
+
+@router.post(
+    "/{conversation_id}/messages/estimate", response_model=schemas.ContextEstimate
+)
+async def estimate_message(
+    conversation_id: int,
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    message_in: schemas.MessageCreate,
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Pre-flight estimate of the context and cost of sending a message
+    """
+    await get_owned_conversation(db, conversation_id, current_user)
+    window = await context.build_context(db, conversation_id, message_in.content)
+    return {
+        "input_tokens": window.input_tokens,
+        # The new message itself is not part of the history
+        "included_messages": len(window.messages) - 1,
+        "omitted_messages": window.omitted,
+        "estimated_cost": window.estimated_cost,
+    }
+
+
+@router.post(
+    "/{conversation_id}/messages",
+    response_model=schemas.Message,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_message(
+    conversation_id: int,
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    message_in: schemas.MessageCreate,
+    current_user: schemas.UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Add a user message and get Claude's answer, streamed as server-sent
+    events when `stream` is true
+    """
+    await get_owned_conversation(read_db, conversation_id, current_user)
+    window = await context.build_context(read_db, conversation_id, message_in.content)
+    # Give the pooled connection back before the (long) upstream call
+    await read_db.close()
+
+    # Kill switch: reserve the estimated cost before anything is stored
+    try:
+        reservation = await budget_ledger.reserve(
+            current_user.id, window.estimated_cost
+        )
+    except BudgetExceeded as e:
+        raise _budget_exceeded(e)
+    turn = _Turn(user_id=current_user.id, reservation=reservation)
+    try:
+        await conversation_service.add_message(
+            db,
+            conversation_id=conversation_id,
+            role="user",
+            content=message_in.content,
+            token_count=context.estimate_tokens(message_in.content),
+        )
+    except BaseException:
+        await turn.close_round()
+        raise
+
+    if message_in.stream:
+        return StreamingResponse(
+            _stream_reply(turn, conversation_id, window.messages),
+            media_type="text/event-stream",
+            # nginx must not buffer the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    try:
+        await _answer(turn, window.messages)
+    except claude.ClaudeAPIError as e:
+        await turn.close_round()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Claude API error: {e.message}",
+        )
+    except BudgetExceeded as e:
+        raise _budget_exceeded(e)
+    except BaseException:
+        await turn.close_round()
+        raise
+    return await _store_answer(db, conversation_id, turn)
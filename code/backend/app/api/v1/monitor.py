@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import schemas
+from app.api.deps.auth import get_current_active_admin
+from app.core import metrics
+
+router = APIRouter(prefix="/monitor", tags=["monitoring"])
+
+# Starlette appends the charset
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    current_user: schemas.UserInDB = Depends(get_current_active_admin),
+) -> PlainTextResponse:
+    """
+    Métriques de l'application au format texte Prometheus, additionnées
+    sur l'ensemble des workers (admin uniquement)
+    """
+    return PlainTextResponse(
+        await metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -4,11 +4,11 @@ Ces routes ne doivent PAS être exposées en production
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.services import user as user_service
-from app.schemas.user import UserCreate
+from app.schemas.user import User, UserCreate
 from app.core.config import settings
 
 # Créer un router avec un préfixe spécifique pour les tests
@@ -18,10 +18,12 @@ router = APIRouter(prefix="/test", tags=["tests"])
 TEST_ROUTES_ENABLED = settings.ENVIRONMENT.lower() != "production"
 
 
-@router.post("/create-first-user", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/create-first-user", response_model=User, status_code=status.HTTP_201_CREATED
+)
 async def create_first_admin_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint spécial pour créer le premier utilisateur admin
@@ -35,7 +37,7 @@ async def create_first_admin_user(
         )
     
     # Vérifier si le premier utilisateur existe déjà
-    existing_users = user_service.count_users(db)
+    existing_users = await user_service.count_users(db)
     if existing_users > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,7 +50,7 @@ async def create_first_admin_user(
     
     # Créer l'utilisateur
     try:
-        user = user_service.create_user(db, UserCreate(**user_data))
+        user = await user_service.create_user(db, UserCreate(**user_data))
         return user
     except Exception as e:
         raise HTTPException(
@@ -58,7 +60,7 @@ async def create_first_admin_user(
 
 
 @router.post("/reset-database", status_code=status.HTTP_200_OK)
-async def reset_database(db: Session = Depends(get_db)):
+async def reset_database(db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint pour réinitialiser la base de données pour les tests
     ATTENTION: Cela supprime toutes les données!
@@ -72,7 +74,7 @@ async def reset_database(db: Session = Depends(get_db)):
     
     try:
         # Supprimer tous les utilisateurs (et leurs données liées via cascade)
-        user_service.delete_all_users(db)
+        await user_service.delete_all_users(db)
         return {"message": "Base de données réinitialisée avec succès"}
     except Exception as e:
         raise HTTPException(
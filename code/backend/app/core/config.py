@@ -1,8 +1,9 @@
 import os
 import secrets
+import tempfile
 from typing import Any, Dict, List, Optional, Union
 
-from pydantic import AnyHttpUrl, field_validator
+from pydantic import AnyHttpUrl, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -40,14 +41,89 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+    # SQLite tuning profile (applied on every new connection)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    # 64 MiB of memory-mapped I/O
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+    # Negative value = size in KiB (here 16 MiB of page cache per connection)
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # Read-only connections; writes go through a single serialized connection
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+
+    # SQL profiling: statements slower than this are logged, never with the values
+    # of their parameters (only their types, outside production)
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+    # The same statement run this many times in one request is reported as a likely N+1
+    DB_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+    # X-DB-Profile response header
+    # Unset = enabled outside production, resolved once ENVIRONMENT is known
+    DB_PROFILE_HEADER: Optional[bool] = None
     
+    # Password hashing executor (bcrypt runs in worker processes)
+    # 0 = one process per CPU core
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    # Hashing jobs allowed to wait before answering 503
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+    # Login attempts (token buckets shared by the workers): burst, then refill
+    # per minute
+    LOGIN_RATE_LIMIT_ENABLED: bool = os.getenv(
+        "LOGIN_RATE_LIMIT_ENABLED", "True"
+    ).lower() in ("true", "1", "t")
+    LOGIN_RATE_LIMIT_IP_BURST: int = int(os.getenv("LOGIN_RATE_LIMIT_IP_BURST", "20"))
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = float(
+        os.getenv("LOGIN_RATE_LIMIT_IP_PER_MINUTE", "10")
+    )
+    LOGIN_RATE_LIMIT_USER_BURST: int = int(
+        os.getenv("LOGIN_RATE_LIMIT_USER_BURST", "10")
+    )
+    LOGIN_RATE_LIMIT_USER_PER_MINUTE: float = float(
+        os.getenv("LOGIN_RATE_LIMIT_USER_PER_MINUTE", "5")
+    )
+    # Peers whose X-Real-IP header is trusted (comma-separated addresses or networks)
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "127.0.0.1")
+
     # Token settings
     TOKEN_ALGORITHM: str = os.getenv("TOKEN_ALGORITHM", "HS256")
+
+    # User identity cache (lookups by id, username and email)
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "512"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+    # Verified-principal cache (decoded token + user snapshot)
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(
+        os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")
+    )
     
     # Claude API settings
     CLAUDE_API_KEY: str = os.getenv("CLAUDE_API_KEY", "")
     CLAUDE_API_URL: str = os.getenv("CLAUDE_API_URL", "https://api.anthropic.com/v1")
+    CLAUDE_API_VERSION: str = os.getenv("CLAUDE_API_VERSION", "2023-06-01")
+    CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-3-7-sonnet-20250219")
+    CLAUDE_MAX_TOKENS: int = int(os.getenv("CLAUDE_MAX_TOKENS", "4096"))
+    CLAUDE_TIMEOUT_SECONDS: float = float(os.getenv("CLAUDE_TIMEOUT_SECONDS", "120"))
+    # Input tokens of history sent per call: older turns beyond it are left out
+    CLAUDE_CONTEXT_TOKEN_BUDGET: int = int(
+        os.getenv("CLAUDE_CONTEXT_TOKEN_BUDGET", "32000")
+    )
+    # Prices per million tokens, in the currency of the limits (euros)
+    CLAUDE_INPUT_PRICE_PER_MTOK: float = float(
+        os.getenv("CLAUDE_INPUT_PRICE_PER_MTOK", "3.0")
+    )
+    CLAUDE_OUTPUT_PRICE_PER_MTOK: float = float(
+        os.getenv("CLAUDE_OUTPUT_PRICE_PER_MTOK", "15.0")
+    )
     
+    # Usage accounting is batched in memory and flushed periodically
+    USAGE_FLUSH_INTERVAL_SECONDS: float = float(
+        os.getenv("USAGE_FLUSH_INTERVAL_SECONDS", "10")
+    )
+
     # Default limits (in euros)
     DEFAULT_DAILY_LIMIT: float = float(os.getenv("DEFAULT_DAILY_LIMIT", "5.0"))
     DEFAULT_MONTHLY_LIMIT: float = float(os.getenv("DEFAULT_MONTHLY_LIMIT", "50.0"))
@@ -55,6 +131,60 @@ class Settings(BaseSettings):
     # Brave API key for MCP
     BRAVE_API_KEY: str = os.getenv("BRAVE_API_KEY", "")
 
+    # MCP tools configuration file
+    MCP_CONFIG_PATH: str = os.getenv(
+        "MCP_CONFIG_PATH",
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__), "..", "..", "..", "config", "mcp_config.yaml"
+            )
+        ),
+    )
+
+    # State shared by the gunicorn workers of the host
+    # (ephemeral, in RAM when /dev/shm exists)
+    SHARED_STATE_PATH: str = os.getenv(
+        "SHARED_STATE_PATH",
+        os.path.join(
+            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+            "claude-rasp-shared.db",
+        ),
+    )
+
+    # Delay before a cache invalidation made by one worker reaches the others
+    INVALIDATION_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("INVALIDATION_POLL_INTERVAL_SECONDS", "0.25")
+    )
+
+    # Persistent data (database, logs, backups, caches)
+    STORAGE_DIR: str = os.getenv(
+        "STORAGE_DIR",
+        os.path.abspath(
+            os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "storage")
+        ),
+    )
+
+    # Online database backups (the application keeps serving during the copy)
+    # Empty = <STORAGE_DIR>/backups, resolved once STORAGE_DIR is known
+    BACKUP_DIR: str = os.getenv("BACKUP_DIR", "")
+    # Hours between two scheduled backups (0 = on demand only)
+    BACKUP_INTERVAL_HOURS: float = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+    # Most recent backups kept, the older ones are deleted
+    BACKUP_KEEP: int = int(os.getenv("BACKUP_KEEP", "7"))
+    # Throttling: pages copied per step (4 KiB each), then a pause
+    BACKUP_PAGES_PER_STEP: int = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    BACKUP_STEP_SLEEP_MS: float = float(os.getenv("BACKUP_STEP_SLEEP_MS", "100"))
+
+    @model_validator(mode="after")
+    def derived_defaults(self) -> "Settings":
+        # STORAGE_DIR and ENVIRONMENT may come from .env: derive the defaults
+        # from the loaded values
+        if not self.BACKUP_DIR:
+            self.BACKUP_DIR = os.path.join(self.STORAGE_DIR, "backups")
+        if self.DB_PROFILE_HEADER is None:
+            self.DB_PROFILE_HEADER = self.ENVIRONMENT.lower() != "production"
+        return self
+
     model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
 
 
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are removed from the change log
+RETENTION_SECONDS = 300
+PRUNE_EVERY = 100
+# Latest invalidated keys remembered to reject stale cache fills
+RECENT_KEYS = 1024
+
+Handler = Callable[[str], None]
+
+# Key meaning "every entry of the channel"
+ALL = "*"
+
+
+class InvalidationBus:
+    """
+    Bus d'invalidation entre les workers d'un même hôte, adossé à un
+    journal de changements dans l'état partagé. Un worker qui modifie une
+    donnée publie (canal, clé) ; les autres relisent le journal à intervalle
+    court et appellent les gestionnaires abonnés au canal, qui évincent
+    l'entrée de leur cache local. Le retard est borné par l'intervalle de
+    lecture, et les TTL des caches restent une borne de secours.
+
+    Une lecture en base qui manque le cache peut croiser une invalidation :
+    elle prend un jeton (stamp()) avant la requête et ne remplit le cache
+    que si aucune invalidation de sa clé n'a été appliquée depuis
+    (invalidated_since()).
+    """
+
+    def __init__(self, state: SharedState, poll_interval: float) -> None:
+        self.state = state
+        self.poll_interval = poll_interval
+        # Identifies this process's own entries in the log
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._last_seq = 0
+        self._polls = 0
+        self._task: Optional[asyncio.Task] = None
+        # Invalidations applied by this process, local or polled
+        self._sequence = 0
+        self._recent: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        # Sequence of the most recent key forgotten from _recent
+        self._forgotten = 0
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def stamp(self) -> int:
+        """Jeton à prendre avant une lecture destinée à remplir un cache"""
+        return self._sequence
+
+    def invalidated_since(self, channel: str, key: str, stamp: int) -> bool:
+        """Vrai si la clé (ou tout le canal) a été invalidée après le jeton"""
+        if stamp < self._forgotten:
+            # Too old to tell: assume the read may be stale
+            return True
+        return (
+            self._recent.get((channel, key), 0) > stamp
+            or self._recent.get((channel, ALL), 0) > stamp
+        )
+
+    def _dispatch(self, channel: str, key: str) -> None:
+        self._sequence += 1
+        self._recent[(channel, key)] = self._sequence
+        self._recent.move_to_end((channel, key))
+        if len(self._recent) > RECENT_KEYS:
+            _, self._forgotten = self._recent.popitem(last=False)
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception(f"Invalidation handler failed for {channel}:{key}")
+
+    async def publish(self, channel: str, key: str = ALL) -> None:
+        """Invalide localement, puis annonce l'invalidation aux autres workers"""
+        self._dispatch(channel, key)
+        self.published += 1
+
+        def append(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT INTO invalidation (channel, key, origin, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (channel, str(key), self.origin, time.time()),
+            )
+
+        await self.state.run(append)
+
+    def _read_log(self, connection: sqlite3.Connection) -> List[tuple]:
+        return connection.execute(
+            "SELECT seq, channel, key, origin FROM invalidation"
+            " WHERE seq > ? ORDER BY seq",
+            (self._last_seq,),
+        ).fetchall()
+
+    async def poll(self) -> int:
+        """
+        Applique les invalidations publiées par les autres workers ; renvoie
+        leur nombre
+        """
+        rows = await self.state.run_read(self._read_log)
+        applied = 0
+        for seq, channel, key, origin in rows:
+            self._last_seq = seq
+            if origin != self.origin:
+                self._dispatch(channel, key)
+                applied += 1
+        self.received += applied
+        self._polls += 1
+        if self._polls % PRUNE_EVERY == 0:
+            await self.state.run(
+                lambda c: c.execute(
+                    "DELETE FROM invalidation WHERE created_at < ?",
+                    (time.time() - RETENTION_SECONDS,),
+                )
+            )
+        return applied
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Invalidation poll failed, will retry")
+
+    async def start(self) -> None:
+        if self._task is None:
+            # Only what is published from now on concerns this worker's (empty) caches
+            self._last_seq = await self.state.run_read(
+                lambda c: c.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM invalidation"
+                ).fetchone()[0]
+            )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "last_seq": self._last_seq,
+        }
+
+    def export_metrics(self) -> None:
+        """Recopie les compteurs du bus dans les métriques Prometheus"""
+        metrics.CACHE_INVALIDATIONS.set("published", value=self.published)
+        metrics.CACHE_INVALIDATIONS.set("received", value=self.received)
+
+
+bus = InvalidationBus(
+    shared_state, poll_interval=settings.INVALIDATION_POLL_INTERVAL_SECONDS
+)
+metrics.registry.collector(bus.export_metrics)
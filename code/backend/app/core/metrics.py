@@ -0,0 +1,421 @@
+import asyncio
+import bisect
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from typing import (
+    Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple
+)
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.shared_state import SharedState, shared_state
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets, in seconds
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# A worker whose snapshot is older than this is considered gone
+SNAPSHOT_RETENTION_SECONDS = 300
+# Snapshot row that accumulates the counters of the workers that are gone
+RETIRED_ORIGIN = "retired"
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def set(self, *label_values: str, value: float) -> None:
+        """Valeur tenue ailleurs (compteurs d'un cache), relue par un collecteur"""
+        self._values[label_values] = float(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {json.dumps(key): value for key, value in self._values.items()}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            json.dumps(key): list(series) for key, series in self._values.items()
+        }
+
+
+def _add(
+    totals: Dict[str, Dict[str, Any]],
+    snapshot: Dict[str, Dict[str, Any]],
+    names: Collection[str],
+) -> None:
+    """Ajoute aux totaux les séries d'un instantané, pour les métriques names"""
+    for name, samples in snapshot.items():
+        if name not in names:
+            continue
+        merged = totals.setdefault(name, {})
+        for key, value in samples.items():
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0.0] * len(value))
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0.0) + value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """
+    Métriques en mémoire de chaque worker. Chaque worker publie
+    périodiquement un instantané de ses métriques dans l'état partagé ;
+    l'export additionne les instantanés de tous les workers, au format
+    texte de Prometheus.
+
+    Quand un worker s'arrête (ou ne publie plus), ses compteurs et
+    histogrammes sont reportés dans une ligne « retired » avant que son
+    instantané soit supprimé : les totaux exportés ne diminuent jamais.
+    Les jauges d'un worker disparu sont simplement abandonnées.
+    """
+
+    def __init__(self, state: SharedState, flush_interval: float = 5.0) -> None:
+        self.state = state
+        self.flush_interval = flush_interval
+        self.origin = uuid.uuid4().hex
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _register(self, metric: Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """
+        Enregistre une fonction qui recopie dans des métriques l'état d'un
+        composant (statistiques d'un cache, d'un pool), avant chaque instantané
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                logger.exception("Metrics collector %s failed", collect.__qualname__)
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    async def flush(self) -> None:
+        """Publie l'instantané de ce worker dans l'état partagé"""
+        data = json.dumps(self.snapshot())
+
+        def write(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT OR REPLACE INTO metrics_snapshot (origin, data, updated_at) "
+                "VALUES (?, ?, ?)",
+                (self.origin, data, time.time()),
+            )
+
+        await self.state.run(write)
+
+    def _retire(self, connection: sqlite3.Connection, snapshots: List[str]) -> None:
+        """Reporte les compteurs et histogrammes de workers disparus"""
+        cumulative = {
+            name for name, metric in self._metrics.items() if metric.kind != "gauge"
+        }
+        row = connection.execute(
+            "SELECT data FROM metrics_snapshot WHERE origin = ?", (RETIRED_ORIGIN,)
+        ).fetchone()
+        retired = json.loads(row[0]) if row else {}
+        for data in snapshots:
+            _add(retired, json.loads(data), cumulative)
+        connection.execute(
+            "INSERT OR REPLACE INTO metrics_snapshot (origin, data, updated_at) "
+            "VALUES (?, ?, ?)",
+            (RETIRED_ORIGIN, json.dumps(retired), time.time()),
+        )
+
+    async def collect(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Somme des instantanés des workers encore actifs (celui-ci à jour) et
+        des totaux des workers disparus
+        """
+        await self.flush()
+
+        def read(connection: sqlite3.Connection) -> List[str]:
+            stale = connection.execute(
+                "SELECT origin, data FROM metrics_snapshot "
+                "WHERE updated_at < ? AND origin != ?",
+                (time.time() - SNAPSHOT_RETENTION_SECONDS, RETIRED_ORIGIN),
+            ).fetchall()
+            if stale:
+                self._retire(connection, [data for _, data in stale])
+                connection.executemany(
+                    "DELETE FROM metrics_snapshot WHERE origin = ?",
+                    [(origin,) for origin, _ in stale],
+                )
+            rows = connection.execute("SELECT data FROM metrics_snapshot")
+            return [row[0] for row in rows]
+
+        totals: Dict[str, Dict[str, Any]] = {name: {} for name in self._metrics}
+        for data in await self.state.run(read):
+            _add(totals, json.loads(data), self._metrics)
+        return totals
+
+    async def render(self) -> str:
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        totals = await self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(totals[name].items()):
+                label_values = json.loads(key)
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets + (float("inf"),), value):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        labels = _labels(metric.labels, label_values, f'le="{le}"')
+                        lines.append(f"{name}_bucket{labels} {_number(cumulative)}")
+                    labels = _labels(metric.labels, label_values)
+                    lines.append(f"{name}_sum{labels} {_number(value[-1])}")
+                    lines.append(f"{name}_count{labels} {_number(cumulative)}")
+                else:
+                    labels = _labels(metric.labels, label_values)
+                    lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Metrics flush failed, will retry")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # A stopped worker no longer reports: its counters move to the retired row
+        data = json.dumps(self.snapshot())
+
+        def retire(connection: sqlite3.Connection) -> None:
+            self._retire(connection, [data])
+            connection.execute(
+                "DELETE FROM metrics_snapshot WHERE origin = ?", (self.origin,)
+            )
+
+        await self.state.run(retire)
+
+
+registry = MetricsRegistry(shared_state)
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being handled"
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the body is sent",
+    ("method", "route"),
+)
+DB_QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("engine",)
+)
+UPSTREAM_LATENCY = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Calls to external services: time to first byte (ttfb)"
+    " and until the body is read (total)",
+    ("upstream", "phase"),
+)
+UPSTREAM_CONNECTIONS = registry.gauge(
+    "upstream_connections",
+    "Pooled connections to external services (active or idle)",
+    ("upstream", "state"),
+)
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_errors_total",
+    "Calls to external services without response",
+    ("upstream",),
+)
+PASSWORD_HASH_LATENCY = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt jobs, queueing included", ("operation",)
+)
+CLAUDE_TOKENS = registry.counter(
+    "claude_tokens_total", "Claude tokens billed", ("direction",)
+)
+CLAUDE_COST = registry.counter(
+    "claude_cost_euros_total", "Cost of the Claude calls, in euros"
+)
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "In-process cache lookups", ("cache", "result")
+)
+CACHE_ENTRIES = registry.gauge(
+    "cache_entries", "Entries held by in-process caches", ("cache",)
+)
+CACHE_INVALIDATIONS = registry.counter(
+    "cache_invalidations_total",
+    "Cache invalidations published by a worker, or received from the others",
+    ("direction",),
+)
+TOOL_CACHE_LOOKUPS = registry.counter(
+    "tool_cache_lookups_total",
+    "MCP tool result cache lookups (memory_hit, disk_hit or miss)",
+    ("tool", "result"),
+)
+TOOL_CIRCUIT_STATE = registry.gauge(
+    "tool_circuit_state",
+    "Workers whose circuit breaker of a MCP tool is in this state",
+    ("tool", "state"),
+)
+TOOL_CONSECUTIVE_FAILURES = registry.gauge(
+    "tool_consecutive_failures", "Consecutive failed calls to a MCP tool", ("tool",)
+)
+TOOL_CACHE_BYTES = registry.gauge(
+    "tool_cache_bytes", "Serialized size of the tool results held in memory"
+)
+
+
+def track_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Exporte les statistiques d'un TTLCache (hits, misses, size)"""
+
+    @registry.collector
+    def collect() -> None:
+        values = stats()
+        CACHE_LOOKUPS.set(name, "hit", value=values["hits"])
+        CACHE_LOOKUPS.set(name, "miss", value=values["misses"])
+        CACHE_ENTRIES.set(name, value=values["size"])
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : nombre de requêtes, requêtes en cours et latence par
+    route. La route est le gabarit (/conversations/{conversation_id}), pas
+    le chemin, pour garder un nombre de séries borné.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Set by the router once the request matched a route
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
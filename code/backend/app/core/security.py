@@ -1,12 +1,23 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Callable, Dict, Optional, Union
 
-from jose import jwt
-from passlib.context import CryptContext
+from fastapi import HTTPException, status
 
+from app.core import metrics
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib and jose are imported on first use, not when a worker boots
+_pwd_context = None
+
+# bcrypt is pure CPU work: it runs in a dedicated process pool so that a
+# burst of logins cannot hold the event loop or the GIL of the worker.
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_pending_hash_jobs = 0
 
 
 def create_access_token(
@@ -22,26 +33,106 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode = {
-        "exp": expire, 
+        "exp": expire,
         "sub": str(subject),
         "iat": datetime.utcnow(),
         "type": "access_token"
     }
+    from jose import jwt
+
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.TOKEN_ALGORITHM
     )
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def decode_access_token(token: str) -> Dict[str, Any]:
     """
-    Verify a password against a hash.
+    Decode and verify a JWT access token. Raises ValueError if it is invalid.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.TOKEN_ALGORITHM]
+        )
+    except JWTError as e:
+        raise ValueError(str(e)) from e
+
+
+def _get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash (blocking, runs in the hashing pool).
+    """
+    return _get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """
-    Hash a password.
+    Hash a password (blocking, runs in the hashing pool).
+    """
+    return _get_pwd_context().hash(password)
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+            # spawn: never fork a process that already runs an event loop and threads
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    """
+    Stop the hashing worker processes (called on application shutdown).
+    """
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_hash_job(operation: str, func: Callable[..., Any], *args: Any) -> Any:
+    global _pending_hash_jobs
+    if _pending_hash_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending_hash_jobs += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _pending_hash_jobs -= 1
+        metrics.PASSWORD_HASH_LATENCY.observe(time.perf_counter() - started, operation)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash without blocking the event loop.
+    """
+    return await _run_hash_job(
+        "verify", verify_password_sync, plain_password, hashed_password
+    )
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password without blocking the event loop.
     """
-    return pwd_context.hash(password)
+    return await _run_hash_job("hash", get_password_hash, password)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tables of the shared state, created on first connection
+SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS token_bucket (
+        key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    # Change log of the invalidation bus
+    """
+    CREATE TABLE IF NOT EXISTS invalidation (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        key TEXT NOT NULL,
+        origin TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    # Budget counters, shared so that the limits hold across workers
+    """
+    CREATE TABLE IF NOT EXISTS budget_spend (
+        user_id INTEGER PRIMARY KEY,
+        day TEXT NOT NULL,
+        month TEXT NOT NULL,
+        daily_spent REAL NOT NULL,
+        monthly_spent REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS budget_reservation (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS budget_limit (
+        user_id INTEGER PRIMARY KEY,
+        daily_limit REAL NOT NULL,
+        monthly_limit REAL NOT NULL
+    )
+    """,
+    # Latest metrics of each worker, summed when scraped
+    """
+    CREATE TABLE IF NOT EXISTS metrics_snapshot (
+        origin TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    # Jobs run by a single process at a time (database backups)
+    """
+    CREATE TABLE IF NOT EXISTS lease (
+        name TEXT PRIMARY KEY,
+        origin TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """,
+]
+
+
+class SharedState:
+    """
+    État partagé entre les workers gunicorn d'un même hôte : un petit
+    fichier SQLite en WAL, distinct de la base de l'application et placé
+    par défaut en mémoire (/dev/shm). Son contenu est éphémère : il peut
+    être perdu au redémarrage sans conséquence.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        # Process that opened the connection: a forked worker opens its own
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Ephemeral data: no fsync
+            connection.execute("PRAGMA synchronous=OFF")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def transaction(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Exécute fn dans une transaction d'écriture (BEGIN IMMEDIATE),
+        atomique entre workers"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(connection)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+
+    def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Exécute fn en lecture seule, sans verrou d'écriture"""
+        with self._lock:
+            return fn(self._connect())
+
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """transaction() hors de la boucle d'événements"""
+        return await asyncio.to_thread(self.transaction, fn)
+
+    async def run_read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """read() hors de la boucle d'événements"""
+        return await asyncio.to_thread(self.read, fn)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+shared_state = SharedState(settings.SHARED_STATE_PATH)
@@ -0,0 +1,195 @@
+"""
+Profilage du démarrage : durée d'import de chaque module et durée des
+étapes d'initialisation (lifespan).
+
+    python -m app.core.startup_profile [--top 25] [--json rapport.json]
+
+lance un processus neuf sous `python -X importtime`, importe app.main,
+exécute le démarrage puis l'arrêt de l'application et affiche le rapport.
+Sous gunicorn, STARTUP_PROFILE=1 journalise les étapes de chaque worker
+(PYTHONPROFILEIMPORTTIME=1 ajoute le détail des imports sur stderr).
+
+Ce module n'importe que la bibliothèque standard : il est chargé avant le
+reste de l'application sans fausser ses mesures.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import traceback
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("STARTUP_PROFILE", "").lower() in ("true", "1", "t")
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+_started = time.perf_counter()
+
+# (step, seconds), in the order they ran
+phases: List[Tuple[str, float]] = []
+
+
+def mark(name: str) -> None:
+    """Enregistre le temps écoulé depuis le chargement de ce module"""
+    phases.append((name, time.perf_counter() - _started))
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mesure une étape d'initialisation"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, time.perf_counter() - started))
+
+
+def log_phases() -> None:
+    if ENABLED:
+        steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in phases)
+        logger.info(f"Startup profile (pid {os.getpid()}): {steps}")
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Lignes `import time: self | cumulative | module` de -X importtime (µs)"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        modules.append(
+            {
+                "module": fields[2].strip(),
+                "self_ms": int(fields[0]) / 1000,
+                "cumulative_ms": int(fields[1]) / 1000,
+            }
+        )
+    return modules
+
+
+def _package(module: str) -> str:
+    parts = module.split(".")
+    # app.api, app.services...: the application is broken down one level further
+    return ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+
+
+def build_report(
+    modules: List[Dict[str, Any]], child: Dict[str, Any], top: int
+) -> Dict[str, Any]:
+    packages: Dict[str, float] = defaultdict(float)
+    for module in modules:
+        packages[_package(module["module"])] += module["self_ms"]
+    app_main = next((m for m in modules if m["module"] == "app.main"), None)
+    return {
+        "python": sys.version.split()[0],
+        "import_app_main_ms": app_main["cumulative_ms"] if app_main else None,
+        "startup_ms": child["startup_ms"],
+        "phases_ms": child["phases_ms"],
+        "packages_ms": dict(
+            sorted(
+                ((k, round(v, 1)) for k, v in packages.items()), key=lambda kv: -kv[1]
+            )[:top]
+        ),
+        "slowest_modules": sorted(modules, key=lambda m: -m["self_ms"])[:top],
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Import of app.main: {report['import_app_main_ms']:.0f} ms")
+    print(f"Lifespan startup:   {report['startup_ms']:.0f} ms")
+    for name, ms in report["phases_ms"].items():
+        print(f"  {name:<28} {ms:8.1f} ms")
+    print("\nImport time by package (self):")
+    for name, ms in report["packages_ms"].items():
+        print(f"  {name:<28} {ms:8.1f} ms")
+    print("\nSlowest modules (self / cumulative):")
+    for module in report["slowest_modules"]:
+        print(
+            f"  {module['module']:<50} {module['self_ms']:8.1f} ms "
+            f"{module['cumulative_ms']:8.1f} ms"
+        )
+
+
+async def _run_lifespan() -> float:
+    from app.main import app
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        elapsed = time.perf_counter() - started
+    return elapsed
+
+
+def _child() -> None:
+    """Processus mesuré : import de app.main puis démarrage de l'application"""
+    import asyncio
+
+    import app.main  # noqa: F401
+
+    # Run with -m, this file is __main__: the application records into the module
+    from app.core import startup_profile
+
+    try:
+        startup = asyncio.run(_run_lifespan())
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        # Database threads left open by a failed startup would block the exit
+        os._exit(1)
+    measures = {
+        "startup_ms": startup * 1000,
+        "phases_ms": {
+            name: round(seconds * 1000, 1) for name, seconds in startup_profile.phases
+        },
+    }
+    sys.stdout.write("\n" + json.dumps(measures) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profil du démarrage de l'application")
+    parser.add_argument(
+        "--top", type=int, default=20, help="modules et paquets affichés"
+    )
+    parser.add_argument("--json", help="enregistre aussi le rapport dans ce fichier")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child()
+        return 0
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-m",
+            "app.core.startup_profile",
+            "--child",
+        ],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-4000:])
+        return result.returncode
+    # The application may log to stdout: the measures are the last line
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+    report = build_report(parse_importtime(result.stderr), child, args.top)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
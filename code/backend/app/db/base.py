@@ -2,3 +2,5 @@
 # imported by Alembic
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
+from app.models.conversation import Conversation, Message  # noqa
+from app.models.usage import UsageRecord  # noqa
@@ -1,5 +1,5 @@
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schemas
 from app.core.config import settings
@@ -9,10 +9,10 @@ from app.services import user as user_service
 logger = logging.getLogger(__name__)
 
 
-def init_db(db: Session) -> None:
+async def init_db(db: AsyncSession) -> None:
     """Initialize the database with first user"""
     # Check if we already have users
-    users = user_service.get_users(db, limit=1)
+    users = await user_service.get_users(db, limit=1)
     if users:
         logger.info("Database already initialized with users")
         return
@@ -28,7 +28,7 @@ def init_db(db: Session) -> None:
         is_admin=True,
     )
     
-    user = user_service.create_user(db, user_in=user_in)
+    user = await user_service.create_user(db, user_in=user_in)
     logger.info(f"Admin user created with ID: {user.id}")
 
     logger.info("Initial database setup completed")
@@ -0,0 +1,129 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-DB-Profile"
+
+# Logged parameter types are cut to this length (bulk inserts can be long)
+MAX_LOGGED_PARAMETERS = 500
+
+
+@dataclass
+class QueryProfile:
+    """Requêtes SQL exécutées pendant une requête HTTP"""
+
+    queries: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Instructions exécutées au moins threshold fois : N+1 probables"""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def header(self) -> str:
+        repeated = len(self.repeated(settings.DB_N_PLUS_ONE_THRESHOLD))
+        return (
+            f"queries={self.queries}; time_ms={self.duration * 1000:.1f}; "
+            f"n_plus_one={repeated}"
+        )
+
+
+# Profile of the HTTP request being handled, None outside of one
+_current: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "query_profile", default=None
+)
+
+
+def current_profile() -> Optional[QueryProfile]:
+    return _current.get()
+
+
+def _parameter_types(parameters: Any) -> str:
+    """
+    Types des paramètres liés, jamais leurs valeurs : ils contiennent des
+    hash de mots de passe et le contenu des messages
+    """
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(
+            f"{name}: {type(value).__name__}" for name, value in parameters.items()
+        ) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany: one set of parameters per row
+            return f"{len(parameters)} x {_parameter_types(parameters[0])}"
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _format_parameters(parameters: Any) -> str:
+    text = _parameter_types(parameters)
+    if len(text) > MAX_LOGGED_PARAMETERS:
+        text = text[:MAX_LOGGED_PARAMETERS] + "..."
+    return text
+
+
+def record_query(
+    statement: str, parameters: Any, duration: float, engine: str
+) -> None:
+    """Appelé après chaque instruction SQL (événement after_cursor_execute)"""
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, duration)
+    if duration * 1000 >= settings.DB_SLOW_QUERY_MS:
+        message = f"Slow query ({duration * 1000:.1f} ms, {engine}): {statement}"
+        # Statement only in production; elsewhere, the types of its parameters
+        if settings.ENVIRONMENT.lower() != "production":
+            message += f" -- parameter types: {_format_parameters(parameters)}"
+        logger.warning(message)
+
+
+class QueryProfilerMiddleware:
+    """
+    Compte les requêtes SQL et leur durée pour chaque requête HTTP, signale
+    les instructions répétées (N+1 probables) et, hors production, résume
+    le tout dans l'en-tête X-DB-Profile. Les requêtes exécutées pendant un
+    flux (SSE, export) arrivent après l'en-tête : seul le journal les voit.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_with_profile(message: Message) -> None:
+            start = message["type"] == "http.response.start"
+            if start and settings.DB_PROFILE_HEADER:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_HEADER.lower().encode(), profile.header().encode())
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current.reset(token)
+            repeated = profile.repeated(settings.DB_N_PLUS_ONE_THRESHOLD)
+            for statement, count in repeated:
+                logger.warning(
+                    f"Likely N+1 on {scope['method']} {scope['path']}: "
+                    f"statement run {count} times: {statement}"
+                )
@@ -1,9 +1,21 @@
-from sqlalchemy import create_engine
+import time
+from typing import Any, AsyncGenerator, Callable, Dict
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
+from app.core import metrics
 from app.core.config import settings
+from app.db import profiler
 
 # Déterminer le chemin racine du projet
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '..', '..'))
@@ -12,21 +24,182 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.p
 if settings.DATABASE_URL.startswith('sqlite:///./storage/'):
     # Chemin relatif à la racine du projet
     db_url = f"sqlite:///{os.path.join(PROJECT_ROOT, settings.DATABASE_URL[12:])}"
-    print(f"Using database at: {db_url}")
-    
-    # Assurer que le répertoire existe
-    db_path = db_url.replace('sqlite:///', '')
-    db_dir = os.path.dirname(db_path)
-    os.makedirs(db_dir, exist_ok=True)
 else:
     # Utiliser l'URL telle quelle
     db_url = settings.DATABASE_URL
-    print(f"Using database URL: {db_url}")
 
-engine = create_engine(
-    db_url, connect_args={"check_same_thread": False}
+
+def get_async_url(url: str) -> str:
+    """
+    Convertit une URL synchrone vers le driver asyncio équivalent
+    (aiosqlite pour SQLite, asyncpg pour PostgreSQL).
+    """
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """
+    Applique le profil SQLite de production (WAL, mmap, busy_timeout...)
+    sur une connexion DBAPI fraîchement ouverte.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+is_sqlite = db_url.startswith("sqlite")
+async_db_url = get_async_url(db_url)
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """
+    Mesure la durée d'exécution des requêtes SQL d'un moteur (métriques,
+    profil de la requête HTTP en cours, journal des requêtes lentes)
+    """
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._query_started
+        metrics.DB_QUERY_LATENCY.observe(duration, name)
+        profiler.record_query(statement, parameters, duration, name)
+
+
+def _apply_pragmas_on_connect(sync_engine, read_only: bool = False) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+
+# Engines are built on first use, not at import: a worker that boots does
+# not load the database driver before it needs it
+_engines: Dict[str, Any] = {}
+
+
+def get_engine() -> Engine:
+    """Moteur synchrone (scripts d'administration, Alembic)"""
+    if "sync" not in _engines:
+        if db_url.startswith("sqlite:///"):
+            # Assurer que le répertoire existe
+            db_path = db_url[len("sqlite:///"):]
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        sync_engine = create_engine(db_url, connect_args={"check_same_thread": False})
+        if is_sqlite:
+            _apply_pragmas_on_connect(sync_engine)
+        _engines["sync"] = sync_engine
+    return _engines["sync"]
+
+
+def get_async_engine() -> AsyncEngine:
+    """Moteur asynchrone des écritures"""
+    if "write" not in _engines:
+        if is_sqlite:
+            # Un seul rédacteur sérialisé : SQLite n'accepte qu'une écriture à la fois,
+            # autant la faire attendre dans le pool plutôt que sur le verrou du fichier
+            write_engine = create_async_engine(
+                async_db_url,
+                connect_args={"check_same_thread": False},
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=1,
+                max_overflow=0,
+            )
+            _apply_pragmas_on_connect(write_engine.sync_engine)
+        else:
+            write_engine = create_async_engine(async_db_url)
+        instrument_engine(write_engine.sync_engine, "write")
+        _engines["write"] = write_engine
+    return _engines["write"]
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """Moteur asynchrone des lectures (le moteur des écritures hors SQLite)"""
+    if "read" not in _engines:
+        if is_sqlite:
+            # Lecteurs en query_only : grâce au WAL ils ne bloquent jamais
+            # derrière le rédacteur
+            read_engine = create_async_engine(
+                async_db_url,
+                connect_args={"check_same_thread": False},
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=settings.SQLITE_READ_POOL_SIZE,
+                max_overflow=0,
+            )
+            _apply_pragmas_on_connect(read_engine.sync_engine, read_only=True)
+            instrument_engine(read_engine.sync_engine, "read")
+        else:
+            read_engine = get_async_engine()
+        _engines["read"] = read_engine
+    return _engines["read"]
+
+
+async def dispose_engines() -> None:
+    """Ferme les connexions poolées des moteurs déjà créés (ils restent utilisables)"""
+    for async_engine in {id(e): e for n, e in _engines.items() if n != "sync"}.values():
+        await async_engine.dispose()
+    if "sync" in _engines:
+        _engines["sync"].dispose()
+
+
+_ENGINE_GETTERS = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "async_read_engine": get_async_read_engine,
+}
+
+
+def __getattr__(name: str) -> Any:
+    # session.engine, session.async_engine...: created on first access
+    if name in _ENGINE_GETTERS:
+        return _ENGINE_GETTERS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazyBind:
+    """Fabrique de sessions liée à son moteur lors de la première session"""
+
+    def __init__(self, engine_getter: Callable[[], Any], **kw: Any) -> None:
+        super().__init__(**kw)
+        self._engine_getter = engine_getter
+
+    def __call__(self, **local_kw: Any):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._engine_getter())
+        return super().__call__(**local_kw)
+
+
+class _LazySessionMaker(_LazyBind, sessionmaker):
+    pass
+
+
+class _LazyAsyncSessionMaker(_LazyBind, async_sessionmaker):
+    pass
+
+
+SessionLocal = _LazySessionMaker(get_engine, autocommit=False, autoflush=False)
+
+# expire_on_commit=False : pas de lazy-load implicite (interdit en async) après commit
+AsyncSessionLocal = _LazyAsyncSessionMaker(
+    get_async_engine, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = _LazyAsyncSessionMaker(
+    get_async_read_engine, autoflush=False, expire_on_commit=False
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
@@ -37,3 +210,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session en lecture seule, servie par le pool de lecteurs."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,30 +1,71 @@
+import argparse
+import asyncio
 import logging
+import os
+from typing import List, Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 
-from app.db.base import Base
 from app.db.init_db import init_db
-from app.db.session import SessionLocal, engine
+from app.db.session import AsyncSessionLocal, dispose_engines, get_engine
+from app.services import search
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+# Schema that Base.metadata.create_all used to produce
+BASELINE_REVISION = "0001_initial_schema"
+
+
+def run_migrations() -> None:
+    config = Config(ALEMBIC_INI)
+    tables = inspect(get_engine()).get_table_names()
+    if "user" in tables and "alembic_version" not in tables:
+        # Database created by create_all before migrations existed
+        logger.info(f"Stamping existing database at {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def rebuild_search_index() -> None:
+    """Reconstruit l'index plein texte des messages (table message_fts)"""
+    async def rebuild() -> None:
+        async with AsyncSessionLocal() as db:
+            await search.rebuild_index(db)
+        await dispose_engines()
+
+    asyncio.run(rebuild())
+    logger.info("Search index rebuilt")
+
+
+async def init() -> None:
+    # Initialize data
+    logger.info("Initializing data")
+    async with AsyncSessionLocal() as db:
+        await init_db(db)
 
-def init() -> None:
-    db = SessionLocal()
-    try:
-        # Create tables
-        logger.info("Creating tables")
-        Base.metadata.create_all(bind=engine)
-        
-        # Initialize data
-        logger.info("Initializing data")
-        init_db(db)
-    finally:
-        db.close()
+    # Pooled connections are bound to this event loop: release them
+    await dispose_engines()
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Initialise la base de données")
+    parser.add_argument(
+        "--rebuild-search",
+        action="store_true",
+        help="reconstruit seulement l'index de recherche des messages",
+    )
+    if parser.parse_args(argv).rebuild_search:
+        rebuild_search_index()
+        return
+    logger.info("Applying database migrations")
+    run_migrations()
     logger.info("Creating initial data")
-    init()
+    asyncio.run(init())
     logger.info("Initial data created")
 
 
@@ -1,17 +1,74 @@
+from contextlib import asynccontextmanager
+
+# First import: it times the loading of everything below
+from app.core import startup_profile
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1 import auth
+from app.api.v1 import admin, auth, chat, monitor
+from app.core import metrics, security
 from app.core.config import settings
+from app.core.invalidation import bus
+from app.core.shared_state import shared_state
+from app.db.profiler import QueryProfilerMiddleware
+from app.db.session import dispose_engines
+from app.services import http_clients
+from app.services.backup import backup_service
+from app.services.budget import budget_ledger
+from app.services.tool_cache import tool_cache
+from app.services.tool_executor import tool_executor
+from app.services.tool_registry import tool_registry
+from app.services.usage import usage_aggregator
 
 # Import des routes de test (uniquement en dev/test)
 if settings.ENVIRONMENT.lower() != "production":
     from app.api.v1.test import routes as test_routes
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # mcp_config.yaml: loaded once, then reloaded by the registry when it changes
+    with startup_profile.phase("mcp tools"):
+        for listener in (
+            http_clients.registry.configure,
+            tool_cache.configure,
+            tool_executor.configure,
+        ):
+            tool_registry.subscribe(listener)
+        tool_registry.load()
+        tool_registry.start()
+    with startup_profile.phase("http clients"):
+        await http_clients.registry.startup()
+    with startup_profile.phase("tool cache prune"):
+        await tool_cache.prune()
+    with startup_profile.phase("budget seed"):
+        await budget_ledger.seed()
+    with startup_profile.phase("background tasks"):
+        await bus.start()
+        usage_aggregator.start()
+        metrics.registry.start()
+        backup_service.start()
+    startup_profile.log_phases()
+    yield
+    await tool_registry.stop()
+    await bus.stop()
+    await metrics.registry.stop()
+    await backup_service.stop()
+    await http_clients.registry.shutdown()
+    # Écrire les derniers compteurs d'usage avant de fermer les connexions
+    await usage_aggregator.stop()
+    # Fermer les connexions poolées (les threads aiosqlite bloquent sinon l'arrêt)
+    await dispose_engines()
+    security.shutdown_hash_executor()
+    shared_state.close()
+
+
 app = FastAPI(
     title="Claude API Application",
     description="Application web pour interagir avec l'API Claude sur Raspberry Pi",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configuration CORS
@@ -30,6 +87,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(QueryProfilerMiddleware)
+
+# Added last: outermost, it also measures the requests answered by CORS
+app.add_middleware(metrics.MetricsMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -48,12 +110,15 @@ async def api_health_check():
 
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_STR)
+app.include_router(chat.router, prefix=settings.API_V1_STR)
+app.include_router(monitor.router, prefix=settings.API_V1_STR)
+app.include_router(admin.router, prefix=settings.API_V1_STR)
 
 # Routes de test (uniquement en dev/test)
 if settings.ENVIRONMENT.lower() != "production":
     app.include_router(test_routes.router)
 
 # TODO: Uncomment when implemented
-# app.include_router(chat.router, prefix=settings.API_V1_STR)
 # app.include_router(mcp.router, prefix=settings.API_V1_STR)
-# app.include_router(monitor.router, prefix=settings.API_V1_STR)
+
+startup_profile.mark("import app.main")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -11,11 +11,22 @@ class Conversation(Base):
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Denormalized summary, maintained by the conversation service
+    # on message insert/delete
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(String, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
 
+    # A user's conversations by recency
+    __table_args__ = (
+        Index('ix_conversation_user_id_updated_at', 'user_id', 'updated_at'),
+    )
+
 
 class Message(Base):
     id = Column(Integer, primary_key=True, index=True)
@@ -27,7 +38,14 @@ class Message(Base):
     # Metrics
     input_tokens = Column(Integer, nullable=True)
     output_tokens = Column(Integer, nullable=True)
-    cost = Column(Integer, nullable=True)
+    cost = Column(Float, nullable=True)
+    # Tokens of content, counted once at insert and reused to build the context
+    token_count = Column(Integer, nullable=True)
     
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
+
+    # A conversation's messages in order
+    __table_args__ = (
+        Index('ix_message_conversation_id_created_at', 'conversation_id', 'created_at'),
+    )
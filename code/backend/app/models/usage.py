@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -16,8 +16,9 @@ class UsageRecord(Base):
     # Relationships
     user = relationship("User", back_populates="usage_records")
     
-    # Unique constraint per user per day
+    # Unique per user per day: lookup index and target of the usage upsert
+    # (INSERT ... ON CONFLICT DO UPDATE). A unique index rather than a table
+    # constraint so that migrations can add it without recreating the table.
     __table_args__ = (
-        # SQLAlchemy syntax for unique constraint
-        # UniqueConstraint('user_id', 'date', name='unique_user_date'),
+        Index('ix_usagerecord_user_id_date', 'user_id', 'date', unique=True),
     )
@@ -1,3 +1,21 @@
 # Pydantic schemas
 from app.schemas.token import Token, TokenPayload, TokenResponse  # noqa
 from app.schemas.user import User, UserCreate, UserInDB, UserUpdate  # noqa
+from app.schemas.conversation import (  # noqa
+    ContextEstimate,
+    Conversation,
+    ConversationCreate,
+    ConversationDetail,
+    ConversationList,
+    ConversationSummary,
+    Message,
+    MessageCreate,
+    SearchHit,
+    SearchResults,
+)
+from app.schemas.backup import (  # noqa
+    Backup,
+    BackupList,
+    BackupResult,
+    BackupVerification,
+)
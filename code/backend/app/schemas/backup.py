@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class Backup(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+class BackupList(BaseModel):
+    items: List[Backup]
+
+
+class BackupResult(Backup):
+    # Size of the uncompressed copy, in bytes
+    database_size: int
+    duration_ms: float
+    # Times the throttled copy started over because the database changed
+    restarts: int
+    # Older backups deleted by the rotation
+    rotated: List[str]
+
+
+class BackupVerification(BaseModel):
+    name: str
+    ok: bool
+    detail: Optional[str] = None
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# Properties to receive via API on creation
+class ConversationCreate(BaseModel):
+    title: str
+
+
+class MessageCreate(BaseModel):
+    content: str
+    # Relay Claude's answer as server-sent events instead of one JSON body
+    stream: bool = False
+
+
+# Properties to return via API
+class Message(BaseModel):
+    id: int
+    role: str
+    content: str
+    created_at: datetime
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cost: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Conversation(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationSummary(Conversation):
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
+
+
+class ConversationList(BaseModel):
+    items: List[ConversationSummary]
+    # Opaque cursor of the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+class ConversationDetail(Conversation):
+    messages: List[Message] = []
+
+
+class ContextEstimate(BaseModel):
+    # Input tokens of the history that would be sent with the message
+    input_tokens: int
+    included_messages: int
+    omitted_messages: int
+    # Worst case: the whole max_tokens is generated
+    estimated_cost: float
+
+
+class SearchHit(BaseModel):
+    message_id: int
+    conversation_id: int
+    conversation_title: str
+    role: str
+    created_at: datetime
+    # HTML-escaped extract of the message, matched terms between <mark> tags
+    snippet: str
+
+
+class SearchResults(BaseModel):
+    items: List[SearchHit]
+    # Offset of the next page, None on the last page
+    next_offset: Optional[int] = None
@@ -0,0 +1,429 @@
+"""
+Sauvegardes en ligne de la base SQLite
+
+La copie passe par l'API de sauvegarde de SQLite, par lots de pages
+espacés d'une pause : l'application continue de lire et d'écrire pendant
+ce temps (en WAL, la copie ne prend jamais que des verrous de lecture).
+La copie est vérifiée (PRAGMA integrity_check), compressée en flux dans
+storage/backups, relue, puis les sauvegardes les plus anciennes sont
+supprimées.
+
+    python -m app.services.backup [--list | --verify NOM]
+
+fait de même depuis un script, sans arrêter le service.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.shared_state import SharedState, shared_state
+from app.db.session import db_url
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "database_"
+BACKUP_SUFFIX = ".db.gz"
+# Work files, left behind only by an interrupted job and removed by the next one
+PARTIAL_PREFIX = ".partial-"
+
+LEASE_NAME = "backup"
+# A job still holding the lease after this long died with its process
+LEASE_TTL_SECONDS = 6 * 3600
+# Delay between two checks of the schedule
+CHECK_INTERVAL_SECONDS = 60
+# A throttled copy starts over whenever another connection writes the database.
+# After this many restarts, the rest is copied in a single step: one read
+# transaction, which does not block the writers in WAL mode.
+MAX_RESTARTS = 3
+CHUNK_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+
+
+class BackupError(Exception):
+    """Sauvegarde impossible ou copie invalide"""
+
+
+class BackupInProgress(BackupError):
+    """Une sauvegarde ou une vérification est déjà en cours (ici ou ailleurs)"""
+
+
+class _Restarted(Exception):
+    pass
+
+
+class _Aborted(Exception):
+    pass
+
+
+def database_path() -> Optional[str]:
+    """Fichier de la base, None hors SQLite ou pour une base en mémoire"""
+    if not db_url.startswith("sqlite:///"):
+        return None
+    path = db_url[len("sqlite:///"):]
+    if not path or path == ":memory:":
+        return None
+    return os.path.abspath(path)
+
+
+def check_integrity(path: str) -> None:
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        connection.close()
+    if rows != [("ok",)]:
+        detail = rows[0][0] if rows else "no result"
+        raise BackupError(f"Integrity check failed: {detail}")
+
+
+class BackupService:
+    """
+    Sauvegardes planifiées et à la demande. Un bail dans l'état partagé
+    garantit qu'un seul processus (worker ou script) sauvegarde à la fois.
+    """
+
+    def __init__(
+        self,
+        state: SharedState,
+        directory: str,
+        keep: int,
+        interval_hours: float,
+        pages_per_step: int,
+        step_sleep: float,
+    ) -> None:
+        self.state = state
+        self.directory = directory
+        self.keep = keep
+        self.interval_hours = interval_hours
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.origin = uuid.uuid4().hex
+        self._abort = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._jobs: Set[asyncio.Future] = set()
+
+    # Lease
+
+    def _acquire(self) -> None:
+        def acquire(connection: sqlite3.Connection) -> bool:
+            now = time.time()
+            connection.execute(
+                "DELETE FROM lease WHERE name = ? AND expires_at < ?", (LEASE_NAME, now)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO lease (name, origin, expires_at)"
+                " VALUES (?, ?, ?)",
+                (LEASE_NAME, self.origin, now + LEASE_TTL_SECONDS),
+            )
+            return cursor.rowcount == 1
+
+        if not self.state.transaction(acquire):
+            raise BackupInProgress("A backup is already running")
+
+    def _release(self) -> None:
+        self.state.transaction(
+            lambda connection: connection.execute(
+                "DELETE FROM lease WHERE name = ? AND origin = ?",
+                (LEASE_NAME, self.origin),
+            )
+        )
+
+    # Files
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def backups(self) -> List[Dict[str, Any]]:
+        """Sauvegardes présentes, les plus récentes d'abord"""
+        if not os.path.isdir(self.directory):
+            return []
+        items = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)):
+                continue
+            stat = os.stat(self._path(name))
+            items.append(
+                {
+                    "name": name,
+                    "size": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime),
+                }
+            )
+        # The name carries the timestamp
+        return sorted(items, key=lambda item: item["name"], reverse=True)
+
+    def is_due(self) -> bool:
+        if self.interval_hours <= 0:
+            return False
+        backups = self.backups()
+        if not backups:
+            return True
+        age = time.time() - backups[0]["created_at"].timestamp()
+        return age >= self.interval_hours * 3600
+
+    def rotate(self) -> List[str]:
+        """Supprime les sauvegardes au-delà des `keep` plus récentes"""
+        removed = []
+        for backup in self.backups()[self.keep:]:
+            os.remove(self._path(backup["name"]))
+            removed.append(backup["name"])
+        return removed
+
+    def _remove_partials(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.startswith(PARTIAL_PREFIX):
+                os.remove(self._path(name))
+
+    # Backup
+
+    def _copy(self, source_path: str, target_path: str) -> int:
+        """Copie en ligne par lots de pages ; renvoie le nombre de reprises"""
+        restarts = 0
+        remaining_before: Optional[int] = None
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            nonlocal restarts, remaining_before
+            if self._abort.is_set():
+                raise _Aborted()
+            if remaining_before is not None and remaining > remaining_before:
+                restarts += 1
+                if restarts > MAX_RESTARTS:
+                    raise _Restarted()
+            remaining_before = remaining
+            # The sleep argument of backup() only applies to a busy database: pause here
+            if remaining:
+                time.sleep(self.step_sleep)
+
+        source = sqlite3.connect(
+            source_path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        )
+        target = sqlite3.connect(target_path)
+        try:
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=progress)
+            except _Restarted:
+                logger.info(
+                    f"Backup restarted {MAX_RESTARTS} times, copying in one step"
+                )
+                source.backup(target)
+            # The copy is a standalone file: no -wal/-shm next to it once restored
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+        return restarts
+
+    def _compress(self, source_path: str, archive_path: str) -> str:
+        """Compresse en flux ; renvoie le SHA-256 du contenu"""
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as source, open(archive_path, "wb") as raw:
+            with gzip.GzipFile(
+                fileobj=raw, mode="wb", compresslevel=COMPRESS_LEVEL
+            ) as archive:
+                while chunk := source.read(CHUNK_SIZE):
+                    if self._abort.is_set():
+                        raise _Aborted()
+                    digest.update(chunk)
+                    archive.write(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+        return digest.hexdigest()
+
+    def _archive_digest(self, archive_path: str) -> str:
+        # Reading to the end also checks the CRC and length stored by gzip
+        digest = hashlib.sha256()
+        with gzip.open(archive_path, "rb") as archive:
+            while chunk := archive.read(CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _backup(self) -> Dict[str, Any]:
+        source_path = database_path()
+        if source_path is None:
+            raise BackupError("Backups require a SQLite database file")
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_partials()
+
+        started = time.perf_counter()
+        # Milliseconds: two backups in the same second must not share a name
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        name = f"{BACKUP_PREFIX}{stamp}{BACKUP_SUFFIX}"
+        copy_path = self._path(PARTIAL_PREFIX + name[: -len(".gz")])
+        archive_partial = self._path(PARTIAL_PREFIX + name)
+        try:
+            restarts = self._copy(source_path, copy_path)
+            check_integrity(copy_path)
+            database_size = os.path.getsize(copy_path)
+            digest = self._compress(copy_path, archive_partial)
+            if self._archive_digest(archive_partial) != digest:
+                raise BackupError("The compressed backup does not match the copy")
+            os.replace(archive_partial, self._path(name))
+        except _Aborted:
+            raise BackupError("Backup interrupted by shutdown")
+        finally:
+            for path in (copy_path, archive_partial):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        rotated = self.rotate()
+        duration = time.perf_counter() - started
+        backup = next(b for b in self.backups() if b["name"] == name)
+        logger.info(
+            f"Backup {name}: {database_size} bytes -> {backup['size']} bytes "
+            f"in {duration:.1f}s ({restarts} restarts, {len(rotated)} rotated)"
+        )
+        return {
+            **backup,
+            "database_size": database_size,
+            "duration_ms": round(duration * 1000, 1),
+            "restarts": restarts,
+            "rotated": rotated,
+        }
+
+    def backup(self, only_if_due: bool = False) -> Optional[Dict[str, Any]]:
+        """Sauvegarde la base (bloquant) ; None si only_if_due et pas encore l'heure"""
+        self._acquire()
+        try:
+            # Another process may have made it while we were waiting
+            if only_if_due and not self.is_due():
+                return None
+            return self._backup()
+        finally:
+            self._release()
+
+    def verify(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Décompresse une sauvegarde à côté d'elle et vérifie son intégrité
+        (bloquant) ; None si elle n'existe pas
+        """
+        if name not in {backup["name"] for backup in self.backups()}:
+            return None
+        self._acquire()
+        copy_path = self._path(PARTIAL_PREFIX + "verify-" + name[: -len(".gz")])
+        try:
+            self._remove_partials()
+            with gzip.open(self._path(name), "rb") as archive:
+                with open(copy_path, "wb") as copy:
+                    shutil.copyfileobj(archive, copy, CHUNK_SIZE)
+            check_integrity(copy_path)
+        except (
+            OSError, EOFError, zlib.error, sqlite3.DatabaseError, BackupError
+        ) as exc:
+            logger.warning(f"Backup {name} failed verification: {exc}")
+            return {"name": name, "ok": False, "detail": str(exc)}
+        finally:
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+            self._release()
+        return {"name": name, "ok": True, "detail": None}
+
+    async def _in_thread(self, func: Callable[..., Any], *args: Any) -> Any:
+        # Shielded: the thread cannot be cancelled, stop() waits for it instead
+        job = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        return await asyncio.shield(job)
+
+    async def run(self) -> Dict[str, Any]:
+        """backup() hors de la boucle d'événements"""
+        return await self._in_thread(self.backup)
+
+    async def run_verify(self, name: str) -> Optional[Dict[str, Any]]:
+        """verify() hors de la boucle d'événements"""
+        return await self._in_thread(self.verify, name)
+
+    # Schedule
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+            if not self.is_due():
+                continue
+            try:
+                await self._in_thread(self.backup, True)
+            except BackupInProgress:
+                pass
+            except Exception:
+                logger.exception("Scheduled backup failed")
+
+    def start(self) -> None:
+        scheduled = self.interval_hours > 0 and database_path() is not None
+        if self._task is None and scheduled:
+            self._abort.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # A copy in progress stops at its next batch of pages and releases the lease
+        self._abort.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._jobs:
+            done, _ = await asyncio.wait(set(self._jobs))
+            for job in done:
+                job.exception()
+
+
+backup_service = BackupService(
+    shared_state,
+    directory=settings.BACKUP_DIR,
+    keep=settings.BACKUP_KEEP,
+    interval_hours=settings.BACKUP_INTERVAL_HOURS,
+    pages_per_step=settings.BACKUP_PAGES_PER_STEP,
+    step_sleep=settings.BACKUP_STEP_SLEEP_MS / 1000,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Sauvegarde en ligne de la base SQLite"
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--list", action="store_true", help="liste les sauvegardes")
+    group.add_argument("--verify", metavar="NOM", help="vérifie une sauvegarde")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.list:
+        for backup in backup_service.backups():
+            print(
+                f"{backup['name']}  {backup['size']:>12}  "
+                f"{backup['created_at']:%Y-%m-%d %H:%M:%S}"
+            )
+        return 0
+    try:
+        if args.verify:
+            result = backup_service.verify(args.verify)
+            if result is None:
+                print(f"Unknown backup: {args.verify}", file=sys.stderr)
+                return 1
+            print(f"{result['name']}: {'ok' if result['ok'] else result['detail']}")
+            return 0 if result["ok"] else 1
+        backup = backup_service.backup()
+    except BackupError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    # Last line: path of the new backup, for the shell scripts
+    print(os.path.join(backup_service.directory, backup["name"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Tuple
+
+from sqlalchemy import func, select
+
+from app import models
+from app.core.config import settings
+from app.core.shared_state import SharedState, shared_state
+from app.db.session import AsyncReadSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# A reservation still open after this long belongs to a request
+# that died with its worker
+RESERVATION_TTL_SECONDS = 900
+
+
+class BudgetExceeded(Exception):
+    """Le coût estimé dépasserait la limite journalière ou mensuelle"""
+
+    def __init__(self, period: str, limit: float, spent: float) -> None:
+        super().__init__(f"{period} limit of {limit:.2f} reached ({spent:.4f} spent)")
+        self.period = period
+        self.limit = limit
+        self.spent = spent
+
+
+@dataclass
+class UserBudget:
+    day: date
+    month: Tuple[int, int]
+    daily_spent: float = 0.0
+    monthly_spent: float = 0.0
+    # Estimated cost of the calls currently in flight
+    reserved: float = 0.0
+
+    def roll(self, today: date) -> None:
+        """Remet à zéro les compteurs quand le jour ou le mois change"""
+        if today != self.day:
+            self.day = today
+            self.daily_spent = 0.0
+        if (today.year, today.month) != self.month:
+            self.month = (today.year, today.month)
+            self.monthly_spent = 0.0
+
+
+@dataclass(frozen=True)
+class Reservation:
+    id: int
+    user_id: int
+    amount: float
+
+
+def _month_key(month: Tuple[int, int]) -> str:
+    return f"{month[0]:04d}-{month[1]:02d}"
+
+
+class BudgetLedger:
+    """
+    Kill switch : compteurs journaliers et mensuels par utilisateur,
+    initialisés depuis UsageRecord au démarrage et tenus dans l'état
+    partagé, si bien que la limite vaut pour l'ensemble des workers. Le
+    coût estimé est réservé avant l'appel à Claude puis remplacé par le
+    coût réel ; vérification et réservation forment une seule transaction,
+    des requêtes concurrentes ne peuvent donc pas dépasser la limite.
+    """
+
+    def __init__(self, state: SharedState) -> None:
+        self.state = state
+
+    def _budget(self, connection: sqlite3.Connection, user_id: int) -> UserBudget:
+        today = date.today()
+        row = connection.execute(
+            "SELECT day, month, daily_spent, monthly_spent FROM budget_spend "
+            "WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        if row is None:
+            budget = UserBudget(day=today, month=(today.year, today.month))
+        else:
+            year, month = row[1].split("-")
+            budget = UserBudget(
+                day=date.fromisoformat(row[0]),
+                month=(int(year), int(month)),
+                daily_spent=row[2],
+                monthly_spent=row[3],
+            )
+            budget.roll(today)
+        budget.reserved = connection.execute(
+            "SELECT COALESCE(SUM(amount), 0) FROM budget_reservation "
+            "WHERE user_id = ? AND created_at > ?",
+            (user_id, time.time() - RESERVATION_TTL_SECONDS),
+        ).fetchone()[0]
+        return budget
+
+    @staticmethod
+    def _save(connection: sqlite3.Connection, user_id: int, budget: UserBudget) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO budget_spend "
+            "(user_id, day, month, daily_spent, monthly_spent) VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                budget.day.isoformat(),
+                _month_key(budget.month),
+                budget.daily_spent,
+                budget.monthly_spent,
+            ),
+        )
+
+    @staticmethod
+    def _limits(connection: sqlite3.Connection, user_id: int) -> Tuple[float, float]:
+        row = connection.execute(
+            "SELECT daily_limit, monthly_limit FROM budget_limit WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        return tuple(row) if row else (
+            settings.DEFAULT_DAILY_LIMIT,
+            settings.DEFAULT_MONTHLY_LIMIT,
+        )
+
+    async def limits(self, user_id: int) -> Tuple[float, float]:
+        return await self.state.run_read(lambda c: self._limits(c, user_id))
+
+    async def set_limits(
+        self, user_id: int, daily_limit: float, monthly_limit: float
+    ) -> None:
+        await self.state.run(
+            lambda c: c.execute(
+                "INSERT OR REPLACE INTO budget_limit "
+                "(user_id, daily_limit, monthly_limit) VALUES (?, ?, ?)",
+                (user_id, daily_limit, monthly_limit),
+            )
+        )
+
+    async def reserve(self, user_id: int, estimated_cost: float) -> Reservation:
+        """Réserve le coût estimé d'un appel, ou lève BudgetExceeded"""
+
+        def reserve(connection: sqlite3.Connection) -> Reservation:
+            connection.execute(
+                "DELETE FROM budget_reservation WHERE created_at <= ?",
+                (time.time() - RESERVATION_TTL_SECONDS,),
+            )
+            budget = self._budget(connection, user_id)
+            daily_limit, monthly_limit = self._limits(connection, user_id)
+            daily = budget.daily_spent + budget.reserved
+            if daily + estimated_cost > daily_limit:
+                raise BudgetExceeded("daily", daily_limit, daily)
+            monthly = budget.monthly_spent + budget.reserved
+            if monthly + estimated_cost > monthly_limit:
+                raise BudgetExceeded("monthly", monthly_limit, monthly)
+            cursor = connection.execute(
+                "INSERT INTO budget_reservation (user_id, amount, created_at) "
+                "VALUES (?, ?, ?)",
+                (user_id, estimated_cost, time.time()),
+            )
+            return Reservation(
+                id=cursor.lastrowid, user_id=user_id, amount=estimated_cost
+            )
+
+        return await self.state.run(reserve)
+
+    async def settle(self, reservation: Reservation, actual_cost: float) -> None:
+        """Remplace la réservation par le coût réel de l'appel"""
+
+        def settle(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "DELETE FROM budget_reservation WHERE id = ?", (reservation.id,)
+            )
+            budget = self._budget(connection, reservation.user_id)
+            budget.daily_spent += actual_cost
+            budget.monthly_spent += actual_cost
+            self._save(connection, reservation.user_id, budget)
+
+        await self.state.run(settle)
+
+    async def release(self, reservation: Reservation) -> None:
+        """Annule une réservation (appel échoué ou interrompu)"""
+        await self.state.run(
+            lambda c: c.execute(
+                "DELETE FROM budget_reservation WHERE id = ?", (reservation.id,)
+            )
+        )
+
+    async def status(self, user_id: int) -> Dict[str, float]:
+        def status(connection: sqlite3.Connection) -> Dict[str, float]:
+            budget = self._budget(connection, user_id)
+            daily_limit, monthly_limit = self._limits(connection, user_id)
+            return {
+                "daily_spent": budget.daily_spent,
+                "daily_limit": daily_limit,
+                "monthly_spent": budget.monthly_spent,
+                "monthly_limit": monthly_limit,
+                "reserved": budget.reserved,
+            }
+
+        return await self.state.run_read(status)
+
+    async def seed(self) -> None:
+        """
+        Initialise les compteurs depuis UsageRecord (jour et mois en cours).
+        Les compteurs déjà présents dans l'état partagé sont conservés : ils
+        incluent l'usage pas encore écrit en base par les autres workers.
+        """
+        today = date.today()
+        first_of_month = today.replace(day=1)
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    models.UsageRecord.user_id,
+                    func.coalesce(
+                        func.sum(models.UsageRecord.cost).filter(
+                            models.UsageRecord.date == today
+                        ),
+                        0.0,
+                    ),
+                    func.coalesce(func.sum(models.UsageRecord.cost), 0.0),
+                )
+                .where(models.UsageRecord.date >= first_of_month)
+                .group_by(models.UsageRecord.user_id)
+            )
+            rows = result.all()
+
+        month = _month_key((today.year, today.month))
+
+        def seed(connection: sqlite3.Connection) -> int:
+            cursor = connection.executemany(
+                "INSERT OR IGNORE INTO budget_spend "
+                "(user_id, day, month, daily_spent, monthly_spent) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (user_id, today.isoformat(), month, daily, monthly)
+                    for user_id, daily, monthly in rows
+                ],
+            )
+            return cursor.rowcount
+
+        seeded = await self.state.run(seed)
+        logger.info(f"Budget ledger seeded for {seeded} user(s)")
+
+
+budget_ledger = BudgetLedger(shared_state)
@@ -0,0 +1,110 @@
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+
+from app.core.config import settings
+from app.services import http_clients
+from app.services.tool_registry import tool_registry
+
+
+class ClaudeAPIError(Exception):
+    """Erreur renvoyée par l'API Claude (statut HTTP et message)"""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def get_client() -> httpx.AsyncClient:
+    """Client partagé du registre : connexions TLS maintenues entre les appels"""
+    return http_clients.registry.get(http_clients.CLAUDE)
+
+
+def compute_cost(input_tokens: int, output_tokens: int) -> float:
+    """Coût d'un appel (en euros) à partir des tarifs configurés"""
+    return (
+        input_tokens * settings.CLAUDE_INPUT_PRICE_PER_MTOK
+        + output_tokens * settings.CLAUDE_OUTPUT_PRICE_PER_MTOK
+    ) / 1_000_000
+
+
+def estimate_cost(input_tokens: int) -> float:
+    """
+    Estimation pessimiste avant l'appel : tokens d'entrée du contexte et
+    la totalité de max_tokens en sortie.
+    """
+    return compute_cost(input_tokens, settings.CLAUDE_MAX_TOKENS)
+
+
+def build_body(
+    messages: List[Dict[str, Any]], stream: bool = False, use_tools: bool = True
+) -> bytes:
+    """
+    Corps JSON de la requête. La liste des outils est insérée telle que
+    précompilée par le registre : identique octet pour octet d'un appel à
+    l'autre, elle reste dans le préfixe mis en cache par l'API. Avec
+    use_tools=False, les outils restent déclarés (l'historique peut contenir
+    des blocs tool_use) mais Claude doit répondre par du texte.
+    """
+    head = json.dumps(
+        {
+            "model": settings.CLAUDE_MODEL,
+            "max_tokens": settings.CLAUDE_MAX_TOKENS,
+            "stream": stream,
+        },
+        separators=(",", ":"),
+    )[:-1]
+    tools_json = tool_registry.current.tools_json
+    tools = f',"tools":{tools_json}' if tools_json != "[]" else ""
+    if tools and not use_tools:
+        tools += ',"tool_choice":{"type":"none"}'
+    history = json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+    return f'{head}{tools},"messages":{history}}}'.encode()
+
+
+def _error_message(body: bytes) -> str:
+    try:
+        return json.loads(body)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        return body.decode(errors="replace")
+
+
+async def create_message(
+    messages: List[Dict[str, Any]], use_tools: bool = True
+) -> Dict[str, Any]:
+    """Appel non streamé : renvoie la réponse complète de l'API Messages"""
+    response = await get_client().post(
+        "/messages", content=build_body(messages, use_tools=use_tools)
+    )
+    if response.status_code != 200:
+        raise ClaudeAPIError(response.status_code, _error_message(response.content))
+    return response.json()
+
+
+async def stream_message(
+    messages: List[Dict[str, Any]], use_tools: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Appel streamé : produit les événements SSE de l'API Messages
+    (message_start, content_block_delta, message_delta, message_stop...)
+    au fil de leur arrivée, sans mise en mémoire tampon de la réponse.
+    """
+    async with get_client().stream(
+        "POST",
+        "/messages",
+        content=build_body(messages, stream=True, use_tools=use_tools),
+    ) as response:
+        if response.status_code != 200:
+            raise ClaudeAPIError(
+                response.status_code, _error_message(await response.aread())
+            )
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            if event.get("type") == "error":
+                error = event.get("error", {})
+                raise ClaudeAPIError(529, error.get("message", "Upstream error"))
+            yield event
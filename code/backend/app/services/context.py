@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.services import claude
+
+# Role and delimiters added by the API around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de tokens d'un texte (environ 4 caractères par token)"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ContextWindow:
+    messages: List[Dict[str, Any]]
+    input_tokens: int
+    # Older messages left out to stay within the budget
+    omitted: int
+    estimated_cost: float
+
+
+async def build_context(
+    db: AsyncSession, conversation_id: int, content: str, budget: Optional[int] = None
+) -> ContextWindow:
+    """
+    Historique à envoyer à Claude pour un nouveau message : les tours les
+    plus récents qui tiennent dans le budget de tokens d'entrée, d'après
+    les token_count déjà enregistrés. Le contenu n'est lu que pour les
+    messages retenus, et le parcours s'arrête dès que le budget est atteint.
+    """
+    budget = budget or settings.CLAUDE_CONTEXT_TOKEN_BUDGET
+    input_tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    counts = await db.stream(
+        select(
+            models.Message.id,
+            models.Message.role,
+            models.Message.created_at,
+            # Rows written before token_count existed and were not backfilled
+            func.coalesce(
+                models.Message.token_count, func.length(models.Message.content) / 4 + 1
+            ),
+        )
+        .where(models.Message.conversation_id == conversation_id)
+        .order_by(models.Message.created_at.desc(), models.Message.id.desc())
+        .execution_options(yield_per=100)
+    )
+    kept = []
+    async for row in counts:
+        tokens = row[3] + MESSAGE_OVERHEAD_TOKENS
+        if input_tokens + tokens > budget:
+            break
+        input_tokens += tokens
+        kept.append(row)
+    await counts.close()
+    # The history must start with a user turn
+    while kept and kept[-1].role != "user":
+        input_tokens -= kept.pop()[3] + MESSAGE_OVERHEAD_TOKENS
+
+    messages: List[Dict[str, Any]] = []
+    if kept:
+        oldest = kept[-1]
+        result = await db.execute(
+            select(models.Message.role, models.Message.content)
+            .where(
+                models.Message.conversation_id == conversation_id,
+                tuple_(models.Message.created_at, models.Message.id)
+                >= tuple_(oldest.created_at, oldest.id),
+            )
+            .order_by(models.Message.created_at, models.Message.id)
+        )
+        messages = [{"role": role, "content": text} for role, text in result.all()]
+    messages.append({"role": "user", "content": content})
+
+    conversation = await db.get(models.Conversation, conversation_id)
+    return ContextWindow(
+        messages=messages,
+        input_tokens=input_tokens,
+        omitted=max(0, (conversation.message_count or 0) - len(kept)),
+        estimated_cost=claude.estimate_cost(input_tokens),
+    )
@@ -0,0 +1,182 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+
+PREVIEW_LENGTH = 100
+
+
+async def get_conversation(
+    db: AsyncSession, conversation_id: int
+) -> Optional[models.Conversation]:
+    return await db.get(models.Conversation, conversation_id)
+
+
+def encode_cursor(conversation: models.Conversation) -> str:
+    raw = f"{conversation.updated_at.isoformat()}|{conversation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décode un curseur de pagination ; lève ValueError s'il est invalide"""
+    try:
+        updated_at, conversation_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(updated_at), int(conversation_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def get_conversations(
+    db: AsyncSession, user_id: int, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[models.Conversation], Optional[str]]:
+    """
+    Page de conversations d'un utilisateur, les plus récentes d'abord.
+    Pagination par clé (updated_at, id) : chaque page est une simple lecture
+    de l'index (user_id, updated_at), quelle que soit sa profondeur.
+    """
+    query = select(models.Conversation).where(models.Conversation.user_id == user_id)
+    if cursor:
+        updated_at, conversation_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.Conversation.updated_at, models.Conversation.id)
+            < tuple_(updated_at, conversation_id)
+        )
+    result = await db.execute(
+        query.order_by(
+            models.Conversation.updated_at.desc(), models.Conversation.id.desc()
+        ).limit(limit + 1)
+    )
+    conversations = list(result.scalars().all())
+    next_cursor = None
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        next_cursor = encode_cursor(conversations[-1])
+    return conversations, next_cursor
+
+
+async def get_messages(
+    db: AsyncSession, conversation_id: int
+) -> List[models.Message]:
+    result = await db.execute(
+        select(models.Message)
+        .where(models.Message.conversation_id == conversation_id)
+        .order_by(models.Message.created_at, models.Message.id)
+    )
+    return list(result.scalars().all())
+
+
+async def create_conversation(
+    db: AsyncSession, user_id: int, conversation_in: schemas.ConversationCreate
+) -> models.Conversation:
+    now = datetime.utcnow()
+    conversation = models.Conversation(
+        title=conversation_in.title, user_id=user_id, created_at=now, updated_at=now
+    )
+    db.add(conversation)
+    await db.flush()
+    await db.refresh(conversation)
+    await db.commit()
+    return conversation
+
+
+async def delete_conversation(
+    db: AsyncSession, conversation: models.Conversation
+) -> None:
+    """
+    Supprime une conversation et ses messages par des DELETE groupés,
+    sans charger les messages pour la cascade de l'ORM
+    """
+    await db.execute(
+        delete(models.Message).where(models.Message.conversation_id == conversation.id)
+    )
+    await db.execute(
+        delete(models.Conversation).where(models.Conversation.id == conversation.id)
+    )
+    await db.commit()
+
+
+async def add_message(
+    db: AsyncSession,
+    conversation_id: int,
+    role: str,
+    content: str,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    cost: Optional[float] = None,
+    token_count: Optional[int] = None,
+) -> models.Message:
+    """
+    Ajoute un message, met à jour le résumé dénormalisé de la conversation
+    et la fait remonter en tête de liste
+    """
+    now = datetime.utcnow()
+    message = models.Message(
+        conversation_id=conversation_id,
+        role=role,
+        content=content,
+        created_at=now,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost=cost,
+        token_count=token_count,
+    )
+    db.add(message)
+    await db.flush()
+    # Incrément atomique dans la même transaction : pas de lecture-modification-
+    # écriture du compteur entre deux requêtes concurrentes
+    await db.execute(
+        update(models.Conversation)
+        .where(models.Conversation.id == conversation_id)
+        .values(
+            updated_at=now,
+            message_count=models.Conversation.message_count + 1,
+            last_message_at=now,
+            last_message_preview=content[:PREVIEW_LENGTH],
+        )
+    )
+    await db.refresh(message)
+    await db.commit()
+    return message
+
+
+async def get_message(
+    db: AsyncSession, conversation_id: int, message_id: int
+) -> Optional[models.Message]:
+    message = await db.get(models.Message, message_id)
+    if message is None or message.conversation_id != conversation_id:
+        return None
+    return message
+
+
+async def delete_message(db: AsyncSession, message: models.Message) -> None:
+    """Supprime un message et recalcule le résumé de sa conversation"""
+    conversation_id = message.conversation_id
+    await db.execute(delete(models.Message).where(models.Message.id == message.id))
+    last = (
+        select(models.Message)
+        .where(models.Message.conversation_id == conversation_id)
+        .order_by(models.Message.created_at.desc(), models.Message.id.desc())
+        .limit(1)
+    )
+    count = models.Conversation.message_count
+    await db.execute(
+        update(models.Conversation)
+        .where(models.Conversation.id == conversation_id)
+        .values(
+            message_count=case((count > 0, count - 1), else_=0),
+            last_message_at=last.with_only_columns(
+                models.Message.created_at
+            ).scalar_subquery(),
+            last_message_preview=last.with_only_columns(
+                func.substr(models.Message.content, 1, PREVIEW_LENGTH)
+            ).scalar_subquery(),
+        )
+    )
+    await db.commit()
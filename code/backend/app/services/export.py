@@ -0,0 +1,178 @@
+import textwrap
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List
+
+from sqlalchemy import select
+
+from app import models
+from app.db.session import AsyncReadSessionLocal
+
+# Messages fetched from the database per round-trip
+EXPORT_BATCH_SIZE = 100
+
+ROLE_LABELS = {"user": "Utilisateur", "assistant": "Claude"}
+
+MEDIA_TYPES = {"markdown": "text/markdown", "pdf": "application/pdf"}
+EXTENSIONS = {"markdown": "md", "pdf": "pdf"}
+
+
+async def iter_messages(conversation_id: int) -> AsyncIterator[models.Message]:
+    """
+    Parcourt les messages d'une conversation par lots de EXPORT_BATCH_SIZE
+    (yield_per) : seul le lot courant est en mémoire. La session est propre
+    au générateur car elle vit aussi longtemps que la réponse streamée.
+    """
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(
+            select(models.Message)
+            .where(models.Message.conversation_id == conversation_id)
+            .order_by(models.Message.created_at, models.Message.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for message in result.scalars():
+            yield message
+            # Batch rows are not needed once written out
+            db.expunge(message)
+
+
+def _heading(message: models.Message) -> str:
+    label = ROLE_LABELS.get(message.role, message.role)
+    return f"{label} — {message.created_at:%d/%m/%Y %H:%M}"
+
+
+async def markdown_export(title: str, conversation_id: int) -> AsyncIterator[bytes]:
+    """Export Markdown, produit message par message"""
+    yield f"# {title}\n\n_Exporté le {datetime.utcnow():%d/%m/%Y %H:%M} UTC_\n".encode()
+    async for message in iter_messages(conversation_id):
+        yield f"\n## {_heading(message)}\n\n{message.content}\n".encode()
+
+
+class PDFWriter:
+    """
+    Écriture incrémentale d'un PDF texte (Helvetica, A4) : chaque page est
+    émise dès qu'elle est pleine. L'objet Pages, qui liste les pages, est
+    écrit en dernier ; seuls les décalages des objets restent en mémoire.
+    """
+
+    WIDTH, HEIGHT = 595, 842
+    MARGIN = 50
+    FONT_SIZE = 10
+    LEADING = 14
+    # Helvetica 10pt: about 90 average characters in the text width
+    WRAP = 90
+
+    CATALOG, PAGES, FONT, BOLD_FONT = 1, 2, 3, 4
+
+    def __init__(self) -> None:
+        self._offsets = {}
+        self._position = 0
+        self._next_id = 5
+        self._page_ids: List[int] = []
+        self._lines: List[bytes] = []
+        self._lines_per_page = (self.HEIGHT - 2 * self.MARGIN) // self.LEADING
+
+    def _emit(self, data: bytes) -> bytes:
+        self._position += len(data)
+        return data
+
+    def _object(self, object_id: int, body: bytes) -> bytes:
+        self._offsets[object_id] = self._position
+        return self._emit(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text: str) -> bytes:
+        # Standard fonts use WinAnsiEncoding (cp1252)
+        data = text.encode("cp1252", errors="replace")
+        return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def start(self) -> bytes:
+        header = self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        fonts = b""
+        fonts_by_id = ((self.FONT, b"Helvetica"), (self.BOLD_FONT, b"Helvetica-Bold"))
+        for object_id, name in fonts_by_id:
+            fonts += self._object(
+                object_id,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /" + name
+                + b" /Encoding /WinAnsiEncoding >>",
+            )
+        return header + fonts
+
+    def add_text(self, text: str, bold: bool = False) -> Iterator[bytes]:
+        """Ajoute un paragraphe ; produit les pages complétées au passage"""
+        font = b"/F2" if bold else b"/F1"
+        for paragraph in text.splitlines() or [""]:
+            lines = textwrap.wrap(paragraph, self.WRAP, replace_whitespace=False)
+            for line in lines or [""]:
+                self._lines.append(
+                    b"%s %d Tf (%s) Tj T*" % (font, self.FONT_SIZE, self._escape(line))
+                )
+                if len(self._lines) >= self._lines_per_page:
+                    yield self._flush_page()
+
+    def _flush_page(self) -> bytes:
+        content = b"BT %d TL %d %d Td\n%s\nET" % (
+            self.LEADING,
+            self.MARGIN,
+            self.HEIGHT - self.MARGIN,
+            b"\n".join(self._lines),
+        )
+        self._lines = []
+        content_id, page_id = self._next_id, self._next_id + 1
+        self._next_id += 2
+        self._page_ids.append(page_id)
+        return self._object(
+            content_id,
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        ) + self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> >>"
+            % (
+                self.PAGES,
+                self.WIDTH,
+                self.HEIGHT,
+                content_id,
+                self.FONT,
+                self.BOLD_FONT,
+            ),
+        )
+
+    def finish(self) -> bytes:
+        data = self._flush_page() if self._lines or not self._page_ids else b""
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        data += self._object(
+            self.PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)),
+        )
+        data += self._object(
+            self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES
+        )
+        xref_position = self._position
+        size = self._next_id
+        xref = b"xref\n0 %d\n0000000000 65535 f \n" % size
+        xref += b"".join(b"%010d 00000 n \n" % self._offsets[i] for i in range(1, size))
+        data += self._emit(
+            xref
+            + b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, self.CATALOG, xref_position)
+        )
+        return data
+
+
+async def pdf_export(title: str, conversation_id: int) -> AsyncIterator[bytes]:
+    """Export PDF, produit page par page"""
+    writer = PDFWriter()
+    yield writer.start()
+    for page in writer.add_text(title, bold=True):
+        yield page
+    for page in writer.add_text(f"Exporté le {datetime.utcnow():%d/%m/%Y %H:%M} UTC"):
+        yield page
+    async for message in iter_messages(conversation_id):
+        parts = (("", False), (_heading(message), True), (message.content, False))
+        for text, bold in parts:
+            for page in writer.add_text(text, bold=bold):
+                yield page
+    yield writer.finish()
+
+
+EXPORTERS = {"markdown": markdown_export, "pdf": pdf_export}
@@ -0,0 +1,214 @@
+import logging
+import ssl
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import yaml
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:  # HTTP/2 needs the optional h2 package
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+CLAUDE = "claude"
+
+
+def load_mcp_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """Lit le fichier mcp_config.yaml (dictionnaire vide s'il est absent)"""
+    path = path or settings.MCP_CONFIG_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        logger.warning(f"MCP configuration not found: {path}")
+        return {}
+
+
+class _TimedStream(httpx.AsyncByteStream):
+    """Corps de réponse dont la fermeture enregistre la durée totale de l'appel"""
+
+    def __init__(
+        self, stream: httpx.AsyncByteStream, name: str, started: float
+    ) -> None:
+        self._stream = stream
+        self._name = name
+        self._started = started
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            metrics.UPSTREAM_LATENCY.observe(
+                time.perf_counter() - self._started, self._name, "total"
+            )
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport mesuré : temps jusqu'aux en-têtes de la réponse (ttfb) et
+    jusqu'à la fin de la lecture du corps (total), par service externe.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, name: str) -> None:
+        self.transport = transport
+        self.name = name
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            metrics.UPSTREAM_ERRORS.inc(self.name)
+            raise
+        metrics.UPSTREAM_LATENCY.observe(
+            time.perf_counter() - started, self.name, "ttfb"
+        )
+        response.stream = _TimedStream(response.stream, self.name, started)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HTTPClientRegistry:
+    """
+    Un httpx.AsyncClient partagé par service externe (Claude, outils MCP),
+    créé au démarrage de l'application et fermé à son arrêt, pour que les
+    appels successifs réutilisent des connexions TLS déjà établies.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+        self._config: Optional[Dict[str, Any]] = None
+        # Loading the CA bundle is slow: one SSL context shared by all clients
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            self._config = load_mcp_config()
+        return self._config
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        Nouvelle configuration (rechargement de mcp_config.yaml) : elle
+        s'applique aux clients créés ensuite, les clients ouverts sont gardés.
+        """
+        self._config = config
+
+    def _limits(self) -> httpx.Limits:
+        pool = self.config.get("settings", {}).get("http_pool", {})
+        return httpx.Limits(
+            max_connections=pool.get("max_connections", 10),
+            max_keepalive_connections=pool.get("max_keepalive_connections", 5),
+            keepalive_expiry=pool.get("keepalive_expiry_seconds", 60),
+        )
+
+    def _http2(self) -> bool:
+        pool = self.config.get("settings", {}).get("http_pool", {})
+        return HTTP2_AVAILABLE and pool.get("http2", True)
+
+    def _count_request(self, name: str):
+        async def hook(request: httpx.Request) -> None:
+            self._requests[name] = self._requests.get(name, 0) + 1
+        return hook
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        transport = httpx.AsyncHTTPTransport(
+            verify=self._ssl_context, limits=self._limits(), http2=self._http2()
+        )
+        common = {
+            "transport": TimedTransport(transport, name),
+            "event_hooks": {"request": [self._count_request(name)]},
+        }
+        if name == CLAUDE:
+            return httpx.AsyncClient(
+                base_url=settings.CLAUDE_API_URL,
+                headers={
+                    "x-api-key": settings.CLAUDE_API_KEY,
+                    "anthropic-version": settings.CLAUDE_API_VERSION,
+                    "content-type": "application/json",
+                },
+                # Streamed answers can be long: the MCP tool timeout does not apply
+                timeout=httpx.Timeout(settings.CLAUDE_TIMEOUT_SECONDS, connect=10.0),
+                **common,
+            )
+        for tool in self.config.get("tools", []):
+            if tool.get("name") != name:
+                continue
+            tool_config = tool.get("config", {})
+            headers = {"Accept": "application/json"}
+            if tool_config.get("auth_header"):
+                headers[tool_config["auth_header"]] = settings.BRAVE_API_KEY
+            return httpx.AsyncClient(
+                headers=headers,
+                timeout=self.config.get("settings", {}).get("timeout_seconds", 10),
+                **common,
+            )
+        raise KeyError(f"Unknown upstream: {name}")
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    async def startup(self) -> None:
+        """Crée les clients de Claude et des outils MCP activés"""
+        self.get(CLAUDE)
+        for tool in self.config.get("tools", []):
+            if tool.get("enabled", True):
+                self.get(tool["name"])
+        logger.info(
+            f"HTTP clients ready: {', '.join(self._clients)} (http2={self._http2()})"
+        )
+
+    async def shutdown(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Occupation des pools de connexions, par service externe"""
+        stats = {}
+        for name, client in self._clients.items():
+            # httpcore connection pool behind the timed transport
+            transport = getattr(client, "_transport", None)
+            transport = getattr(transport, "transport", transport)
+            pool = getattr(transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for c in connections if c.is_idle())
+            stats[name] = {
+                "requests": self._requests.get(name, 0),
+                "connections": len(connections),
+                "idle_connections": idle,
+                "active_connections": len(connections) - idle,
+            }
+        return stats
+
+
+registry = HTTPClientRegistry()
+
+
+@metrics.registry.collector
+def _collect_pool_metrics() -> None:
+    for name, pool in registry.stats().items():
+        metrics.UPSTREAM_CONNECTIONS.set(
+            name, "active", value=pool["active_connections"]
+        )
+        metrics.UPSTREAM_CONNECTIONS.set(name, "idle", value=pool["idle_connections"])
@@ -0,0 +1,67 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from app import schemas
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Verified token claims and a snapshot of the user they belong to"""
+    claims: schemas.TokenPayload
+    user: schemas.UserInDB
+
+
+class PrincipalCache:
+    """
+    Cache des jetons déjà vérifiés : évite de redécoder le JWT et de relire
+    l'utilisateur en base à chaque requête authentifiée.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # user_id -> token keys, to invalidate every token of a modified user
+        self._by_user: Dict[int, Set[str]] = {}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        return self._entries.get(self._key(token))
+
+    def set(self, token: str, principal: Principal) -> None:
+        ttl = None
+        if principal.claims.exp is not None:
+            # Never serve a token past its expiry
+            ttl = principal.claims.exp - time.time()
+            if ttl <= 0:
+                return
+        key = self._key(token)
+        self._entries.set(key, principal, ttl=ttl)
+        keys = {
+            k for k in self._by_user.get(principal.user.id, ()) if k in self._entries
+        }
+        keys.add(key)
+        self._by_user[principal.user.id] = keys
+
+    def invalidate_user(self, user_id: int) -> None:
+        for key in self._by_user.pop(user_id, ()):
+            self._entries.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+metrics.track_cache("principal", principal_cache.stats)
@@ -0,0 +1,81 @@
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.core.shared_state import SharedState, shared_state
+
+# Buckets untouched for this long are full again and can be forgotten
+BUCKET_RETENTION_SECONDS = 3600
+CLEANUP_EVERY = 1000
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    burst: int
+    per_minute: float
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+
+class TokenBucketLimiter:
+    """
+    Seaux à jetons stockés dans l'état partagé : la limite vaut pour
+    l'ensemble des workers. Chaque prise est une transaction SQLite de
+    quelques dizaines de microsecondes, sans commune mesure avec un bcrypt.
+    """
+
+    def __init__(self, state: SharedState) -> None:
+        self.state = state
+        self._calls = 0
+
+    def _take(
+        self, connection: sqlite3.Connection, key: str, policy: BucketPolicy
+    ) -> float:
+        now = time.time()
+        row = connection.execute(
+            "SELECT tokens, updated_at FROM token_bucket WHERE key = ?", (key,)
+        ).fetchone()
+        tokens = float(policy.burst)
+        if row is not None:
+            tokens = min(policy.burst, row[0] + (now - row[1]) * policy.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / policy.rate
+        connection.execute(
+            "INSERT INTO token_bucket (key, tokens, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, "
+            "updated_at = excluded.updated_at",
+            (key, tokens, now),
+        )
+        self._calls += 1
+        if self._calls % CLEANUP_EVERY == 0:
+            connection.execute(
+                "DELETE FROM token_bucket WHERE updated_at < ?",
+                (now - BUCKET_RETENTION_SECONDS,),
+            )
+        return retry_after
+
+    async def take(self, key: str, policy: BucketPolicy) -> Optional[int]:
+        """Prend un jeton ; renvoie None,
+        ou le délai (secondes) avant le prochain jeton"""
+        retry_after = await self.state.run(lambda c: self._take(c, key, policy))
+        return math.ceil(retry_after) if retry_after > 0 else None
+
+
+login_limiter = TokenBucketLimiter(shared_state)
+
+LOGIN_IP_POLICY = BucketPolicy(
+    burst=settings.LOGIN_RATE_LIMIT_IP_BURST,
+    per_minute=settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE,
+)
+LOGIN_USER_POLICY = BucketPolicy(
+    burst=settings.LOGIN_RATE_LIMIT_USER_BURST,
+    per_minute=settings.LOGIN_RATE_LIMIT_USER_PER_MINUTE,
+)
@@ -0,0 +1,92 @@
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+
+SNIPPET_TOKENS = 16
+# Emitted by FTS5 around matched terms, turned into <mark> once the text is escaped
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+_SEARCH_QUERY = text(
+    """
+    SELECT m.id, m.conversation_id, c.title, m.role, m.created_at,
+           snippet(
+               message_fts, 0, :mark_start, :mark_end, '…', :snippet_tokens
+           ) AS snippet
+    FROM message_fts
+    JOIN message m ON m.id = message_fts.rowid
+    JOIN conversation c ON c.id = m.conversation_id
+    WHERE message_fts MATCH :match AND c.user_id = :user_id
+    ORDER BY bm25(message_fts), m.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+def build_match(query: str) -> Optional[str]:
+    """
+    Transforme la saisie de l'utilisateur en expression FTS5 : chaque mot
+    devient une chaîne entre guillemets (la syntaxe FTS5 n'est pas exposée),
+    le dernier est cherché en préfixe pour la recherche au fil de la frappe.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(snippet: str) -> str:
+    """
+    Extrait en HTML sûr : le texte du message est échappé, seules les
+    balises <mark> autour des termes trouvés sont ajoutées
+    """
+    escaped = html.escape(snippet)
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+async def search_messages(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20, offset: int = 0
+) -> Tuple[List[schemas.SearchHit], Optional[int]]:
+    """Messages de l'utilisateur correspondant à la recherche,
+    les plus pertinents d'abord"""
+    match = build_match(query)
+    if match is None:
+        return [], None
+    result = await db.execute(
+        _SEARCH_QUERY,
+        {
+            "match": match,
+            "user_id": user_id,
+            "mark_start": MARK_START,
+            "mark_end": MARK_END,
+            "snippet_tokens": SNIPPET_TOKENS,
+            "limit": limit + 1,
+            "offset": offset,
+        },
+    )
+    rows = result.all()
+    hits = [
+        schemas.SearchHit(
+            message_id=row.id,
+            conversation_id=row.conversation_id,
+            conversation_title=row.title,
+            role=row.role,
+            created_at=row.created_at,
+            snippet=highlight(row.snippet),
+        )
+        for row in rows[:limit]
+    ]
+    return hits, offset + limit if len(rows) > limit else None
+
+
+async def rebuild_index(db: AsyncSession) -> None:
+    """Reconstruit entièrement l'index à partir de la table message"""
+    await db.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+    await db.commit()
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# Per-tool counter -> result label of tool_cache_lookups_total
+OUTCOME_LABELS = {
+    "memory_hits": "memory_hit", "disk_hits": "disk_hit", "misses": "miss"
+}
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Forme canonique des paramètres d'un appel : paramètres absents ignorés,
+    chaînes sans espaces superflus et en minuscules, pour que « Paris » et
+    « paris  » partagent la même entrée.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        normalized[name] = value
+    return normalized
+
+
+def cache_key(tool: str, params: Dict[str, Any]) -> str:
+    raw = json.dumps(
+        [tool, normalize_params(params)], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ToolResultCache:
+    """
+    Cache des résultats d'outils MCP à deux niveaux : un LRU en mémoire
+    borné en octets (résultat sérialisé) et, en option, un fichier JSON par
+    entrée sous storage/ qui survit aux redémarrages. Les TTL sont définis
+    par outil dans mcp_config.yaml (cache_ttl_seconds).
+
+    Les résultats renvoyés sont partagés : ils ne doivent pas être modifiés.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.max_bytes = DEFAULT_MAX_BYTES
+        self.default_ttl = DEFAULT_TTL_SECONDS
+        self.disk_dir: Optional[str] = None
+        self._ttls: Dict[str, float] = {}
+        # key -> (expires_at, size, result); wall clock, shared with the disk tier
+        self._memory: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """Applique settings.cache et les TTL des outils de mcp_config.yaml"""
+        cache_config = config.get("settings", {}).get("cache", {})
+        self.enabled = cache_config.get("enabled", True)
+        self.max_bytes = cache_config.get("max_bytes", DEFAULT_MAX_BYTES)
+        self.default_ttl = cache_config.get("default_ttl_seconds", DEFAULT_TTL_SECONDS)
+        disk = cache_config.get("disk", {})
+        self.disk_dir = (
+            os.path.join(settings.STORAGE_DIR, disk.get("path", "cache/tools"))
+            if disk.get("enabled", False)
+            else None
+        )
+        self._ttls = {
+            tool["name"]: tool["cache_ttl_seconds"]
+            for tool in config.get("tools", [])
+            if "cache_ttl_seconds" in tool
+        }
+        self._evict()
+
+    def ttl(self, tool: str) -> float:
+        return self._ttls.get(tool, self.default_ttl)
+
+    def _count(self, tool: str, outcome: str) -> None:
+        counters = self._stats.setdefault(
+            tool, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+        counters[outcome] += 1
+
+    def _store(self, key: str, expires_at: float, size: int, result: Any) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if size > self.max_bytes:
+            return
+        self._memory[key] = (expires_at, size, result)
+        self._bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._memory and self._bytes > self.max_bytes:
+            _, (_, size, _) = self._memory.popitem(last=False)
+            self._bytes -= size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, int, Any]]:
+        """Entrée valide sur disque ; expirée ou corrompue, elle est supprimée"""
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            entry = json.loads(data)
+            expires_at, result = entry["expires_at"], entry["result"]
+            expired = expires_at <= time.time()
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"Removing corrupt tool cache entry {key}")
+            expired = True
+        if expired:
+            self._remove_disk(key)
+            return None
+        return expires_at, len(data), result
+
+    def _write_disk(self, key: str, tool: str, expires_at: float, payload: str) -> None:
+        os.makedirs(self.disk_dir, exist_ok=True)
+        # Write then rename: a reader never sees a partial file
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(
+                f'{{"tool":{json.dumps(tool)},"expires_at":{expires_at},'
+                f'"result":{payload}}}'
+            )
+        os.replace(tmp_path, self._path(key))
+
+    def _remove_disk(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    async def get(self, tool: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Résultat en cache de l'appel, ou None"""
+        if not self.enabled:
+            return None
+        key = cache_key(tool, params)
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._memory.move_to_end(key)
+                self._count(tool, "memory_hits")
+                return entry[2]
+            self._memory.pop(key)
+            self._bytes -= entry[1]
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._store(key, *entry)
+                self._count(tool, "disk_hits")
+                return entry[2]
+        self._count(tool, "misses")
+        return None
+
+    async def set(self, tool: str, params: Dict[str, Any], result: Any) -> None:
+        ttl = self.ttl(tool)
+        if not self.enabled or ttl <= 0:
+            return
+        key = cache_key(tool, params)
+        payload = json.dumps(result, separators=(",", ":"))
+        expires_at = time.time() + ttl
+        self._store(key, expires_at, len(payload), result)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(
+                    self._write_disk, key, tool, expires_at, payload
+                )
+            except OSError:
+                logger.exception(f"Could not write the {tool} result to the disk cache")
+
+    def _prune_disk(self) -> int:
+        removed = 0
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            # Only count the entries that are actually gone from the disk
+            if self._read_disk(key) is None and not os.path.exists(self._path(key)):
+                removed += 1
+        return removed
+
+    async def prune(self) -> int:
+        """
+        Supprime du disque les entrées expirées ou corrompues ; renvoie leur
+        nombre
+        """
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return 0
+        return await asyncio.to_thread(self._prune_disk)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        tools = {}
+        for tool, counters in self._stats.items():
+            lookups = sum(counters.values())
+            hits = counters["memory_hits"] + counters["disk_hits"]
+            tools[tool] = {**counters, "hit_rate": hits / lookups if lookups else 0.0}
+            for name, value in counters.items():
+                totals[name] += value
+        lookups = sum(totals.values())
+        hits = totals["memory_hits"] + totals["disk_hits"]
+        return {
+            **totals,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk": self.disk_dir is not None,
+            "tools": tools,
+        }
+
+    def export_metrics(self) -> None:
+        """Recopie les compteurs par outil dans les métriques Prometheus"""
+        for tool, counters in self._stats.items():
+            for outcome, result in OUTCOME_LABELS.items():
+                metrics.TOOL_CACHE_LOOKUPS.set(tool, result, value=counters[outcome])
+        metrics.CACHE_ENTRIES.set("tool", value=len(self._memory))
+        metrics.TOOL_CACHE_BYTES.set(value=self._bytes)
+
+
+tool_cache = ToolResultCache()
+metrics.registry.collector(tool_cache.export_metrics)
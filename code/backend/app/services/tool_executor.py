@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core import metrics
+from app.services import tools
+from app.services.tool_registry import tool_registry
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+
+@dataclass
+class ToolPolicy:
+    timeout_seconds: float = 10
+    retry_count: int = 2
+    retry_delay_seconds: float = 1
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par outil : après failure_threshold échecs consécutifs,
+    les appels échouent immédiatement pendant reset_timeout secondes, puis
+    un seul appel d'essai décide de la réouverture ou de la fermeture.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release(self) -> None:
+        """Appel d'essai abandonné sans résultat (requête annulée)"""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ToolExecutor:
+    """
+    Exécute les blocs tool_use d'un tour de Claude en parallèle : la phase
+    d'outils dure autant que l'outil le plus lent. Chaque appel a son délai
+    maximal, ses nouvelles tentatives (backoff exponentiel avec gigue) et
+    passe par le disjoncteur de son outil. Paramètres lus dans mcp_config.yaml.
+    """
+
+    def __init__(self) -> None:
+        self.default_policy = ToolPolicy()
+        self._policies: Dict[str, ToolPolicy] = {}
+        self.failure_threshold = 5
+        self.reset_timeout = 30.0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        Lit les délais et tentatives (settings, surchargeables par outil) et
+        le disjoncteur
+        """
+        global_settings = config.get("settings", {})
+        self.default_policy = ToolPolicy(
+            timeout_seconds=global_settings.get("timeout_seconds", 10),
+            retry_count=global_settings.get("retry_count", 2),
+            retry_delay_seconds=global_settings.get("retry_delay_seconds", 1),
+        )
+        self._policies = {
+            tool["name"]: ToolPolicy(
+                timeout_seconds=tool.get(
+                    "timeout_seconds", self.default_policy.timeout_seconds
+                ),
+                retry_count=tool.get("retry_count", self.default_policy.retry_count),
+                retry_delay_seconds=tool.get(
+                    "retry_delay_seconds", self.default_policy.retry_delay_seconds
+                ),
+            )
+            for tool in config.get("tools", [])
+        }
+        breaker = global_settings.get("circuit_breaker", {})
+        self.failure_threshold = breaker.get("failure_threshold", 5)
+        self.reset_timeout = breaker.get("reset_timeout_seconds", 30)
+        # A configuration reload keeps the state of the existing breakers
+        for circuit in self._breakers.values():
+            circuit.failure_threshold = self.failure_threshold
+            circuit.reset_timeout = self.reset_timeout
+
+    def policy(self, tool: str) -> ToolPolicy:
+        return self._policies.get(tool, self.default_policy)
+
+    def breaker(self, tool: str) -> CircuitBreaker:
+        breaker = self._breakers.get(tool)
+        if breaker is None:
+            breaker = self._breakers[tool] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout
+            )
+        return breaker
+
+    async def call(self, name: str, params: Dict[str, Any]) -> Any:
+        """Un appel d'outil avec délai, nouvelles tentatives et disjoncteur"""
+        tool = tool_registry.get(name)
+        params = tool.validate(params)
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            raise tools.ToolError(name, "Tool temporarily unavailable (circuit open)")
+        policy = self.policy(name)
+        attempt = 0
+        while True:
+            try:
+                result = await asyncio.wait_for(
+                    tools.call_tool(tool.config, params), timeout=policy.timeout_seconds
+                )
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                transient = (
+                    isinstance(e, (asyncio.TimeoutError, httpx.TransportError))
+                    or isinstance(e, tools.ToolError) and e.retryable
+                )
+                if transient and attempt < policy.retry_count:
+                    # Exponential backoff with full jitter, to spread concurrent retries
+                    delay = policy.retry_delay_seconds * 2 ** attempt
+                    await asyncio.sleep(random.uniform(0, delay))
+                    attempt += 1
+                    continue
+                answered = isinstance(e, tools.ToolError) and e.status_code is not None
+                if answered and not transient:
+                    # The tool answered (bad request): it is up, the call is at fault
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                if isinstance(e, tools.ToolError):
+                    raise
+                raise tools.ToolError(
+                    name, f"{type(e).__name__} after {attempt + 1} attempt(s)"
+                )
+            breaker.record_success()
+            return result
+
+    async def _tool_result(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = await self.call(block["name"], block.get("input", {}))
+        except tools.ToolError as e:
+            logger.warning(f"Tool call failed: {e}")
+            return {
+                "type": "tool_result",
+                "tool_use_id": block["id"],
+                "content": e.message,
+                "is_error": True,
+            }
+        return {
+            "type": "tool_result",
+            "tool_use_id": block["id"],
+            "content": json.dumps(result, ensure_ascii=False),
+        }
+
+    async def run(self, content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Exécute les blocs tool_use du contenu d'une réponse de Claude ;
+        renvoie les blocs tool_result correspondants, dans le même ordre.
+        """
+        blocks = [block for block in content if block.get("type") == "tool_use"]
+        return list(
+            await asyncio.gather(*(self._tool_result(block) for block in blocks))
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"state": breaker.state, "consecutive_failures": breaker.failures}
+            for name, breaker in self._breakers.items()
+        }
+
+    def export_metrics(self) -> None:
+        """Recopie l'état des disjoncteurs dans les métriques Prometheus"""
+        for name, breaker in self._breakers.items():
+            state = breaker.state
+            for candidate in CIRCUIT_STATES:
+                metrics.TOOL_CIRCUIT_STATE.set(
+                    name, candidate, value=int(candidate == state)
+                )
+            metrics.TOOL_CONSECUTIVE_FAILURES.set(name, value=breaker.failures)
+
+
+tool_executor = ToolExecutor()
+metrics.registry.collector(tool_executor.export_metrics)
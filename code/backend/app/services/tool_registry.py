@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services import http_clients
+from app.services.tools import ToolError
+
+logger = logging.getLogger(__name__)
+
+# mcp_config.yaml parameter type -> (JSON schema type, accepted Python types)
+PARAMETER_TYPES: Dict[str, Tuple[str, tuple]] = {
+    "string": ("string", (str,)),
+    "integer": ("integer", (int,)),
+    "number": ("number", (int, float)),
+    "boolean": ("boolean", (bool,)),
+}
+
+Validator = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def compile_validator(tool: Dict[str, Any]) -> Validator:
+    """
+    Valide les paramètres d'un appel à partir de la déclaration de l'outil :
+    paramètres inconnus ou manquants, types, valeurs par défaut. Les
+    vérifications sont préparées une fois, au chargement du fichier.
+    """
+    name = tool["name"]
+    specs = []
+    for parameter in tool.get("parameters", []):
+        _, python_types = PARAMETER_TYPES[parameter.get("type", "string")]
+        specs.append(
+            (
+                parameter["name"],
+                python_types,
+                parameter.get("required", False),
+                parameter.get("default"),
+            )
+        )
+    known = {spec[0] for spec in specs}
+
+    def validate(params: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(params) - known
+        if unknown:
+            raise ToolError(name, f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+        validated = {}
+        for parameter, python_types, required, default in specs:
+            value = params.get(parameter)
+            if value is None:
+                if required:
+                    raise ToolError(name, f"Missing parameter: {parameter}")
+                if default is not None:
+                    validated[parameter] = default
+                continue
+            # bool is a subclass of int
+            if not isinstance(value, python_types) or (
+                isinstance(value, bool) and bool not in python_types
+            ):
+                raise ToolError(name, f"Invalid type for parameter: {parameter}")
+            validated[parameter] = value
+        return validated
+
+    return validate
+
+
+def tool_definition(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Définition de l'outil pour l'API Messages (name, description, input_schema)"""
+    properties = {}
+    for parameter in tool.get("parameters", []):
+        schema_type, _ = PARAMETER_TYPES[parameter.get("type", "string")]
+        properties[parameter["name"]] = {
+            "type": schema_type,
+            "description": parameter.get("description", ""),
+        }
+    return {
+        "name": tool["name"],
+        "description": tool.get("description", ""),
+        "input_schema": {
+            "type": "object",
+            "properties": properties,
+            "required": [
+                p["name"] for p in tool.get("parameters", []) if p.get("required")
+            ],
+        },
+    }
+
+
+@dataclass(frozen=True)
+class CompiledTool:
+    name: str
+    config: Dict[str, Any]
+    validate: Validator
+
+
+@dataclass(frozen=True)
+class ToolSet:
+    """Version compilée de mcp_config.yaml, immuable une fois construite"""
+
+    config: Dict[str, Any] = field(default_factory=dict)
+    tools: Dict[str, CompiledTool] = field(default_factory=dict)
+    # JSON of the "tools" request field, identical from one call to the next
+    tools_json: str = "[]"
+    # (mtime_ns, size) of the file it was built from
+    signature: Optional[Tuple[int, int]] = None
+
+
+def is_available(tool: Dict[str, Any]) -> bool:
+    """
+    Outil activé et utilisable : un outil authentifié (auth_header) n'est
+    pas proposé à Claude sans BRAVE_API_KEY, tous ses appels échoueraient
+    """
+    if not tool.get("enabled", True):
+        return False
+    if tool.get("config", {}).get("auth_header") and not settings.BRAVE_API_KEY:
+        logger.warning(f"BRAVE_API_KEY is not set, tool disabled: {tool['name']}")
+        return False
+    return True
+
+
+def compile_config(
+    config: Dict[str, Any], signature: Optional[Tuple[int, int]] = None
+) -> ToolSet:
+    enabled = [tool for tool in config.get("tools", []) if is_available(tool)]
+    definitions = [tool_definition(tool) for tool in enabled]
+    if definitions:
+        # Prompt caching breakpoint: the tools prefix is reused across calls
+        definitions[-1]["cache_control"] = {"type": "ephemeral"}
+    return ToolSet(
+        config=config,
+        tools={
+            tool["name"]: CompiledTool(
+                name=tool["name"], config=tool, validate=compile_validator(tool)
+            )
+            for tool in enabled
+        },
+        tools_json=json.dumps(definitions, ensure_ascii=False, separators=(",", ":")),
+        signature=signature,
+    )
+
+
+class ToolRegistry:
+    """
+    Outils MCP chargés depuis mcp_config.yaml et compilés une seule fois.
+    Le fichier est surveillé : quand il change, un nouveau ToolSet est
+    construit, transmis aux abonnés, puis remplace l'ancien d'une seule
+    affectation, sans redémarrage. Une requête en cours garde le ToolSet
+    qu'elle a lu.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 2.0) -> None:
+        self.path = path or settings.MCP_CONFIG_PATH
+        self.check_interval = check_interval
+        self.current = ToolSet()
+        # Called with the new configuration after each (re)load
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _notify(self, config: Dict[str, Any]) -> None:
+        """
+        Transmet la configuration aux abonnés ; si l'un d'eux échoue, ceux
+        déjà notifiés (et lui-même) reprennent la configuration courante
+        """
+        for index, listener in enumerate(self._listeners):
+            try:
+                listener(config)
+            except Exception:
+                for notified in self._listeners[: index + 1]:
+                    try:
+                        notified(self.current.config)
+                    except Exception:
+                        logger.exception("Could not restore the MCP configuration")
+                raise
+
+    def load(self) -> ToolSet:
+        """
+        Charge et compile le fichier, le transmet aux abonnés, puis remplace
+        le ToolSet courant si tous l'ont accepté
+        """
+        signature = self._signature()
+        tool_set = compile_config(http_clients.load_mcp_config(self.path), signature)
+        self._notify(tool_set.config)
+        self.current = tool_set
+        logger.info(f"MCP tools loaded: {', '.join(tool_set.tools) or 'none'}")
+        return tool_set
+
+    def reload_if_changed(self) -> bool:
+        if self._signature() == self.current.signature:
+            return False
+        try:
+            self.load()
+        except Exception:
+            # Keep serving the previous tools until the file is fixed
+            logger.exception(
+                f"Invalid MCP configuration, keeping the previous one: {self.path}"
+            )
+            self.current = ToolSet(
+                config=self.current.config,
+                tools=self.current.tools,
+                tools_json=self.current.tools_json,
+                signature=self._signature(),
+            )
+            return False
+        return True
+
+    def get(self, name: str) -> CompiledTool:
+        tool = self.current.tools.get(name)
+        if tool is None:
+            raise ToolError(name, "Unknown or disabled tool")
+        return tool
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            self.reload_if_changed()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+tool_registry = ToolRegistry()
@@ -0,0 +1,55 @@
+import logging
+from typing import Any, Dict, Optional
+
+from app.services import http_clients
+from app.services.tool_cache import tool_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ToolError(Exception):
+    """Échec d'un appel d'outil MCP
+    (status_code : réponse HTTP de l'outil, s'il y en a une)"""
+
+    def __init__(
+        self, tool: str, message: str, status_code: Optional[int] = None
+    ) -> None:
+        super().__init__(f"{tool}: {message}")
+        self.tool = tool
+        self.message = message
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        """Erreur transitoire côté outil (limite de débit, erreur serveur)"""
+        return self.status_code is not None and (
+            self.status_code == 429 or self.status_code >= 500
+        )
+
+
+async def fetch(tool: Dict[str, Any], params: Dict[str, Any]) -> Any:
+    """Appel réseau de l'outil (API Brave Search), sans cache"""
+    name = tool["name"]
+    query = {("q" if key == "query" else key): value for key, value in params.items()}
+    client = http_clients.registry.get(name)
+    response = await client.get(tool["config"]["api_url"], params=query)
+    if response.status_code != 200:
+        raise ToolError(
+            name,
+            f"HTTP {response.status_code}: {response.text[:200]}",
+            response.status_code,
+        )
+    return response.json()
+
+
+async def call_tool(tool: Dict[str, Any], params: Dict[str, Any]) -> Any:
+    """
+    Résultat d'un appel d'outil (déclaration de mcp_config.yaml, paramètres
+    déjà validés), servi par le cache quand il est encore valide
+    """
+    result = await tool_cache.get(tool["name"], params)
+    if result is not None:
+        return result
+    result = await fetch(tool, params)
+    await tool_cache.set(tool["name"], params, result)
+    return result
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import models
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, get_async_engine
+
+logger = logging.getLogger(__name__)
+
+UsageKey = Tuple[int, date]
+
+
+class UsageAggregator:
+    """
+    Comptabilité d'usage en écriture différée : les incréments de tokens et
+    de coût sont cumulés en mémoire par (utilisateur, jour), puis écrits en
+    base par un seul upsert, périodiquement et à l'arrêt de l'application.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        # (user_id, day) -> [input_tokens, output_tokens, cost]
+        self._pending: Dict[UsageKey, List[float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None
+
+    def record(
+        self,
+        user_id: int,
+        input_tokens: int,
+        output_tokens: int,
+        cost: float,
+        day: Optional[date] = None,
+    ) -> None:
+        """Enregistre un appel : purement en mémoire, sans I/O"""
+        totals = self._pending.setdefault((user_id, day or date.today()), [0, 0, 0.0])
+        totals[0] += input_tokens
+        totals[1] += output_tokens
+        totals[2] += cost
+
+    def pending(self) -> Dict[UsageKey, List[float]]:
+        return self._pending
+
+    def _merge(self, batch: Dict[UsageKey, List[float]]) -> None:
+        for (user_id, day), totals in batch.items():
+            self.record(user_id, int(totals[0]), int(totals[1]), totals[2], day=day)
+
+    async def _write(self, batch: Dict[UsageKey, List[float]]) -> int:
+        rows = [
+            {
+                "user_id": user_id,
+                "date": day,
+                "input_tokens": totals[0],
+                "output_tokens": totals[1],
+                "cost": totals[2],
+            }
+            for (user_id, day), totals in batch.items()
+        ]
+        insert = (
+            postgresql_insert
+            if get_async_engine().dialect.name == "postgresql"
+            else sqlite_insert
+        )
+        record = models.UsageRecord
+        stmt = insert(record).values(rows)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={
+                "input_tokens": record.input_tokens + excluded.input_tokens,
+                "output_tokens": record.output_tokens + excluded.output_tokens,
+                "cost": record.cost + excluded.cost,
+            },
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except BaseException:
+            # Keep the increments for the next attempt, cancellation included
+            self._merge(batch)
+            raise
+        return len(rows)
+
+    async def _wait_writing(self) -> None:
+        """Attend l'écriture d'un flush précédent, annulé pendant qu'elle tournait"""
+        writing, self._writing = self._writing, None
+        if writing is None:
+            return
+        await asyncio.wait({writing})
+        if not writing.cancelled() and writing.exception() is not None:
+            # Its batch is back in _pending
+            logger.warning(f"Previous usage flush failed: {writing.exception()}")
+
+    async def flush(self) -> int:
+        """Écrit les compteurs en attente ; renvoie le nombre de lignes touchées"""
+        await self._wait_writing()
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        # Shielded: cancelling the caller (stop() cancels the periodic task)
+        # must not interrupt a write whose batch is no longer in _pending
+        writing = self._writing = asyncio.ensure_future(self._write(batch))
+        try:
+            return await asyncio.shield(writing)
+        finally:
+            if writing.done():
+                self._writing = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Usage flush failed, will retry")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+usage_aggregator = UsageAggregator(flush_interval=settings.USAGE_FLUSH_INTERVAL_SECONDS)
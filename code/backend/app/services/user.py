@@ -1,87 +1,240 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
-from app.core.security import get_password_hash, verify_password
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import ALL, bus
+from app.core.security import hash_password, verify_password
+from app.services.principal import principal_cache
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.email == email).first()
+class UserIdentityCache:
+    """
+    Cache d'identité des utilisateurs, indexé par id, username et email.
+    Stocke des instantanés (schemas.UserInDB), jamais des objets ORM liés à une session.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        # Three keys per user: ("id", ...), ("username", ...), ("email", ...)
+        self._entries = TTLCache(maxsize=maxsize * 3, ttl=ttl)
+        self._aliases: Dict[int, Tuple[str, str]] = {}
+
+    def get(self, user_id: int) -> Optional[schemas.UserInDB]:
+        return self._entries.get(("id", user_id))
+
+    def get_by_username(self, username: str) -> Optional[schemas.UserInDB]:
+        return self._entries.get(("username", username))
+
+    def get_by_email(self, email: str) -> Optional[schemas.UserInDB]:
+        return self._entries.get(("email", email))
+
+    def put(self, user: Union[models.User, schemas.UserInDB]) -> schemas.UserInDB:
+        snapshot = schemas.UserInDB.model_validate(user)
+        self.evict(snapshot.id)
+        self._entries.set(("id", snapshot.id), snapshot)
+        self._entries.set(("username", snapshot.username), snapshot)
+        self._entries.set(("email", snapshot.email), snapshot)
+        self._aliases[snapshot.id] = (snapshot.username, snapshot.email)
+        return snapshot
+
+    def evict(self, user_id: int) -> None:
+        self._entries.pop(("id", user_id))
+        aliases = self._aliases.pop(user_id, None)
+        if aliases:
+            self._entries.pop(("username", aliases[0]))
+            self._entries.pop(("email", aliases[1]))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._aliases.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+user_cache = UserIdentityCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+metrics.track_cache("user", user_cache.stats)
+
+USER_CHANNEL = "user"
+
+
+def _invalidate_user(key: str) -> None:
+    """Invalidation reçue du bus : un utilisateur (id) ou tous (ALL)"""
+    if key == ALL:
+        user_cache.clear()
+        principal_cache.clear()
+    else:
+        user_cache.evict(int(key))
+        principal_cache.invalidate_user(int(key))
+
+
+# Every worker, this one included, drops its cached copies of a modified user
+bus.subscribe(USER_CHANNEL, _invalidate_user)
+
+
+def cache_stamp() -> int:
+    """Jeton à prendre avant de lire un utilisateur destiné à un cache"""
+    return bus.stamp()
+
+
+def invalidated_since(user_id: int, stamp: int) -> bool:
+    """Vrai si l'utilisateur a été invalidé depuis le jeton : lecture périmée"""
+    return bus.invalidated_since(USER_CHANNEL, str(user_id), stamp)
+
+
+def _fill_cache(user: models.User, stamp: int) -> schemas.UserInDB:
+    """
+    Met en cache un utilisateur lu en base, sauf si une invalidation l'a
+    croisé pendant la lecture : la valeur est renvoyée sans être gardée
+    """
+    if invalidated_since(user.id, stamp):
+        return schemas.UserInDB.model_validate(user)
+    return user_cache.put(user)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[schemas.UserInDB]:
+    cached = user_cache.get_by_email(email)
+    if cached is not None:
+        return cached
+    stamp = cache_stamp()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
+    return _fill_cache(user, stamp) if user else None
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.username == username).first()
+async def get_user_by_username(
+    db: AsyncSession, username: str
+) -> Optional[schemas.UserInDB]:
+    cached = user_cache.get_by_username(username)
+    if cached is not None:
+        return cached
+    stamp = cache_stamp()
+    result = await db.execute(
+        select(models.User).where(models.User.username == username)
+    )
+    user = result.scalars().first()
+    return _fill_cache(user, stamp) if user else None
 
 
-def get_user(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[schemas.UserInDB]:
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    stamp = cache_stamp()
+    user = await db.get(models.User, user_id)
+    return _fill_cache(user, stamp) if user else None
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> List[models.User]:
+    result = await db.execute(select(models.User).offset(skip).limit(limit))
+    return list(result.scalars().all())
 
 
-def count_users(db: Session) -> int:
+async def count_users(db: AsyncSession) -> int:
     """Compte le nombre d'utilisateurs dans la base de données"""
-    return db.query(models.User).count()
+    result = await db.execute(select(func.count()).select_from(models.User))
+    return result.scalar_one()
 
 
-def delete_all_users(db: Session) -> None:
+async def delete_all_users(db: AsyncSession) -> None:
     """Supprime tous les utilisateurs de la base de données (pour les tests uniquement)"""
-    db.query(models.User).delete()
-    db.commit()
+    await db.execute(delete(models.User))
+    await db.commit()
+    await bus.publish(USER_CHANNEL)
 
 
-def create_user(db: Session, user_in: schemas.UserCreate) -> models.User:
+async def create_user(
+    db: AsyncSession, user_in: schemas.UserCreate
+) -> schemas.UserInDB:
+    # Hashed before the session is used (see update_user)
+    hashed_password = await hash_password(user_in.password)
     db_user = models.User(
         username=user_in.username,
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         is_active=user_in.is_active,
         is_admin=user_in.is_admin,
         created_at=datetime.utcnow()
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    await db.flush()
+    await db.refresh(db_user)
+    await db.commit()
+    return user_cache.put(db_user)
 
 
-def update_user(db: Session, user: models.User, user_in: schemas.UserUpdate) -> models.User:
+async def update_user(
+    db: AsyncSession,
+    user: Union[models.User, schemas.UserInDB],
+    user_in: schemas.UserUpdate,
+) -> schemas.UserInDB:
     update_data = user_in.model_dump(exclude_unset=True)
+    # Hash before the first query: the session would otherwise hold the
+    # worker's only write connection for the whole bcrypt run
     if "password" in update_data and update_data["password"]:
-        update_data["hashed_password"] = get_password_hash(update_data["password"])
+        update_data["hashed_password"] = await hash_password(update_data["password"])
         del update_data["password"]
+    # Accepts a cached snapshot: the row is (re)loaded by primary key in this session
+    db_user = await db.get(models.User, user.id)
     for field, value in update_data.items():
-        setattr(user, field, value)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
-
-
-def authenticate_user(db: Session, username: str, password: str) -> Optional[models.User]:
-    user = get_user_by_username(db, username)
+        setattr(db_user, field, value)
+    db.add(db_user)
+    await db.flush()
+    await db.refresh(db_user)
+    await db.commit()
+    await bus.publish(USER_CHANNEL, str(db_user.id))
+    return user_cache.put(db_user)
+
+
+async def authenticate_user(
+    db: AsyncSession, username: str, password: str
+) -> Optional[schemas.UserInDB]:
+    """
+    Vérifie les identifiants. db doit être une session de lecture : la
+    vérification bcrypt a lieu pendant que sa transaction est ouverte.
+    """
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return None
     return user
 
 
-def update_last_login(db: Session, user: models.User) -> models.User:
-    user.last_login = datetime.utcnow()
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+async def update_last_login(
+    db: AsyncSession, user: Union[models.User, schemas.UserInDB]
+) -> schemas.UserInDB:
+    last_login = datetime.utcnow()
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user.id)
+        .values(last_login=last_login)
+    )
+    await db.commit()
+    await bus.publish(USER_CHANNEL, str(user.id))
+    snapshot = schemas.UserInDB.model_validate(user).model_copy(
+        update={"last_login": last_login}
+    )
+    return user_cache.put(snapshot)
 
 
-def is_active(user: models.User) -> bool:
+def is_active(user: Union[models.User, schemas.UserInDB]) -> bool:
     return user.is_active
 
 
-def is_admin(user: models.User) -> bool:
+def is_admin(user: Union[models.User, schemas.UserInDB]) -> bool:
     return user.is_admin
+
+
+def cache_stats() -> dict:
+    """Compteurs hit/miss du cache d'identité"""
+    return user_cache.stats()
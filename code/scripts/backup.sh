@@ -32,49 +32,56 @@ show_help() {
     echo "Options:"
     echo "  -b, --backup    Effectue une sauvegarde (par défaut)"
     echo "  -r, --restore FILE  Restaure une sauvegarde depuis le fichier spécifié"
+    echo "                  (archive backup_*.tar.gz ou base database_*.db.gz)"
     echo "  -h, --help      Affiche cette aide"
     echo
     echo "Exemples:"
     echo "  $0 -b           # Effectue une sauvegarde"
     echo "  $0 -r backup_20250407_120000.tar.gz  # Restaure la sauvegarde spécifiée"
+    echo "  $0 -r database_20250407_120000.db.gz  # Restaure uniquement la base"
 }
 
 # Définition des chemins
 APP_DIR="$HOME/claude-rasp"
 BACKUP_DIR="$APP_DIR/storage/backups"
 DATABASE_DIR="$APP_DIR/storage/database"
+DATABASE_FILE="$DATABASE_DIR/app.db"
+BACKEND_DIR="$APP_DIR/code/backend"
 
 # Vérifier que le répertoire d'application existe
 if [ ! -d "$APP_DIR" ]; then
     print_error "Le répertoire d'application n'existe pas. Exécutez d'abord le script d'installation."
 fi
 
+# Sauvegarde en ligne de la base : le service continue de répondre pendant la copie.
+# La sauvegarde est vérifiée et les plus anciennes sont supprimées (BACKUP_KEEP).
+# Affiche le chemin de la sauvegarde créée.
+backup_database() {
+    (cd "$BACKEND_DIR" && .venv/bin/python -m app.services.backup)
+}
+
 # Fonction de sauvegarde
 do_backup() {
-    print_step "Création d'une sauvegarde"
+    print_step "Sauvegarde de la base de données"
     
     # Création du répertoire de sauvegarde si nécessaire
     mkdir -p "$BACKUP_DIR"
     
+    DATABASE_BACKUP=$(backup_database) || print_error "Erreur lors de la sauvegarde de la base de données"
+    print_success "Base sauvegardée: $DATABASE_BACKUP"
+    
+    print_step "Sauvegarde de la configuration et des journaux"
+    
     # Génération du nom de fichier avec date et heure
     BACKUP_DATE=$(date +"%Y%m%d_%H%M%S")
     BACKUP_FILE="$BACKUP_DIR/backup_$BACKUP_DATE.tar.gz"
     
-    # Arrêt temporaire du service pour éviter les modifications pendant la sauvegarde
-    sudo systemctl stop claude-rasp-backend.service
-    print_success "Service arrêté temporairement pour la sauvegarde"
-    
-    # Sauvegarde des fichiers essentiels
+    # Sauvegarde des fichiers essentiels (la base est sauvegardée à part)
     tar -czf "$BACKUP_FILE" \
-        -C "$APP_DIR" storage/database \
         -C "$APP_DIR" code/backend/.env code/frontend/.env \
         -C "$APP_DIR" storage/logs \
         2>/dev/null
     
-    # Redémarrage du service
-    sudo systemctl start claude-rasp-backend.service
-    print_success "Service redémarré"
-    
     # Vérification de la création du fichier de sauvegarde
     if [ -f "$BACKUP_FILE" ]; then
         print_success "Sauvegarde créée: $BACKUP_FILE"
@@ -111,6 +118,12 @@ do_restore() {
         print_error "Restauration annulée."
     fi
     
+    # Sauvegarde de la base seule
+    if [[ "$RESTORE_FILE" == *.db.gz ]]; then
+        restore_database "$RESTORE_FILE"
+        return
+    fi
+    
     # Arrêt du service
     sudo systemctl stop claude-rasp-backend.service
     print_success "Service arrêté pour la restauration"
@@ -130,6 +143,35 @@ do_restore() {
     print_success "Restauration terminée avec succès"
 }
 
+# Restauration d'une sauvegarde de la base (database_*.db.gz)
+restore_database() {
+    RESTORE_FILE="$1"
+    
+    # Décompression (et vérification du gzip) avant d'arrêter le service
+    mkdir -p "$DATABASE_DIR"
+    gunzip -c "$RESTORE_FILE" > "$DATABASE_FILE.restore" || print_error "Sauvegarde illisible: $RESTORE_FILE"
+    
+    # Sauvegarde des données actuelles au cas où (en ligne, service démarré)
+    if [ -f "$DATABASE_FILE" ]; then
+        TEMP_BACKUP=$(backup_database) || print_error "Impossible de sauvegarder la base actuelle"
+        print_success "Sauvegarde temporaire créée: $TEMP_BACKUP"
+    fi
+    
+    # Arrêt du service
+    sudo systemctl stop claude-rasp-backend.service
+    print_success "Service arrêté pour la restauration"
+    
+    # Remplacement de la base ; le journal WAL de l'ancienne base ne doit pas lui être appliqué
+    mv "$DATABASE_FILE.restore" "$DATABASE_FILE"
+    rm -f "$DATABASE_FILE-wal" "$DATABASE_FILE-shm"
+    
+    # Redémarrage du service
+    sudo systemctl start claude-rasp-backend.service
+    print_success "Service redémarré"
+    
+    print_success "Restauration de la base terminée avec succès"
+}
+
 # Traitement des arguments
 MODE="backup"
 RESTORE_FILE=""
@@ -79,7 +79,8 @@ print_success "Dépendances backend mises à jour"
 
 # Exécution des migrations de base de données (si Alembic est utilisé)
 if [ -d "alembic" ]; then
-    alembic upgrade head || print_error "Erreur lors de la migration de la base de données"
+    # run_migrations marque d'abord une base créée par create_all à la révision initiale
+    python -c "from app.db.setup_db import run_migrations; run_migrations()" || print_error "Erreur lors de la migration de la base de données"
     print_success "Migrations de base de données appliquées"
 fi
 
@@ -45,7 +45,8 @@ print_success "Dépendances mises à jour"
 # Exécution des migrations de base de données (si Alembic est utilisé)
 if [ -d "alembic" ]; then
     print_step "Application des migrations"
-    alembic upgrade head || print_error "Erreur lors de la migration de la base de données"
+    # run_migrations marque d'abord une base créée par create_all à la révision initiale
+    python -c "from app.db.setup_db import run_migrations; run_migrations()" || print_error "Erreur lors de la migration de la base de données"
     print_success "Migrations de base de données appliquées"
 fi
 
@@ -84,5 +84,44 @@ class ApiClient:
             headers=self.get_headers()
         )
     
+    def list_conversations(self, **params):
+        """Lister les conversations de l'utilisateur connecté"""
+        return requests.get(
+            f"{self.base_url}/conversations",
+            params=params,
+            headers=self.get_headers()
+        )
+    
+    def create_conversation(self, title):
+        """Créer une nouvelle conversation"""
+        return requests.post(
+            f"{self.base_url}/conversations",
+            json={"title": title},
+            headers=self.get_headers()
+        )
+    
+    def get_conversation(self, conversation_id):
+        """Récupérer une conversation et ses messages"""
+        return requests.get(
+            f"{self.base_url}/conversations/{conversation_id}",
+            headers=self.get_headers()
+        )
+    
+    def delete_conversation(self, conversation_id):
+        """Supprimer une conversation"""
+        return requests.delete(
+            f"{self.base_url}/conversations/{conversation_id}",
+            headers=self.get_headers()
+        )
+    
+    def send_message(self, conversation_id, content, stream=False):
+        """Envoyer un message (réponse SSE si stream=True)"""
+        return requests.post(
+            f"{self.base_url}/conversations/{conversation_id}/messages",
+            json={"content": content, "stream": stream},
+            headers=self.get_headers(),
+            stream=stream
+        )
+    
     # Méthodes pour les futurs endpoints de l'API...
     # Ces méthodes seront ajoutées au fur et à mesure que de nouveaux endpoints sont implémentés
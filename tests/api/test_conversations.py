@@ -0,0 +1,69 @@
+"""
+Tests pour les endpoints de conversations
+"""
+import os
+import sys
+
+# Ajout du répertoire parent au path si nécessaire
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from tests.api.api_client import ApiClient
+    from tests.api.test_auth import print_header, print_success, print_error, print_response
+    from tests.config import ADMIN_USERNAME, ADMIN_PASSWORD
+except ImportError:
+    # Import alternatif si exécuté directement depuis le répertoire api/
+    from api_client import ApiClient
+    from test_auth import print_header, print_success, print_error, print_response
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from config import ADMIN_USERNAME, ADMIN_PASSWORD
+
+
+def test_conversation_crud():
+    """Création, lecture, liste et suppression d'une conversation"""
+    print_header("TEST DES CONVERSATIONS")
+
+    api_client = ApiClient()
+    response = api_client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+    if response.status_code != 200:
+        print_error("Connexion admin impossible, test ignoré")
+        print_response(response)
+        return False
+
+    results = {}
+
+    response = api_client.create_conversation("Conversation de test")
+    results['create_conversation'] = response.status_code == 201
+    if not results['create_conversation']:
+        print_response(response)
+        return False
+    conversation_id = response.json()["id"]
+
+    response = api_client.get_conversation(conversation_id)
+    results['get_conversation'] = (
+        response.status_code == 200 and response.json()["messages"] == []
+    )
+
+    response = api_client.list_conversations(limit=5)
+    results['list_conversations'] = (
+        response.status_code == 200
+        and any(item["id"] == conversation_id for item in response.json()["items"])
+    )
+
+    response = api_client.delete_conversation(conversation_id)
+    results['delete_conversation'] = response.status_code == 200
+
+    response = api_client.get_conversation(conversation_id)
+    results['get_deleted_conversation'] = response.status_code == 404
+
+    for test_name, result in results.items():
+        if result:
+            print_success(f"Test '{test_name}' réussi")
+        else:
+            print_error(f"Test '{test_name}' échoué")
+
+    return all(results.values())
+
+
+if __name__ == "__main__":
+    test_conversation_crud()
@@ -0,0 +1,375 @@
+"""
+Banc de charge asynchrone de l'API
+
+N clients concurrents (httpx.AsyncClient, connexions persistantes) rejouent
+chaque scénario pendant une durée donnée. Le rapport donne le débit, les
+latences p50/p95/p99, le temps jusqu'au premier token (chat en streaming)
+et la mémoire (RSS) du serveur ; il est enregistré en JSON pour comparer
+les commits entre eux sur le même Pi.
+
+    python -m tests.benchmark.run_benchmarks --clients 10 --duration 30
+    python -m tests.benchmark.run_benchmarks --scenarios chat --server-pid $(pgrep -o gunicorn)
+    python -m tests.benchmark.run_benchmarks --compare results/a.json results/b.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from tests.config import ADMIN_PASSWORD, ADMIN_USERNAME, API_BASE_URL
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# chat calls Claude (billed) unless the server targets the fake Claude API
+DEFAULT_SCENARIOS = ["login", "me", "conversations"]
+
+CHAT_PROMPT = "Réponds en une phrase : quelle est la capitale de la France ?"
+
+
+@dataclass
+class ScenarioResult:
+    """Mesures d'un scénario, tous clients confondus"""
+
+    latencies: List[float] = field(default_factory=list)
+    first_tokens: List[float] = field(default_factory=list)
+    status_codes: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    def record(self, latency: float, status_code: int) -> None:
+        self.latencies.append(latency)
+        self.status_codes[str(status_code)] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        requests = len(self.latencies)
+        ok = sum(n for code, n in self.status_codes.items() if code.startswith("2"))
+        summary = {
+            "requests": requests,
+            "ok": ok,
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+            "throughput_rps": round(ok / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": percentiles(self.latencies),
+        }
+        if self.first_tokens:
+            summary["time_to_first_token_ms"] = percentiles(self.first_tokens)
+        return summary
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 (rang le plus proche), moyenne et maximum, en millisecondes"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(50) * 1000, 2),
+        "p95": round(rank(95) * 1000, 2),
+        "p99": round(rank(99) * 1000, 2),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """RSS en octets du processus et de ses enfants (workers gunicorn), Linux uniquement"""
+    pids = [pid]
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces: the ppid follows the closing parenthesis
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                pids.append(int(entry))
+    except OSError:
+        return None
+    total = 0
+    for child in pids:
+        try:
+            with open(f"/proc/{child}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total or None
+
+
+class RSSSampler:
+    """Relève la mémoire du serveur à intervalle régulier pendant le banc"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            rss = process_rss(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.pid is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Optional[Dict[str, float]]:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if not self.samples:
+            return None
+        mib = 1024 * 1024
+        return {
+            "start_mib": round(self.samples[0] / mib, 1),
+            "peak_mib": round(max(self.samples) / mib, 1),
+            "end_mib": round(self.samples[-1] / mib, 1),
+        }
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+# A scenario step sends one request and records it
+Step = Callable[[httpx.AsyncClient, ScenarioResult], Awaitable[None]]
+
+
+async def _timed(result: ScenarioResult, request: Awaitable[httpx.Response]) -> None:
+    started = time.perf_counter()
+    response = await request
+    result.record(time.perf_counter() - started, response.status_code)
+
+
+def login_step(username: str, password: str) -> Step:
+    async def step(client: httpx.AsyncClient, result: ScenarioResult) -> None:
+        await _timed(
+            result,
+            client.post("/auth/login", data={"username": username, "password": password}),
+        )
+    return step
+
+
+async def me_step(client: httpx.AsyncClient, result: ScenarioResult) -> None:
+    await _timed(result, client.get("/auth/me"))
+
+
+async def conversations_step(client: httpx.AsyncClient, result: ScenarioResult) -> None:
+    await _timed(result, client.get("/conversations", params={"limit": 20}))
+
+
+async def chat_step(client: httpx.AsyncClient, result: ScenarioResult) -> None:
+    """Nouvelle conversation, puis un message dont la réponse est lue en SSE"""
+    response = await client.post("/conversations", json={"title": "benchmark"})
+    response.raise_for_status()
+    conversation_id = response.json()["id"]
+    started = time.perf_counter()
+    first_token = None
+    async with client.stream(
+        "POST",
+        f"/conversations/{conversation_id}/messages",
+        json={"content": CHAT_PROMPT, "stream": True},
+    ) as response:
+        async for line in response.aiter_lines():
+            if first_token is None and line == "event: delta":
+                first_token = time.perf_counter() - started
+            elif line == "event: error":
+                result.errors["stream_error"] += 1
+    result.record(time.perf_counter() - started, response.status_code)
+    if first_token is not None:
+        result.first_tokens.append(first_token)
+    await client.delete(f"/conversations/{conversation_id}")
+
+
+async def run_scenario(
+    step: Step,
+    base_url: str,
+    token: Optional[str],
+    clients: int,
+    duration: float,
+) -> ScenarioResult:
+    """clients boucles concurrentes, chacune avec sa connexion persistante"""
+    result = ScenarioResult()
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        async with httpx.AsyncClient(
+            base_url=base_url, headers=headers, timeout=httpx.Timeout(120.0, connect=10.0)
+        ) as client:
+            while time.perf_counter() < deadline:
+                try:
+                    await step(client, result)
+                except httpx.HTTPError as e:
+                    result.errors[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        token = await login(client, args.username, args.password)
+
+    steps: Dict[str, Step] = {
+        "login": login_step(args.username, args.password),
+        "me": me_step,
+        "conversations": conversations_step,
+        "chat": chat_step,
+    }
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "host": platform.node(),
+            "base_url": args.base_url,
+            "clients": args.clients,
+            "duration_seconds": args.duration,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        sampler = RSSSampler(args.server_pid)
+        sampler.start()
+        print(f"{name}: {args.clients} clients, {args.duration:g} s...", flush=True)
+        result = await run_scenario(
+            steps[name],
+            args.base_url,
+            None if name == "login" else token,
+            args.clients,
+            args.duration,
+        )
+        summary = result.summary()
+        summary["server_rss"] = await sampler.stop()
+        report["scenarios"][name] = summary
+        print_summary(name, summary)
+    return report
+
+
+def print_summary(name: str, summary: Dict[str, Any]) -> None:
+    latency = summary["latency_ms"]
+    line = (
+        f"  {summary['throughput_rps']} req/s, {summary['ok']}/{summary['requests']} ok, "
+        f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms"
+    )
+    if "time_to_first_token_ms" in summary:
+        line += f", TTFT p50 {summary['time_to_first_token_ms']['p50']} ms"
+    if summary.get("server_rss"):
+        line += f", RSS peak {summary['server_rss']['peak_mib']} MiB"
+    print(line)
+    other_codes = {c: n for c, n in summary["status_codes"].items() if not c.startswith("2")}
+    if other_codes or summary["errors"]:
+        print(f"  non-2xx: {other_codes}, errors: {summary['errors']}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Écarts de débit et de latence entre deux rapports"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            continue
+        print(name)
+        pairs = [("throughput_rps", old["throughput_rps"], new["throughput_rps"])]
+        pairs += [
+            (f"latency {p}", old["latency_ms"][p], new["latency_ms"][p])
+            for p in ("p50", "p95", "p99")
+        ]
+        if "time_to_first_token_ms" in old and "time_to_first_token_ms" in new:
+            pairs.append(
+                (
+                    "TTFT p50",
+                    old["time_to_first_token_ms"]["p50"],
+                    new["time_to_first_token_ms"]["p50"],
+                )
+            )
+        for label, a, b in pairs:
+            delta = f"{(b - a) / a * 100:+.1f} %" if a and b is not None else "n/a"
+            print(f"  {label:<15} {a} -> {b} ({delta})")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Banc de charge de l'API")
+    parser.add_argument("--base-url", default=API_BASE_URL)
+    parser.add_argument("--username", default=ADMIN_USERNAME)
+    parser.add_argument("--password", default=ADMIN_PASSWORD)
+    parser.add_argument("--clients", type=int, default=10, help="clients concurrents")
+    parser.add_argument("--duration", type=float, default=20.0, help="secondes par scénario")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=DEFAULT_SCENARIOS,
+        help="login,me,conversations,chat (chat appelle Claude)",
+    )
+    parser.add_argument("--server-pid", type=int, help="PID du serveur (maître gunicorn) pour la RSS")
+    parser.add_argument("--output", help="fichier JSON du rapport (défaut: results/<date>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare deux rapports")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios or []) - {"login", "me", "conversations", "chat"}
+    if unknown:
+        parser.error(f"scénario(s) inconnu(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    report = asyncio.run(run_benchmarks(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport enregistré : {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
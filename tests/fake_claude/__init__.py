@@ -0,0 +1,3 @@
+from tests.fake_claude.server import FakeClaudeConfig, create_app, load_transcripts
+
+__all__ = ["FakeClaudeConfig", "create_app", "load_transcripts"]
@@ -0,0 +1,49 @@
+"""
+Lance l'API Claude factice :
+
+    python -m tests.fake_claude --port 8900 --ttft-ms 300 --tokens-per-second 50
+
+puis, côté backend : CLAUDE_API_URL=http://127.0.0.1:8900/v1
+"""
+import argparse
+
+import uvicorn
+
+from tests.fake_claude.server import FakeClaudeConfig, create_app, load_transcripts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API Claude factice")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="délai avant le premier token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="0 = sans limite")
+    parser.add_argument("--output-tokens", type=int, default=60, help="longueur des réponses synthétiques")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="part de réponses 429")
+    parser.add_argument("--overload-rate", type=float, default=0.0, help="part de réponses 529")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="part de flux interrompus")
+    parser.add_argument("--tool-use-rate", type=float, default=0.0, help="part de réponses tool_use")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="au-delà : 429 (0 = illimité)")
+    parser.add_argument("--retry-after", type=int, default=1, help="en-tête retry-after des 429")
+    parser.add_argument("--transcripts", help="JSONL de réponses à rejouer dans l'ordre")
+    parser.add_argument("--seed", type=int, default=0, help="graine du tirage des erreurs")
+    args = parser.parse_args()
+
+    config = FakeClaudeConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        overload_rate=args.overload_rate,
+        stream_error_rate=args.stream_error_rate,
+        tool_use_rate=args.tool_use_rate,
+        max_concurrency=args.max_concurrency,
+        retry_after_seconds=args.retry_after,
+        transcripts=load_transcripts(args.transcripts) if args.transcripts else [],
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
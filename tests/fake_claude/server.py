@@ -0,0 +1,276 @@
+"""
+API Messages factice (compatible avec l'API Claude) pour les tests et les
+bancs de charge hors ligne
+
+Réponses synthétiques ou rejouées depuis un fichier de transcriptions,
+streaming SSE, blocs tool_use, champs usage, erreurs 429/529, latence
+jusqu'au premier token et débit de tokens réglables. Le générateur
+aléatoire est initialisé par --seed : deux lancements identiques
+produisent la même suite de réponses et d'erreurs.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "le banc de charge mesure la latence du Raspberry Pi pendant que Claude "
+    "répond token par token avec une régularité tout à fait artificielle"
+).split()
+
+
+@dataclass
+class FakeClaudeConfig:
+    # Delay before the first token, then pace of the following ones
+    ttft_ms: float = 300.0
+    tokens_per_second: float = 50.0
+    # Length of the synthetic answers, in tokens (capped by max_tokens)
+    output_tokens: int = 60
+    # Probabilities, drawn per request
+    rate_limit_rate: float = 0.0
+    overload_rate: float = 0.0
+    # Overloaded error sent in the middle of a stream
+    stream_error_rate: float = 0.0
+    # Answer with a tool_use block when the request declares tools
+    tool_use_rate: float = 0.0
+    # Requests handled at once; the following ones get a 429 (0 = unlimited)
+    max_concurrency: int = 0
+    retry_after_seconds: int = 1
+    # JSONL of Messages API responses replayed in order (content, stop_reason, usage)
+    transcripts: List[Dict[str, Any]] = field(default_factory=list)
+    seed: Optional[int] = None
+
+
+def load_transcripts(path: str) -> List[Dict[str, Any]]:
+    """Lit un fichier JSONL, une réponse de l'API Messages par ligne"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def estimate_tokens(value: Any) -> int:
+    """Même approximation que le backend (4 caractères par token)"""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return len(text) // 4 + 1
+
+
+def split_tokens(text: str) -> List[str]:
+    """Découpe un texte en « tokens » (un mot et l'espace qui le suit)"""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _error(status_code: int, error_type: str, message: str, **headers: str) -> JSONResponse:
+    return JSONResponse(
+        {"type": "error", "error": {"type": error_type, "message": message}},
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class FakeClaude:
+    def __init__(self, config: FakeClaudeConfig) -> None:
+        self.config = config
+        self.random = random.Random(config.seed)
+        self._transcripts: Iterator[Dict[str, Any]] = itertools.cycle(config.transcripts)
+        self.in_flight = 0
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "streams": 0,
+            "rate_limited": 0,
+            "overloaded": 0,
+            "stream_errors": 0,
+            "tool_uses": 0,
+            "max_in_flight": 0,
+        }
+
+    def _roll(self, rate: float) -> bool:
+        return rate > 0 and self.random.random() < rate
+
+    def _answer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Contenu de la réponse : transcription suivante ou réponse synthétique"""
+        if self.config.transcripts:
+            return dict(next(self._transcripts))
+
+        messages = body.get("messages", [])
+        last = messages[-1]["content"] if messages else ""
+        after_tool = isinstance(last, list) and any(
+            block.get("type") == "tool_result" for block in last
+        )
+        tools = body.get("tools") or []
+        if tools and not after_tool and self._roll(self.config.tool_use_rate):
+            tool = tools[0]
+            required = tool.get("input_schema", {}).get("required", [])
+            text = last if isinstance(last, str) else "recherche"
+            return {
+                "content": [
+                    {"type": "text", "text": "Je lance une recherche. "},
+                    {
+                        "type": "tool_use",
+                        "id": f"toolu_{self.random.getrandbits(96):024x}",
+                        "name": tool["name"],
+                        "input": {name: text[:100] for name in required},
+                    },
+                ],
+                "stop_reason": "tool_use",
+            }
+
+        count = min(self.config.output_tokens, body.get("max_tokens", self.config.output_tokens))
+        words = [WORDS[i % len(WORDS)] for i in range(count)]
+        return {
+            "content": [{"type": "text", "text": " ".join(words) + "."}],
+            "stop_reason": "end_turn" if count == self.config.output_tokens else "max_tokens",
+        }
+
+    def _message(self, body: Dict[str, Any], answer: Dict[str, Any]) -> Dict[str, Any]:
+        content = answer.get("content", [])
+        output_tokens = sum(
+            len(split_tokens(block["text"]))
+            if block["type"] == "text"
+            else estimate_tokens(block["input"])
+            for block in content
+        )
+        usage = {
+            "input_tokens": estimate_tokens(body.get("messages", []))
+            + estimate_tokens(body.get("tools", [])),
+            "output_tokens": output_tokens,
+            **answer.get("usage", {}),
+        }
+        return {
+            "id": f"msg_{self.random.getrandbits(96):024x}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-fake"),
+            "content": content,
+            "stop_reason": answer.get("stop_reason", "end_turn"),
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    async def _pace(self, tokens: int) -> None:
+        if self.config.tokens_per_second > 0 and tokens:
+            await asyncio.sleep(tokens / self.config.tokens_per_second)
+
+    async def _stream(
+        self, message: Dict[str, Any], fail_after: Optional[int]
+    ) -> AsyncIterator[str]:
+        """Événements SSE de la réponse ; erreur overloaded après fail_after deltas"""
+        try:
+            usage = message["usage"]
+            start = {**message, "content": [], "stop_reason": None}
+            start["usage"] = {"input_tokens": usage["input_tokens"], "output_tokens": 1}
+            yield _sse("message_start", {"type": "message_start", "message": start})
+            await asyncio.sleep(self.config.ttft_ms / 1000)
+            sent = 0
+            for index, block in enumerate(message["content"]):
+                if block["type"] == "text":
+                    yield _sse(
+                        "content_block_start",
+                        {"type": "content_block_start", "index": index,
+                         "content_block": {"type": "text", "text": ""}},
+                    )
+                    chunks = [
+                        {"type": "text_delta", "text": token}
+                        for token in split_tokens(block["text"])
+                    ]
+                else:
+                    yield _sse(
+                        "content_block_start",
+                        {"type": "content_block_start", "index": index,
+                         "content_block": {**block, "input": {}}},
+                    )
+                    partial_json = json.dumps(block["input"], ensure_ascii=False)
+                    chunks = [
+                        {"type": "input_json_delta", "partial_json": partial_json[i:i + 16]}
+                        for i in range(0, len(partial_json), 16)
+                    ]
+                for delta in chunks:
+                    if sent and fail_after is not None and sent >= fail_after:
+                        self.stats["stream_errors"] += 1
+                        yield _sse(
+                            "error",
+                            {"type": "error",
+                             "error": {"type": "overloaded_error", "message": "Overloaded"}},
+                        )
+                        return
+                    if sent:
+                        await self._pace(1)
+                    sent += 1
+                    yield _sse(
+                        "content_block_delta",
+                        {"type": "content_block_delta", "index": index, "delta": delta},
+                    )
+                yield _sse("content_block_stop", {"type": "content_block_stop", "index": index})
+            yield _sse(
+                "message_delta",
+                {"type": "message_delta",
+                 "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                 "usage": {"output_tokens": usage["output_tokens"]}},
+            )
+            yield _sse("message_stop", {"type": "message_stop"})
+        finally:
+            self.in_flight -= 1
+
+    async def messages(self, request: Request):
+        self.stats["requests"] += 1
+        if self.config.max_concurrency and self.in_flight >= self.config.max_concurrency:
+            self.stats["rate_limited"] += 1
+            return _error(
+                429, "rate_limit_error", "Too many concurrent requests",
+                **{"retry-after": str(self.config.retry_after_seconds)},
+            )
+        if self._roll(self.config.rate_limit_rate):
+            self.stats["rate_limited"] += 1
+            return _error(
+                429, "rate_limit_error", "Rate limited",
+                **{"retry-after": str(self.config.retry_after_seconds)},
+            )
+        if self._roll(self.config.overload_rate):
+            self.stats["overloaded"] += 1
+            return _error(529, "overloaded_error", "Overloaded")
+
+        body = await request.json()
+        message = self._message(body, self._answer(body))
+        if message["stop_reason"] == "tool_use":
+            self.stats["tool_uses"] += 1
+
+        self.in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+        if body.get("stream"):
+            self.stats["streams"] += 1
+            # Drawn here, in arrival order, so that a seeded run is reproducible
+            fail_after = (
+                self.random.randint(1, max(1, message["usage"]["output_tokens"] - 1))
+                if self._roll(self.config.stream_error_rate)
+                else None
+            )
+            return StreamingResponse(
+                self._stream(message, fail_after), media_type="text/event-stream"
+            )
+        try:
+            await asyncio.sleep(self.config.ttft_ms / 1000)
+            await self._pace(message["usage"]["output_tokens"] - 1)
+        finally:
+            self.in_flight -= 1
+        return message
+
+
+def create_app(config: Optional[FakeClaudeConfig] = None) -> FastAPI:
+    fake = FakeClaude(config or FakeClaudeConfig())
+    app = FastAPI(title="Fake Claude API")
+    app.state.fake = fake
+    app.add_api_route("/v1/messages", fake.messages, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats() -> Dict[str, int]:
+        return {**fake.stats, "in_flight": fake.in_flight}
+
+    return app
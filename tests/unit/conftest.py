@@ -0,0 +1,50 @@
+"""
+Tests unitaires du backend, sans serveur : les services sont importés
+directement, sur une base SQLite et un état partagé temporaires.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "code", "backend")
+)
+_tmp = tempfile.mkdtemp(prefix="claude-rasp-tests-")
+
+# Read by app.core.config when the application is first imported
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/app.db"
+os.environ["SHARED_STATE_PATH"] = os.path.join(_tmp, "shared.db")
+os.environ["STORAGE_DIR"] = os.path.join(_tmp, "storage")
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Base migrée jusqu'à la dernière révision (schéma, index FTS, triggers)"""
+    from app.db.setup_db import run_migrations
+
+    run_migrations()
+
+
+@pytest.fixture
+def run():
+    """
+    Exécute une coroutine dans une boucle neuve, puis libère les connexions
+    poolées (elles sont liées à la boucle qui les a ouvertes)
+    """
+    from app.db.session import dispose_engines
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await dispose_engines()
+
+        return asyncio.run(main())
+
+    return run
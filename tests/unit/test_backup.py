@@ -0,0 +1,34 @@
+from app.core.config import Settings
+from app.core.shared_state import SharedState
+from app.services.backup import BackupService
+
+
+def test_backup_dir_follows_storage_dir_from_env_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_DIR", raising=False)
+    monkeypatch.delenv("BACKUP_DIR", raising=False)
+    env_file = tmp_path / ".env"
+    env_file.write_text(f"STORAGE_DIR={tmp_path / 'storage'}\n")
+    settings = Settings(_env_file=str(env_file))
+    assert settings.BACKUP_DIR == str(tmp_path / "storage" / "backups")
+
+    env_file.write_text(f"STORAGE_DIR={tmp_path}\nBACKUP_DIR=/srv/backups\n")
+    assert Settings(_env_file=str(env_file)).BACKUP_DIR == "/srv/backups"
+
+
+def test_backups_in_the_same_second_do_not_collide(database, tmp_path):
+    state = SharedState(str(tmp_path / "shared.db"))
+    service = BackupService(
+        state,
+        directory=str(tmp_path / "backups"),
+        keep=5,
+        interval_hours=0,
+        pages_per_step=256,
+        step_sleep=0,
+    )
+    try:
+        names = [service.backup()["name"] for _ in range(3)]
+        assert len(set(names)) == 3
+        assert [backup["name"] for backup in service.backups()] == names[::-1]
+        assert service.verify(names[-1])["ok"]
+    finally:
+        state.close()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.core.shared_state import SharedState
+from app.services.budget import BudgetExceeded, BudgetLedger
+
+USER_ID = 1
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = SharedState(str(tmp_path / "shared.db"))
+    yield state
+    state.close()
+
+
+@pytest.fixture
+def ledger(state):
+    ledger = BudgetLedger(state)
+    asyncio.run(ledger.set_limits(USER_ID, 1.0, 10.0))
+    return ledger
+
+
+def test_reserve_then_settle_charges_the_actual_cost(ledger):
+    async def scenario():
+        reservation = await ledger.reserve(USER_ID, 0.5)
+        assert (await ledger.status(USER_ID))["reserved"] == pytest.approx(0.5)
+        await ledger.settle(reservation, 0.2)
+        return await ledger.status(USER_ID)
+
+    status = asyncio.run(scenario())
+    assert status["reserved"] == 0
+    assert status["daily_spent"] == pytest.approx(0.2)
+    assert status["monthly_spent"] == pytest.approx(0.2)
+
+
+def test_release_on_error_charges_nothing(ledger):
+    async def scenario():
+        reservation = await ledger.reserve(USER_ID, 0.5)
+        await ledger.release(reservation)
+        return await ledger.status(USER_ID)
+
+    status = asyncio.run(scenario())
+    assert status["reserved"] == 0
+    assert status["daily_spent"] == 0
+
+
+def test_reject_when_over_the_limit(ledger):
+    async def scenario():
+        await ledger.settle(await ledger.reserve(USER_ID, 0.9), 0.9)
+        with pytest.raises(BudgetExceeded) as exc_info:
+            await ledger.reserve(USER_ID, 0.2)
+        return exc_info.value
+
+    exceeded = asyncio.run(scenario())
+    assert exceeded.period == "daily"
+    assert exceeded.limit == 1.0
+
+
+def test_monthly_limit_applies_too(ledger):
+    async def scenario():
+        await ledger.set_limits(USER_ID, 100.0, 1.0)
+        with pytest.raises(BudgetExceeded) as exc_info:
+            await ledger.reserve(USER_ID, 1.5)
+        return exc_info.value
+
+    assert asyncio.run(scenario()).period == "monthly"
+
+
+def test_concurrent_reservations_cannot_both_take_the_last_budget(state, ledger):
+    # Two workers: same shared state file, one connection each
+    other_state = SharedState(state.path)
+    other = BudgetLedger(other_state)
+
+    async def attempt(worker: BudgetLedger):
+        try:
+            return await worker.reserve(USER_ID, 0.6)
+        except BudgetExceeded as exc:
+            return exc
+
+    async def scenario():
+        return await asyncio.gather(*(attempt(w) for w in (ledger, other) * 4))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        other_state.close()
+    granted = [r for r in results if not isinstance(r, BudgetExceeded)]
+    assert len(granted) == 1
+    assert asyncio.run(ledger.status(USER_ID))["reserved"] == pytest.approx(0.6)
@@ -0,0 +1,72 @@
+import anyio
+import pytest
+from starlette.responses import StreamingResponse
+
+from app.api.v1 import chat
+from app.core.shared_state import SharedState
+from app.services import claude
+from app.services.budget import BudgetLedger
+from app.services.usage import UsageAggregator
+
+USER_ID = 1
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    state = SharedState(str(tmp_path / "shared.db"))
+    ledger = BudgetLedger(state)
+    monkeypatch.setattr(chat, "budget_ledger", ledger)
+    yield ledger
+    state.close()
+
+
+@pytest.fixture
+def usage(monkeypatch):
+    usage = UsageAggregator(flush_interval=60)
+    monkeypatch.setattr(chat, "usage_aggregator", usage)
+    return usage
+
+
+async def _stream_then_hang(messages, use_tools=True):
+    """Réponse de Claude interrompue : le client part avant message_stop"""
+    yield {"type": "message_start", "message": {"usage": {"input_tokens": 100}}}
+    yield {
+        "type": "content_block_delta",
+        "index": 0,
+        "delta": {"type": "text_delta", "text": "Bonjour"},
+    }
+    yield {"type": "message_delta", "delta": {}, "usage": {"output_tokens": 20}}
+    await anyio.sleep(60)
+
+
+def test_client_disconnect_mid_stream_still_bills_the_tokens(
+    ledger, usage, monkeypatch
+):
+    monkeypatch.setattr(claude, "stream_message", _stream_then_hang)
+
+    async def scenario():
+        reservation = await ledger.reserve(USER_ID, 0.5)
+        turn = chat._Turn(user_id=USER_ID, reservation=reservation)
+        response = StreamingResponse(chat._stream_reply(turn, 1, []))
+        gone = anyio.Event()
+
+        async def receive():
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message.get("body"):
+                # The client leaves as soon as the first delta reaches it
+                gone.set()
+
+        with anyio.fail_after(5):
+            await response({"type": "http"}, receive, send)
+        return await ledger.status(USER_ID)
+
+    status = anyio.run(scenario)
+    cost = claude.compute_cost(100, 20)
+    assert status["reserved"] == 0
+    assert status["daily_spent"] == pytest.approx(cost)
+    ((user_id, _), (input_tokens, output_tokens, billed)), = usage.pending().items()
+    assert (user_id, input_tokens, output_tokens) == (USER_ID, 100, 20)
+    assert billed == pytest.approx(cost)
@@ -0,0 +1,101 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app import models, schemas
+from app.db.session import AsyncSessionLocal
+from app.services import conversation as conversation_service
+
+
+async def _conversation(db, username: str) -> int:
+    user = models.User(
+        username=username, email=f"{username}@example.com", hashed_password="x"
+    )
+    db.add(user)
+    await db.commit()
+    conversation = await conversation_service.create_conversation(
+        db, user.id, schemas.ConversationCreate(title="Test")
+    )
+    return conversation.id
+
+
+async def _summary(conversation_id: int):
+    async with AsyncSessionLocal() as db:
+        return (
+            await db.execute(
+                select(
+                    models.Conversation.message_count,
+                    models.Conversation.last_message_preview,
+                ).where(models.Conversation.id == conversation_id)
+            )
+        ).one()
+
+
+def test_summary_follows_inserts_and_deletes(database, run):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            conversation_id = await _conversation(db, "summary")
+            first = await conversation_service.add_message(
+                db, conversation_id, "user", "premier"
+            )
+            second = await conversation_service.add_message(
+                db, conversation_id, "assistant", "second"
+            )
+        assert tuple(await _summary(conversation_id)) == (2, "second")
+
+        async with AsyncSessionLocal() as db:
+            message = await conversation_service.get_message(
+                db, conversation_id, second.id
+            )
+            await conversation_service.delete_message(db, message)
+        assert tuple(await _summary(conversation_id)) == (1, "premier")
+
+        async with AsyncSessionLocal() as db:
+            message = await conversation_service.get_message(
+                db, conversation_id, first.id
+            )
+            await conversation_service.delete_message(db, message)
+        assert tuple(await _summary(conversation_id)) == (0, None)
+
+    run(scenario())
+
+
+def test_concurrent_inserts_are_all_counted(database, run):
+    async def add(conversation_id: int, n: int):
+        async with AsyncSessionLocal() as db:
+            await conversation_service.add_message(
+                db, conversation_id, "user", f"message {n}"
+            )
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            conversation_id = await _conversation(db, "concurrent")
+        await asyncio.gather(*(add(conversation_id, n) for n in range(8)))
+        count, _ = await _summary(conversation_id)
+        assert count == 8
+
+    run(scenario())
+
+
+def test_delete_conversation_removes_its_messages(database, run):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            conversation_id = await _conversation(db, "deleted")
+            for n in range(3):
+                await conversation_service.add_message(
+                    db, conversation_id, "user", f"message {n}"
+                )
+            conversation = await conversation_service.get_conversation(
+                db, conversation_id
+            )
+            await conversation_service.delete_conversation(db, conversation)
+        async with AsyncSessionLocal() as db:
+            assert await db.get(models.Conversation, conversation_id) is None
+            remaining = await db.scalar(
+                select(func.count())
+                .select_from(models.Message)
+                .where(models.Message.conversation_id == conversation_id)
+            )
+            assert remaining == 0
+
+    run(scenario())
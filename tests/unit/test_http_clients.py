@@ -0,0 +1,30 @@
+import asyncio
+
+from app.core import metrics
+from app.services import http_clients
+from app.services.http_clients import CLAUDE
+
+
+def test_connection_pool_usage_is_exported_as_metrics():
+    registry = http_clients.registry
+    pool = registry.get(CLAUDE)._transport.transport._pool
+    try:
+        assert registry.stats()[CLAUDE]["connections"] == 0
+        connections = metrics.registry.snapshot()["upstream_connections"]
+        assert connections['["claude", "active"]'] == 0
+        assert connections['["claude", "idle"]'] == 0
+
+        class Connection:
+            def __init__(self, idle: bool) -> None:
+                self.idle = idle
+
+            def is_idle(self) -> bool:
+                return self.idle
+
+        pool._pool = [Connection(True), Connection(True), Connection(False)]
+        connections = metrics.registry.snapshot()["upstream_connections"]
+        assert connections['["claude", "active"]'] == 1
+        assert connections['["claude", "idle"]'] == 2
+    finally:
+        pool._pool = []
+        asyncio.run(registry.shutdown())
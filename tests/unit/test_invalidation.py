@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app import models
+from app.core import invalidation, metrics
+from app.core.cache import TTLCache
+from app.core.invalidation import ALL, InvalidationBus, bus
+from app.core.shared_state import SharedState
+from app.db.session import AsyncSessionLocal
+from app.services import user as user_service
+from app.services.user import USER_CHANNEL, user_cache
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Deux workers : chacun son bus et sa connexion, un même état partagé"""
+    states = [SharedState(str(tmp_path / "shared.db")) for _ in range(2)]
+    yield [InvalidationBus(state, poll_interval=60) for state in states]
+    for state in states:
+        state.close()
+
+
+def test_eviction_reaches_the_other_worker(workers):
+    first, second = workers
+    cache = TTLCache(maxsize=8, ttl=60)
+    cache.set("1", "alice")
+    cache.set("2", "bob")
+    first.subscribe("user", cache.pop)
+
+    async def scenario():
+        await first.start()
+        await second.publish("user", "1")
+        applied = await first.poll()
+        await first.stop()
+        return applied
+
+    assert asyncio.run(scenario()) == 1
+    assert "1" not in cache
+    assert "2" in cache
+    # A worker does not apply its own entries twice
+    assert asyncio.run(second.poll()) == 0
+
+
+def test_bus_counters_are_exported_as_metrics(workers):
+    first, second = workers
+
+    async def scenario():
+        await first.start()
+        await second.publish("user", "1")
+        await second.publish("user", "2")
+        await first.poll()
+        await first.stop()
+
+    asyncio.run(scenario())
+    second.export_metrics()
+    assert metrics.CACHE_INVALIDATIONS.snapshot()['["published"]'] == 2
+    first.export_metrics()
+    assert metrics.CACHE_INVALIDATIONS.snapshot()['["received"]'] == 2
+
+
+def test_read_crossed_by_an_invalidation_is_refused(workers):
+    first, second = workers
+
+    async def scenario():
+        await first.start()
+        stamp = first.stamp()
+        # Cache miss in progress on the first worker while the second one
+        # commits a change and publishes it
+        await second.publish("user", "1")
+        await first.poll()
+        await first.stop()
+        return stamp
+
+    stamp = asyncio.run(scenario())
+    assert first.invalidated_since("user", "1", stamp)
+    assert not first.invalidated_since("user", "2", stamp)
+    assert not first.invalidated_since("user", "1", first.stamp())
+
+
+def test_channel_wide_invalidation_covers_every_key(workers):
+    first, _ = workers
+    stamp = first.stamp()
+    asyncio.run(first.publish("user", ALL))
+    assert first.invalidated_since("user", "42", stamp)
+    assert not first.invalidated_since("other", "42", stamp)
+
+
+def test_forgotten_invalidations_are_assumed_stale(workers, monkeypatch):
+    first, _ = workers
+    monkeypatch.setattr(invalidation, "RECENT_KEYS", 2)
+    stamp = first.stamp()
+
+    async def scenario():
+        for key in ("1", "2", "3"):
+            await first.publish("user", key)
+
+    asyncio.run(scenario())
+    assert first.invalidated_since("user", "99", stamp)
+    assert not first.invalidated_since("user", "99", first.stamp())
+
+
+def test_stale_user_read_is_not_cached(database, run):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            row = models.User(
+                username="raced", email="raced@example.com", hashed_password="x"
+            )
+            db.add(row)
+            await db.commit()
+            stamp = user_service.cache_stamp()
+            # Another worker's update is applied while the row is being read
+            bus._dispatch(USER_CHANNEL, str(row.id))
+            user = user_service._fill_cache(row, stamp)
+            assert user.username == "raced"
+            assert user_cache.get(row.id) is None
+
+            user = await user_service.get_user(db, row.id)
+            assert user_cache.get(row.id) == user
+
+    run(scenario())
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.core.shared_state import SharedState
+
+
+def _worker(state: SharedState) -> MetricsRegistry:
+    registry = MetricsRegistry(state)
+    registry.counter("requests_total", "Requests", ("status",))
+    registry.gauge("in_flight", "Requests being handled")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    return registry
+
+
+@pytest.fixture
+def workers(tmp_path):
+    states = [SharedState(str(tmp_path / "shared.db")) for _ in range(2)]
+    yield [_worker(state) for state in states]
+    for state in states:
+        state.close()
+
+
+def _record(worker: MetricsRegistry, requests: int) -> None:
+    metrics = worker._metrics
+    metrics["requests_total"].inc("200", amount=requests)
+    metrics["in_flight"].inc()
+    metrics["latency_seconds"].observe(0.5)
+
+
+def test_totals_survive_a_stopped_worker(workers):
+    first, second = workers
+    _record(first, 3)
+    _record(second, 2)
+
+    async def scenario():
+        await second.flush()
+        before = await first.collect()
+        await second.stop()
+        return before, await first.collect()
+
+    before, after = asyncio.run(scenario())
+    assert before["requests_total"] == {'["200"]': 5}
+    assert before["in_flight"] == {"[]": 2}
+    assert after["requests_total"] == before["requests_total"]
+    assert after["latency_seconds"] == {"[]": [0.0, 2.0, 0.0, 1.0]}
+    # The gauge of a stopped worker is dropped, not retired
+    assert after["in_flight"] == {"[]": 1}
+
+
+def test_stale_snapshot_is_retired_when_collected(workers):
+    first, second = workers
+    _record(first, 3)
+    _record(second, 2)
+
+    async def scenario():
+        await second.flush()
+        await second.state.run(
+            lambda c: c.execute(
+                "UPDATE metrics_snapshot SET updated_at = 0 WHERE origin = ?",
+                (second.origin,),
+            )
+        )
+        collected = await first.collect()
+        # Retired once only, however many scrapes follow
+        return collected, await first.collect()
+
+    collected, again = asyncio.run(scenario())
+    assert collected["requests_total"] == {'["200"]': 5}
+    assert again["requests_total"] == {'["200"]': 5}
+    assert again["in_flight"] == {"[]": 1}
+
+
+def test_collectors_refresh_values_before_each_snapshot(workers):
+    first, _ = workers
+    hits = first.counter("cache_hits_total", "Hits", ("cache",))
+    stats = {"hits": 1}
+    first.collector(lambda: hits.set("user", value=stats["hits"]))
+    assert first.snapshot()["cache_hits_total"] == {'["user"]': 1.0}
+    stats["hits"] = 4
+    assert asyncio.run(first.collect())["cache_hits_total"] == {'["user"]': 4.0}
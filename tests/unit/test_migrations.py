@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from tests.unit.conftest import BACKEND_DIR
+
+
+def _migrate(database: str, revision: str) -> None:
+    """Migration dans un processus à part : l'application lit DATABASE_URL à l'import"""
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from alembic import command; from alembic.config import Config; "
+            "from app.db.setup_db import ALEMBIC_INI; "
+            f"command.upgrade(Config(ALEMBIC_INI), {revision!r})",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{database}"},
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_duplicate_usage_rows_are_merged_before_the_unique_index(tmp_path):
+    database = str(tmp_path / "app.db")
+    _migrate(database, "0001_initial_schema")
+    connection = sqlite3.connect(database)
+    with connection:
+        connection.execute(
+            "INSERT INTO user (id, username, email, hashed_password) "
+            "VALUES (1, 'alice', 'alice@example.com', 'x')"
+        )
+        connection.executemany(
+            "INSERT INTO usagerecord "
+            "(user_id, date, input_tokens, output_tokens, cost) "
+            "VALUES (1, ?, ?, ?, ?)",
+            [
+                ("2026-10-01", 100, 10, 0.5),
+                ("2026-10-01", 200, 20, 1.0),
+                ("2026-10-01", 300, None, 1.5),
+                ("2026-10-02", 50, 5, 0.25),
+            ],
+        )
+    connection.close()
+
+    _migrate(database, "head")
+    connection = sqlite3.connect(database)
+    rows = connection.execute(
+        "SELECT id, date, input_tokens, output_tokens, cost FROM usagerecord "
+        "ORDER BY id"
+    ).fetchall()
+    connection.close()
+    assert rows == [
+        (1, "2026-10-01", 600, 30, 3.0),
+        (4, "2026-10-02", 50, 5, 0.25),
+    ]
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+
+from app import schemas
+from app.core import cache, metrics
+from app.services.principal import Principal, PrincipalCache, principal_cache
+
+
+def _principal(user_id: int, exp=None) -> Principal:
+    user = schemas.UserInDB(
+        id=user_id,
+        username=f"user{user_id}",
+        email=f"user{user_id}@example.com",
+        hashed_password="x",
+        is_active=True,
+        is_admin=False,
+        created_at=datetime(2025, 1, 1),
+    )
+    return Principal(claims=schemas.TokenPayload(sub=user_id, exp=exp), user=user)
+
+
+def test_hit_and_miss():
+    principals = PrincipalCache(maxsize=8, ttl=60)
+    assert principals.get("token-a") is None
+    principals.set("token-a", _principal(1))
+    assert principals.get("token-a").user.id == 1
+    assert principals.stats()["hits"] == 1
+    assert principals.stats()["misses"] == 1
+
+
+def test_expired_token_is_not_cached():
+    principals = PrincipalCache(maxsize=8, ttl=60)
+    principals.set("token-a", _principal(1, exp=int(time.time()) - 1))
+    assert principals.get("token-a") is None
+
+
+def test_entry_expires_with_the_token(monkeypatch):
+    principals = PrincipalCache(maxsize=8, ttl=60)
+    principals.set("token-a", _principal(1, exp=int(time.time()) + 5))
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 10)
+    assert principals.get("token-a") is None
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    principals = PrincipalCache(maxsize=8, ttl=60)
+    principals.set("token-a", _principal(1))
+    principals.set("token-b", _principal(1))
+    principals.set("token-c", _principal(2))
+    principals.invalidate_user(1)
+    assert principals.get("token-a") is None
+    assert principals.get("token-b") is None
+    assert principals.get("token-c") is not None
+
+
+def test_least_recently_used_is_evicted():
+    principals = PrincipalCache(maxsize=2, ttl=60)
+    principals.set("token-a", _principal(1))
+    principals.set("token-b", _principal(2))
+    principals.get("token-a")
+    principals.set("token-c", _principal(3))
+    assert principals.get("token-b") is None
+    assert principals.get("token-a") is not None
+    assert principals.get("token-c") is not None
+
+
+def test_stats_are_exported_as_metrics():
+    principal_cache.clear()
+    principal_cache.get("token-a")
+    principal_cache.set("token-a", _principal(1))
+    principal_cache.get("token-a")
+    stats = principal_cache.stats()
+    snapshot = metrics.registry.snapshot()
+    lookups = snapshot["cache_lookups_total"]
+    assert lookups['["principal", "hit"]'] == stats["hits"]
+    assert lookups['["principal", "miss"]'] == stats["misses"]
+    assert snapshot["cache_entries"]['["principal"]'] == 1
@@ -0,0 +1,45 @@
+import logging
+
+from app.core.config import Settings, settings
+from app.db import profiler
+
+STATEMENT = "UPDATE user SET hashed_password=? WHERE user.id = ?"
+
+
+def _slow_query_log(caplog, parameters) -> str:
+    with caplog.at_level(logging.WARNING, logger=profiler.__name__):
+        profiler.record_query(STATEMENT, parameters, 10.0, "writer")
+    (record,) = caplog.records
+    return record.getMessage()
+
+
+def test_slow_query_logs_parameter_types_not_values(caplog):
+    message = _slow_query_log(caplog, ("$2b$12$secret", 7))
+    assert STATEMENT in message
+    assert "(str, int)" in message
+    assert "secret" not in message
+
+
+def test_bulk_and_named_parameters_are_summarized():
+    assert profiler._parameter_types([("a", 1), ("b", 2)]) == "2 x (str, int)"
+    assert profiler._parameter_types({"content": "Bonjour"}) == "{content: str}"
+
+
+def test_production_logs_the_statement_only(caplog, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    message = _slow_query_log(caplog, ("$2b$12$secret", 7))
+    assert message.endswith(STATEMENT)
+
+
+def test_profile_header_follows_environment_from_env_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("ENVIRONMENT", raising=False)
+    monkeypatch.delenv("DB_PROFILE_HEADER", raising=False)
+    env_file = tmp_path / ".env"
+    env_file.write_text("ENVIRONMENT=production\n")
+    assert Settings(_env_file=str(env_file)).DB_PROFILE_HEADER is False
+
+    env_file.write_text("ENVIRONMENT=development\n")
+    assert Settings(_env_file=str(env_file)).DB_PROFILE_HEADER is True
+
+    env_file.write_text("ENVIRONMENT=production\nDB_PROFILE_HEADER=true\n")
+    assert Settings(_env_file=str(env_file)).DB_PROFILE_HEADER is True
@@ -0,0 +1,20 @@
+from starlette.requests import Request
+
+from app.api.deps.rate_limit import client_ip
+
+
+def _request(peer: str, real_ip: str = "") -> Request:
+    headers = [(b"x-real-ip", real_ip.encode())] if real_ip else []
+    return Request(
+        {"type": "http", "headers": headers, "client": (peer, 50000)}
+    )
+
+
+def test_real_ip_is_honoured_behind_a_trusted_proxy():
+    assert client_ip(_request("127.0.0.1", "203.0.113.7")) == "203.0.113.7"
+    assert client_ip(_request("127.0.0.1")) == "127.0.0.1"
+
+
+def test_real_ip_from_another_peer_is_ignored():
+    assert client_ip(_request("198.51.100.4", "203.0.113.7")) == "198.51.100.4"
+    assert client_ip(_request("testclient", "203.0.113.7")) == "testclient"
@@ -0,0 +1,113 @@
+from sqlalchemy import update
+
+from app import models, schemas
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal
+from app.services import conversation as conversation_service
+from app.services import search
+
+
+def test_build_match_quotes_terms_and_prefixes_the_last():
+    assert search.build_match('chat "noir" OR') == '"chat" "noir" "OR"*'
+    assert search.build_match("  ?! ") is None
+
+
+async def _setup(username: str):
+    async with AsyncSessionLocal() as db:
+        user = models.User(
+            username=username, email=f"{username}@example.com", hashed_password="x"
+        )
+        db.add(user)
+        await db.commit()
+        conversation = await conversation_service.create_conversation(
+            db, user.id, schemas.ConversationCreate(title="Recettes")
+        )
+        message = await conversation_service.add_message(
+            db, conversation.id, "user", "la ratatouille de grand-mère"
+        )
+        return user.id, conversation.id, message.id
+
+
+async def _search(user_id: int, query: str):
+    async with AsyncReadSessionLocal() as db:
+        hits, _ = await search.search_messages(db, user_id=user_id, query=query)
+        return [hit.message_id for hit in hits]
+
+
+def test_inserted_message_is_found_by_prefix(database, run):
+    async def scenario():
+        user_id, _, message_id = await _setup("search_insert")
+        assert await _search(user_id, "ratat") == [message_id]
+        assert await _search(user_id, "bouillabaisse") == []
+
+    run(scenario())
+
+
+def test_search_is_scoped_to_the_user(database, run):
+    async def scenario():
+        owner, _, own = await _setup("search_owner")
+        other, _, theirs = await _setup("search_other")
+        assert await _search(owner, "ratatouille") == [own]
+        assert await _search(other, "ratatouille") == [theirs]
+
+    run(scenario())
+
+
+def test_edited_message_is_reindexed(database, run):
+    async def scenario():
+        user_id, _, message_id = await _setup("search_edit")
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.Message)
+                .where(models.Message.id == message_id)
+                .values(content="une bouillabaisse")
+            )
+            await db.commit()
+        assert await _search(user_id, "ratatouille") == []
+        assert await _search(user_id, "bouillabaisse") == [message_id]
+
+    run(scenario())
+
+
+def test_deleted_message_leaves_the_index(database, run):
+    async def scenario():
+        user_id, conversation_id, message_id = await _setup("search_delete")
+        async with AsyncSessionLocal() as db:
+            message = await conversation_service.get_message(
+                db, conversation_id, message_id
+            )
+            await conversation_service.delete_message(db, message)
+        assert await _search(user_id, "ratatouille") == []
+
+    run(scenario())
+
+
+def test_rebuild_restores_a_consistent_index(database, run):
+    async def scenario():
+        user_id, _, message_id = await _setup("search_rebuild")
+        async with AsyncSessionLocal() as db:
+            await search.rebuild_index(db)
+        assert await _search(user_id, "ratatouille") == [message_id]
+
+    run(scenario())
+
+
+def test_snippet_escapes_stored_markup(database, run):
+    async def scenario():
+        user_id, conversation_id, _ = await _setup("search_markup")
+        async with AsyncSessionLocal() as db:
+            await conversation_service.add_message(
+                db,
+                conversation_id,
+                "user",
+                'hello <b>there</b> <script>alert("x")</script>',
+            )
+        async with AsyncReadSessionLocal() as db:
+            (hit,), _ = await search.search_messages(
+                db, user_id=user_id, query="there"
+            )
+        assert "<script>" not in hit.snippet
+        assert "<b>" not in hit.snippet
+        assert "&lt;b&gt;<mark>there</mark>&lt;/b&gt;" in hit.snippet
+        assert "&lt;script&gt;" in hit.snippet
+
+    run(scenario())
@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+from app.core import metrics
+from app.services.tool_cache import ToolResultCache, cache_key
+
+
+def _cache(tmp_path) -> ToolResultCache:
+    cache = ToolResultCache()
+    cache.configure({"tools": [{"name": "weather", "cache_ttl_seconds": 60}]})
+    cache.disk_dir = str(tmp_path)
+    return cache
+
+
+def test_normalized_params_share_an_entry():
+    assert cache_key("weather", {"city": "Paris"}) == cache_key(
+        "weather", {"city": "  paris ", "units": None}
+    )
+
+
+def test_disk_entry_survives_a_restart(tmp_path):
+    asyncio.run(_cache(tmp_path).set("weather", {"city": "Paris"}, {"temp": 12}))
+    cache = _cache(tmp_path)
+    assert asyncio.run(cache.get("weather", {"city": "paris"})) == {"temp": 12}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_prune_removes_expired_and_corrupt_entries(tmp_path):
+    cache = _cache(tmp_path)
+    asyncio.run(cache.set("weather", {"city": "Paris"}, {"temp": 12}))
+    cache._write_disk(cache_key("weather", {"city": "Lyon"}), "weather", 0, "{}")
+    (tmp_path / "truncated.json").write_text('{"tool":"weather","exp')
+    (tmp_path / "shape.json").write_text("[]")
+
+    assert asyncio.run(cache.prune()) == 3
+    assert os.listdir(tmp_path) == [f"{cache_key('weather', {'city': 'Paris'})}.json"]
+    assert asyncio.run(cache.prune()) == 0
+
+
+def test_per_tool_hits_and_misses_are_exported_as_metrics(tmp_path):
+    cache = _cache(tmp_path)
+
+    async def lookups():
+        await cache.get("weather", {"city": "Paris"})
+        await cache.set("weather", {"city": "Paris"}, {"temp": 12})
+        await cache.get("weather", {"city": "Paris"})
+        await cache.get("weather", {"city": "Paris"})
+
+    asyncio.run(lookups())
+    cache.export_metrics()
+    lookups = metrics.TOOL_CACHE_LOOKUPS.snapshot()
+    assert lookups['["weather", "memory_hit"]'] == 2
+    assert lookups['["weather", "disk_hit"]'] == 0
+    assert lookups['["weather", "miss"]'] == 1
+    assert metrics.CACHE_ENTRIES.snapshot()['["tool"]'] == 1
+    assert metrics.TOOL_CACHE_BYTES.snapshot()["[]"] == cache.stats()["bytes"]
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.core import metrics
+from app.services import tools
+from app.services.tool_executor import ToolExecutor
+from app.services.tool_registry import compile_config, tool_registry
+
+CONFIG = {
+    "settings": {
+        "timeout_seconds": 0.05,
+        "retry_count": 1,
+        "retry_delay_seconds": 0,
+        "circuit_breaker": {"failure_threshold": 2, "reset_timeout_seconds": 60},
+    },
+    "tools": [
+        {"name": "echo", "parameters": [{"name": "text", "required": True}]},
+        {"name": "hang"},
+        {"name": "bad_request"},
+        {"name": "off", "enabled": False},
+    ],
+}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Outils factices : renvoie la liste des appels réellement exécutés"""
+    calls = []
+
+    async def call_tool(tool, params):
+        calls.append(tool["name"])
+        if tool["name"] == "hang":
+            await asyncio.sleep(1)
+        if tool["name"] == "bad_request":
+            raise tools.ToolError(tool["name"], "HTTP 400", 400)
+        return params
+
+    monkeypatch.setattr(tools, "call_tool", call_tool)
+    monkeypatch.setattr(tool_registry, "current", compile_config(CONFIG))
+    return calls
+
+
+@pytest.fixture
+def executor() -> ToolExecutor:
+    executor = ToolExecutor()
+    executor.configure(CONFIG)
+    return executor
+
+
+def _use(block_id: str, name: str, **params):
+    return {"type": "tool_use", "id": block_id, "name": name, "input": params}
+
+
+def test_results_follow_the_order_of_the_blocks(calls, executor):
+    results = asyncio.run(
+        executor.run(
+            [
+                {"type": "text", "text": "Je regarde"},
+                _use("a", "echo", text="un"),
+                _use("b", "echo", text="deux"),
+            ]
+        )
+    )
+    assert [r["tool_use_id"] for r in results] == ["a", "b"]
+    assert results[1]["content"] == '{"text": "deux"}'
+    assert not any(r.get("is_error") for r in results)
+
+
+@pytest.mark.parametrize("name", ["missing", "off"])
+def test_unknown_or_disabled_tool_is_an_error_result(calls, executor, name):
+    (result,) = asyncio.run(executor.run([_use("a", name)]))
+    assert result["is_error"]
+    assert result["content"] == "Unknown or disabled tool"
+    assert calls == []
+
+
+def test_invalid_parameters_are_rejected_before_the_call(calls, executor):
+    (result,) = asyncio.run(executor.run([_use("a", "echo", txt="typo")]))
+    assert result["is_error"]
+    assert "Unknown parameter(s): txt" in result["content"]
+    assert calls == []
+
+
+def test_timeout_is_retried_then_reported(calls, executor):
+    (result,) = asyncio.run(executor.run([_use("a", "hang")]))
+    assert result["is_error"]
+    assert result["content"] == "TimeoutError after 2 attempt(s)"
+    assert calls == ["hang", "hang"]
+
+
+def test_repeated_timeouts_open_the_circuit(calls, executor):
+    for _ in range(2):
+        asyncio.run(executor.run([_use("a", "hang")]))
+    (result,) = asyncio.run(executor.run([_use("a", "hang")]))
+    assert "circuit open" in result["content"]
+    assert executor.stats()["hang"]["state"] == "open"
+    assert len(calls) == 4
+
+
+def test_client_error_is_not_retried_and_keeps_the_circuit_closed(calls, executor):
+    for _ in range(3):
+        (result,) = asyncio.run(executor.run([_use("a", "bad_request")]))
+        assert result["content"] == "HTTP 400"
+    assert calls == ["bad_request"] * 3
+    assert executor.stats()["bad_request"]["state"] == "closed"
+
+
+def test_breaker_state_is_exported_as_metrics(calls, executor):
+    for _ in range(2):
+        asyncio.run(executor.run([_use("a", "hang")]))
+    asyncio.run(executor.run([_use("a", "echo", text="un")]))
+    executor.export_metrics()
+    states = metrics.TOOL_CIRCUIT_STATE.snapshot()
+    assert states['["hang", "open"]'] == 1
+    assert states['["hang", "closed"]'] == 0
+    assert states['["echo", "closed"]'] == 1
+    failures = metrics.TOOL_CONSECUTIVE_FAILURES.snapshot()
+    assert failures['["hang"]'] == 2
+    assert failures['["echo"]'] == 0
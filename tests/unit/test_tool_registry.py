@@ -0,0 +1,56 @@
+import json
+
+import pytest
+import yaml
+
+from app.core.config import settings
+from app.services.tool_registry import ToolRegistry, compile_config
+
+BRAVE = {"config": {"auth_header": "X-Subscription-Token"}}
+CONFIG = {
+    "tools": [
+        {"name": "web", **BRAVE, "parameters": [{"name": "query"}]},
+        {"name": "clock"},
+    ]
+}
+
+
+def _tool_names(tool_set):
+    return [tool["name"] for tool in json.loads(tool_set.tools_json)]
+
+
+def test_authenticated_tools_need_the_api_key(monkeypatch):
+    monkeypatch.setattr(settings, "BRAVE_API_KEY", "")
+    tool_set = compile_config(CONFIG)
+    assert list(tool_set.tools) == ["clock"]
+    assert _tool_names(tool_set) == ["clock"]
+
+    monkeypatch.setattr(settings, "BRAVE_API_KEY", "key")
+    assert _tool_names(compile_config(CONFIG)) == ["web", "clock"]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "mcp_config.yaml"
+    path.write_text(yaml.safe_dump(CONFIG))
+    return ToolRegistry(path=str(path))
+
+
+def test_failing_listener_keeps_and_restores_the_current_config(registry):
+    applied = []
+    registry.subscribe(lambda config: applied.append(len(config["tools"])))
+    registry.load()
+    previous = registry.current
+
+    def reject(config):
+        if len(config["tools"]) == 1:
+            raise ValueError("rejected")
+
+    registry.subscribe(reject)
+    with open(registry.path, "w") as f:
+        yaml.safe_dump({"tools": CONFIG["tools"][1:]}, f)
+    assert registry.reload_if_changed() is False
+
+    assert registry.current.tools == previous.tools
+    # The first listener saw the new configuration, then got the previous one back
+    assert applied == [2, 1, 2]
@@ -0,0 +1,51 @@
+import asyncio
+import sqlite3
+from datetime import date
+
+from sqlalchemy import select
+
+from app import models
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal, db_url
+from app.services.usage import UsageAggregator
+
+
+def test_flush_cancelled_mid_write_loses_nothing(database, run):
+    day = date(2025, 1, 1)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user = models.User(
+                username="usage", email="usage@example.com", hashed_password="x"
+            )
+            db.add(user)
+            await db.commit()
+            user_id = user.id
+
+        usage = UsageAggregator(flush_interval=3600)
+        usage.start()
+        usage.record(user_id, 10, 5, 0.5, day=day)
+        # Another process holds the write lock: the flush waits in its upsert
+        blocker = sqlite3.connect(db_url[len("sqlite:///"):], isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        flushing = asyncio.create_task(usage.flush())
+        await asyncio.sleep(0.2)
+        assert usage.pending() == {}
+        flushing.cancel()
+        await asyncio.sleep(0)
+        blocker.execute("ROLLBACK")
+        blocker.close()
+        usage.record(user_id, 1, 1, 0.1, day=day)
+        await usage.stop()
+
+        async with AsyncReadSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(models.UsageRecord).where(
+                        models.UsageRecord.user_id == user_id
+                    )
+                )
+            ).scalars().all()
+        assert [(r.input_tokens, r.output_tokens) for r in rows] == [(11, 6)]
+        assert abs(rows[0].cost - 0.6) < 1e-9
+
+    run(scenario())
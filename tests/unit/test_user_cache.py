@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from app import models, schemas
+from app.core import metrics
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal
+from app.services import user as user_service
+from app.services.user import UserIdentityCache
+
+
+def _user(user_id: int, username: str) -> schemas.UserInDB:
+    return schemas.UserInDB(
+        id=user_id,
+        username=username,
+        email=f"{username}@example.com",
+        hashed_password="x",
+        is_active=True,
+        is_admin=False,
+        created_at=datetime(2025, 1, 1),
+    )
+
+
+def test_lookup_by_id_username_and_email():
+    users = UserIdentityCache(maxsize=8, ttl=60)
+    users.put(_user(1, "alice"))
+    assert users.get(1).username == "alice"
+    assert users.get_by_username("alice").id == 1
+    assert users.get_by_email("alice@example.com").id == 1
+    assert users.get(2) is None
+
+
+def test_evict_drops_every_alias():
+    users = UserIdentityCache(maxsize=8, ttl=60)
+    users.put(_user(1, "alice"))
+    users.evict(1)
+    assert users.get(1) is None
+    assert users.get_by_username("alice") is None
+    assert users.get_by_email("alice@example.com") is None
+
+
+def test_renamed_user_leaves_no_stale_alias():
+    users = UserIdentityCache(maxsize=8, ttl=60)
+    users.put(_user(1, "alice"))
+    users.put(_user(1, "alicia"))
+    assert users.get_by_username("alice") is None
+    assert users.get_by_username("alicia").id == 1
+
+
+def test_least_recently_used_user_is_evicted():
+    users = UserIdentityCache(maxsize=2, ttl=60)
+    users.put(_user(1, "alice"))
+    users.put(_user(2, "bob"))
+    users.put(_user(3, "carol"))
+    assert users.get(1) is None
+    assert users.get(3) is not None
+
+
+def test_repository_reads_through_the_cache(database, run):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            row = models.User(
+                username="cached", email="cached@example.com", hashed_password="x"
+            )
+            db.add(row)
+            await db.commit()
+            user_id = row.id
+        user_service.user_cache.clear()
+
+        async with AsyncReadSessionLocal() as db:
+            misses = user_service.cache_stats()["misses"]
+            first = await user_service.get_user_by_username(db, "cached")
+            assert user_service.cache_stats()["misses"] == misses + 1
+            # Served from the cache, by any key
+            hits = user_service.cache_stats()["hits"]
+            assert (await user_service.get_user(db, user_id)) == first
+            by_email = await user_service.get_user_by_email(db, "cached@example.com")
+            assert by_email == first
+            assert user_service.cache_stats()["hits"] == hits + 2
+            assert await user_service.get_user_by_username(db, "nobody") is None
+
+    run(scenario())
+
+
+def test_cache_stats_are_exported_as_metrics():
+    user_service.user_cache.get(-1)
+    stats = user_service.cache_stats()
+    lookups = metrics.registry.snapshot()["cache_lookups_total"]
+    assert stats["misses"] >= 1
+    assert lookups['["user", "hit"]'] == stats["hits"]
+    assert lookups['["user", "miss"]'] == stats["misses"]